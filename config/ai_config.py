@@ -7,6 +7,7 @@ Caracteristicas:
 - Mantiene compatibilidad total con GeminiLibrary
 - Soporte para multiples proveedores (Gemini, Claude, AWS)
 - Fallback automatico entre proveedores
+- Circuit breaker y enrutamiento por latencia entre proveedores
 - Configuracion centralizada en ai_providers.json
 """
 
@@ -34,6 +35,12 @@ except ImportError as e:
     CONFIG_MANAGER_AVAILABLE = False
     print(f"WARNING No se pudo importar ConfigManager: {e}")
 
+# Snapshot compartido de ai_providers.json (se relee solo si el archivo cambia)
+from libraries.config_snapshot import get_snapshot, thaw
+
+# Circuit breakers por proveedor (alimentados por las llamadas reales)
+from libraries.ai_circuit_breaker import get_circuit_breaker, route_providers
+
 
 class AIConfigManager:
     """Gestor de configuracion para multiples proveedores de IA"""
@@ -57,37 +64,33 @@ class AIConfigManager:
             except Exception as e:
                 print(f"WARNING Error inicializando ConfigManager: {e}")
 
-        self._config = None
+        self._snapshot = None
+        self._static_config = None
         self._load_config()
 
+    @property
+    def _config(self) -> Dict[str, Any]:
+        """Configuracion vigente: vista inmutable, recargada si ai_providers.json cambio"""
+        if self._snapshot is not None:
+            return self._snapshot.get()
+        return self._static_config
+
     def _load_config(self) -> None:
         """Cargar configuracion desde archivo JSON"""
         try:
             if not self.config_file.exists():
                 raise FileNotFoundError(f"Archivo de configuracion no encontrado: {self.config_file}")
 
-            # Intentar multiples encodings para mayor robustez
-            encodings = ['utf-8-sig', 'utf-8', 'latin-1']
-            config_loaded = False
-
-            for encoding in encodings:
-                try:
-                    with open(self.config_file, 'r', encoding=encoding) as f:
-                        self._config = json.load(f)
-                    print(f"OK Configuracion AI cargada desde: {self.config_file} ({encoding})")
-                    config_loaded = True
-                    break
-                except (UnicodeDecodeError, json.JSONDecodeError) as e:
-                    print(f"WARNING Error con encoding {encoding}: {e}")
-                    continue
-
-            if not config_loaded:
-                raise Exception("No se pudo cargar con ningun encoding")
+            # El snapshot prueba utf-8-sig y latin-1 para mayor robustez
+            snapshot = get_snapshot(self.config_file)
+            snapshot.get()
+            self._snapshot = snapshot
+            print(f"OK Configuracion AI cargada desde: {self.config_file} ({snapshot.encoding})")
 
         except Exception as e:
             print(f"ERROR cargando configuracion AI: {e}")
             # Configuracion por defecto para fallback
-            self._config = {
+            self._static_config = {
                 "providers": {"gemini": {"enabled": True}},
                 "settings": {"active_provider": "gemini"}
             }
@@ -104,13 +107,13 @@ class AIConfigManager:
             provider_name: Nombre del proveedor (gemini, claude, aws)
 
         Returns:
-            Dict con configuracion del proveedor
+            Dict con configuracion del proveedor (copia modificable y serializable)
         """
         providers = self._config.get("providers", {})
         if provider_name not in providers:
             raise ValueError(f"Proveedor no configurado: {provider_name}")
 
-        return providers[provider_name]
+        return thaw(providers[provider_name])
 
     def is_provider_enabled(self, provider_name: str) -> bool:
         """Verificar si un proveedor esta habilitado"""
@@ -142,6 +145,28 @@ class AIConfigManager:
         except ValueError:
             return None
 
+    def get_base_url(self, provider_name: str) -> str:
+        """
+        Obtener base_url efectivo de un proveedor
+
+        La variable de entorno <PROVEEDOR>_BASE_URL (ej. GEMINI_BASE_URL) tiene
+        prioridad sobre ai_providers.json, para apuntar a servidores locales de prueba
+
+        Args:
+            provider_name: Nombre del proveedor
+
+        Returns:
+            URL base sin barra final
+        """
+        override = os.getenv(f"{provider_name.upper()}_BASE_URL")
+        if override:
+            return override.rstrip("/")
+
+        try:
+            return self.get_provider_config(provider_name).get("base_url", "").rstrip("/")
+        except ValueError:
+            return ""
+
     def verify_provider_availability(self, provider_name: str) -> Dict[str, Any]:
         """
         Verificar disponibilidad completa de un proveedor
@@ -212,13 +237,22 @@ class AIConfigManager:
                 print(f"   - {issue}")
             return False
 
-        # Actualizar configuracion
-        self._config["settings"]["active_provider"] = provider_name
+        # Actualizar configuracion (la vista compartida es inmutable: se edita una copia)
+        config = thaw(self._config)
+        config.setdefault("settings", {})["active_provider"] = provider_name
 
         # Guardar configuracion actualizada
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self._config, f, indent=2, ensure_ascii=False)
+            temporal = Path(str(self.config_file) + ".tmp")
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, self.config_file)
+
+            # Otro proveedor con el mismo largo de nombre puede no cambiar el tamano ni el mtime
+            if self._snapshot is not None:
+                self._snapshot.invalidate()
+            else:
+                self._static_config = config
 
             print(f"OK Proveedor activo cambiado a: {provider_name}")
             return True
@@ -261,6 +295,24 @@ class AIConfigManager:
         # Filtrar solo proveedores disponibles manteniendo el orden
         return [provider for provider in fallback_order if provider in available]
 
+    def get_provider_health(self, provider_name: str) -> Dict[str, Any]:
+        """Obtener estado del circuito y latencia media de un proveedor"""
+        return get_circuit_breaker(provider_name).stats()
+
+    def get_routed_providers(self) -> List[str]:
+        """
+        Obtener proveedores de fallback ordenados por salud y latencia
+
+        Es el mismo orden con el que el hedging elige el proveedor secundario:
+        sin circuitos abiertos, cerrados antes que half-open y los lentos al final.
+
+        Returns:
+            Lista de proveedores en orden de uso
+        """
+        candidates = self.get_fallback_providers()
+        tolerance = self._config.get("settings", {}).get("routing", {}).get("latency_tolerance", 0.25)
+        return route_providers(candidates, tolerance)
+
     def get_system_status(self) -> Dict[str, Any]:
         """Obtener estado completo del sistema multi-proveedor"""
         status = {
@@ -275,7 +327,9 @@ class AIConfigManager:
 
         # Detalle por proveedor
         for provider_name in self._config.get("providers", {}):
-            status["providers_detail"][provider_name] = self.verify_provider_availability(provider_name)
+            detail = self.verify_provider_availability(provider_name)
+            detail["health"] = self.get_provider_health(provider_name)
+            status["providers_detail"][provider_name] = detail
 
         return status
 
@@ -293,6 +347,9 @@ class AIConfigManager:
         for provider, detail in status["providers_detail"].items():
             icon = "OK" if detail["available"] else "ERROR"
             print(f"   {icon} {provider}: {'Disponible' if detail['available'] else 'No disponible'}")
+            health = detail["health"]
+            if health.get("estado") != "closed" or health.get("latencia_media") is not None:
+                print(f"      Circuito: {health.get('estado')} | Latencia media: {health.get('latencia_media')}s")
             if detail["issues"]:
                 for issue in detail["issues"]:
                     print(f"      - {issue}")
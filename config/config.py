@@ -2,10 +2,12 @@
 ConfigManager v1.2 - Gestor de configuración centralizada
 Maneja credenciales desde un archivo JSON maestro
 """
-import json
 import os
 from pathlib import Path
 
+# Snapshot compartido por el proceso: credentials.json solo se relee si cambia
+from libraries.config_snapshot import get_snapshot, thaw
+
 
 class ConfigManager:
     """Gestor centralizado de configuración para el proyecto v1.2"""
@@ -24,19 +26,30 @@ class ConfigManager:
             current_dir = Path(__file__).parent
             self.credentials_file = current_dir / "credentials.json"
         
-        self.config_data = None
+        self._snapshot = None
         self._load_config()
+
+    @property
+    def _config(self):
+        """Configuración vigente: vista inmutable, recargada si credentials.json cambió"""
+        return self._snapshot.get()
+
+    @property
+    def config_data(self):
+        """Copia modificable y serializable de la configuración vigente"""
+        return thaw(self._config)
     
     def _load_config(self):
         """Carga la configuración desde el archivo JSON"""
         try:
             if not os.path.exists(self.credentials_file):
                 raise FileNotFoundError(f"Archivo de credenciales no encontrado: {self.credentials_file}")
-            
-            # Leer con encoding utf-8-sig para manejar BOM
-            with open(self.credentials_file, 'r', encoding='utf-8-sig') as f:
-                self.config_data = json.load(f)
-                
+
+            # El snapshot lee con utf-8-sig para manejar BOM
+            snapshot = get_snapshot(self.credentials_file)
+            snapshot.get()
+            self._snapshot = snapshot
+
         except Exception as e:
             raise Exception(f"Error cargando configuración: {e}")
     
@@ -47,18 +60,19 @@ class ConfigManager:
         Returns:
             list: Lista de todas las credenciales válidas
         """
-        if not self.config_data:
+        config_data = self._config
+        if not config_data:
             return []
         
         all_credentials = []
-        environments = self.config_data.get("environments", {})
+        environments = config_data.get("environments", {})
         
         for env_name, env_data in environments.items():
             credentials = env_data.get("credentials", [])
             for cred in credentials:
                 if cred.get("activo", True):
-                    # Agregar información del entorno
-                    cred_copy = cred.copy()
+                    # Agregar información del entorno (copia modificable de la vista)
+                    cred_copy = thaw(cred)
                     cred_copy["entorno"] = env_name
                     cred_copy["url"] = env_data.get("url", "")
                     all_credentials.append(cred_copy)
@@ -77,17 +91,18 @@ class ConfigManager:
         Returns:
             list: Lista de credenciales para el entorno especificado
         """
-        if not self.config_data:
+        config_data = self._config
+        if not config_data:
             return []
         
-        env_data = self.config_data.get("environments", {}).get(environment, {})
+        env_data = config_data.get("environments", {}).get(environment, {})
         credentials = env_data.get("credentials", [])
         
         # Filtrar solo credenciales activas y agregar información del entorno
         active_credentials = []
         for cred in credentials:
             if cred.get("activo", True):
-                cred_copy = cred.copy()
+                cred_copy = thaw(cred)
                 cred_copy["entorno"] = environment
                 cred_copy["url"] = env_data.get("url", "")
                 active_credentials.append(cred_copy)
@@ -124,18 +139,19 @@ class ConfigManager:
         }
         
         try:
-            if not self.config_data:
+            config_data = self._config
+            if not config_data:
                 result["valid"] = False
                 result["errors"].append("No se pudo cargar la configuración")
                 return result
             
             # Validar estructura básica
-            if "environments" not in self.config_data:
+            if "environments" not in config_data:
                 result["valid"] = False
                 result["errors"].append("Falta la sección 'environments'")
             
             # Validar entornos
-            environments = self.config_data.get("environments", {})
+            environments = config_data.get("environments", {})
             if not environments:
                 result["valid"] = False
                 result["errors"].append("No hay entornos configurados")
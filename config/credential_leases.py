@@ -0,0 +1,246 @@
+"""
+CredentialLeaseManager - Arriendo de credenciales por worker para ejecución paralela
+Reparte credenciales activas distintas a cada worker (pabot, procesos robot
+concurrentes) para que dos sesiones no usen la misma cuenta a la vez.
+El estado de los arriendos se guarda en un archivo JSON protegido por un
+bloqueo entre procesos.
+"""
+import json
+import os
+import socket
+import time
+import uuid
+from pathlib import Path
+
+from config.config import ConfigManager
+from libraries.file_lock import FileLock, process_alive
+
+
+class CredentialPoolExhausted(TimeoutError):
+    """No se liberó ninguna credencial dentro del tiempo de espera"""
+
+
+class CredentialLeaseManager:
+    """Gestor de arriendos de credenciales sobre el ConfigManager centralizado"""
+
+    def __init__(self, config_manager=None, leases_file=None, lease_ttl=900,
+                 wait_timeout=120, poll_interval=0.5, worker_id=None):
+        """
+        Inicializa el gestor de arriendos
+
+        Args:
+            config_manager: ConfigManager a utilizar. Si no se especifica, se crea uno.
+            leases_file: Archivo JSON de arriendos. Por defecto data/leases/credential_leases.json
+            lease_ttl: Segundos tras los que un arriendo no renovado se considera abandonado
+                (solo si no se puede comprobar que su proceso sigue vivo)
+            wait_timeout: Segundos máximos de espera cuando todas las credenciales están arrendadas
+            poll_interval: Segundos entre reintentos mientras se espera
+            worker_id: Identificador del worker. Por defecto host:pid
+        """
+        self.config_manager = config_manager or ConfigManager()
+
+        if leases_file:
+            self.leases_file = Path(leases_file)
+        else:
+            self.leases_file = Path(__file__).parent.parent / "data" / "leases" / "credential_leases.json"
+        self.leases_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.lease_ttl = float(lease_ttl)
+        self.wait_timeout = float(wait_timeout)
+        self.poll_interval = float(poll_interval)
+        self.hostname = socket.gethostname()
+        self.worker_id = worker_id or f"{self.hostname}:{os.getpid()}"
+        self._lock = FileLock(str(self.leases_file) + ".lock", timeout=30)
+
+    @staticmethod
+    def _credential_key(credential):
+        return f"{credential.get('entorno', 'qa')}:{credential.get('usuario', '')}"
+
+    def _read_leases(self):
+        if not self.leases_file.exists():
+            return {}
+        try:
+            with open(self.leases_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("leases", {})
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Archivo de arriendos ilegible, se reinicia: {e}")
+            return {}
+
+    def _write_leases(self, leases):
+        temporal = self.leases_file.with_suffix(".tmp")
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({"leases": leases}, f, indent=2, ensure_ascii=False)
+        os.replace(temporal, self.leases_file)
+
+    def _is_abandoned(self, lease, now):
+        """
+        Un arriendo está abandonado si su proceso ya no existe en esta máquina
+
+        Mientras el proceso siga vivo el arriendo se conserva aunque la suite dure
+        más que lease_ttl, también en Windows. El TTL solo decide para procesos
+        de otras máquinas o si no se puede comprobar el proceso.
+        """
+        if lease.get("host") == self.hostname:
+            vivo = process_alive(lease.get("pid", 0))
+            if vivo is not None:
+                return not vivo
+        return lease.get("expira", 0) <= now
+
+    def _purge(self, leases, now):
+        return {key: lease for key, lease in leases.items() if not self._is_abandoned(lease, now)}
+
+    def _try_acquire(self, environment):
+        """Un intento bajo bloqueo. Devuelve la credencial arrendada o None si no hay libres"""
+        credentials = self.config_manager.get_credentials_by_environment(environment)
+        if not credentials:
+            raise ValueError(f"No hay credenciales activas para el entorno: {environment}")
+
+        with self._lock:
+            now = time.time()
+            leases = self._purge(self._read_leases(), now)
+
+            # Cada arriendo pedido renueva todos los del worker, también los de otros entornos
+            for lease in leases.values():
+                if lease.get("worker") == self.worker_id:
+                    lease["expira"] = now + self.lease_ttl
+
+            # Reentrante: un worker que ya tiene credencial en el entorno la conserva
+            for credential in credentials:
+                lease = leases.get(self._credential_key(credential))
+                if lease and lease.get("worker") == self.worker_id:
+                    self._write_leases(leases)
+                    return dict(credential, lease_id=lease["lease_id"], worker=self.worker_id)
+
+            # Las credenciales vienen ordenadas por prioridad
+            for credential in credentials:
+                key = self._credential_key(credential)
+                if key in leases:
+                    continue
+                lease_id = uuid.uuid4().hex
+                leases[key] = {
+                    "lease_id": lease_id,
+                    "worker": self.worker_id,
+                    "host": self.hostname,
+                    "pid": os.getpid(),
+                    "adquirido": now,
+                    "expira": now + self.lease_ttl,
+                }
+                self._write_leases(leases)
+                return dict(credential, lease_id=lease_id, worker=self.worker_id)
+
+            self._write_leases(leases)
+            return None
+
+    def acquire(self, environment="qa", timeout=None):
+        """
+        Arrienda la credencial activa de mayor prioridad que no use otro worker
+
+        Args:
+            environment: Entorno de la credencial
+            timeout: Segundos de espera si todas están arrendadas. Por defecto wait_timeout
+
+        Returns:
+            dict: Credencial con lease_id y worker
+
+        Raises:
+            CredentialPoolExhausted: Si no se libera ninguna credencial a tiempo
+        """
+        timeout = self.wait_timeout if timeout is None else float(timeout)
+        deadline = time.monotonic() + timeout
+
+        while True:
+            credential = self._try_acquire(environment)
+            if credential:
+                print(f"🔐 Credencial arrendada para {self.worker_id}: {credential['usuario']} ({environment})")
+                return credential
+            if time.monotonic() >= deadline:
+                raise CredentialPoolExhausted(
+                    f"Todas las credenciales de '{environment}' están arrendadas por otros workers "
+                    f"tras esperar {timeout:.0f}s. Reduzca los procesos paralelos o agregue credenciales activas."
+                )
+            time.sleep(self.poll_interval)
+
+    def release(self, credential_or_lease_id):
+        """
+        Libera un arriendo
+
+        Args:
+            credential_or_lease_id: Credencial devuelta por acquire o su lease_id
+
+        Returns:
+            bool: True si el arriendo existía y se liberó
+        """
+        lease_id = credential_or_lease_id
+        if isinstance(credential_or_lease_id, dict):
+            lease_id = credential_or_lease_id.get("lease_id")
+        if not lease_id:
+            return False
+
+        with self._lock:
+            leases = self._read_leases()
+            remaining = {key: lease for key, lease in leases.items() if lease.get("lease_id") != lease_id}
+            if len(remaining) == len(leases):
+                return False
+            self._write_leases(remaining)
+        print(f"🔓 Arriendo liberado: {lease_id}")
+        return True
+
+    def renew(self, credential_or_lease_id):
+        """Extiende el arriendo otro lease_ttl. Devuelve False si ya no existe"""
+        lease_id = credential_or_lease_id
+        if isinstance(credential_or_lease_id, dict):
+            lease_id = credential_or_lease_id.get("lease_id")
+
+        with self._lock:
+            leases = self._read_leases()
+            for lease in leases.values():
+                if lease.get("lease_id") == lease_id:
+                    lease["expira"] = time.time() + self.lease_ttl
+                    self._write_leases(leases)
+                    return True
+        return False
+
+    def release_worker(self, worker_id=None):
+        """
+        Libera todos los arriendos de un worker (teardown de suite)
+
+        Returns:
+            int: Número de arriendos liberados
+        """
+        worker_id = worker_id or self.worker_id
+        with self._lock:
+            leases = self._read_leases()
+            remaining = {key: lease for key, lease in leases.items() if lease.get("worker") != worker_id}
+            released = len(leases) - len(remaining)
+            if released:
+                self._write_leases(remaining)
+        return released
+
+    def get_status(self):
+        """
+        Estado actual de los arriendos vigentes
+
+        Returns:
+            dict: Arriendos por credencial y credenciales libres por entorno
+        """
+        with self._lock:
+            leases = self._purge(self._read_leases(), time.time())
+
+        free = {}
+        for credential in self.config_manager.get_all_valid_credentials():
+            if self._credential_key(credential) not in leases:
+                free.setdefault(credential.get("entorno", "qa"), []).append(credential.get("usuario"))
+
+        return {"worker": self.worker_id, "arriendos": leases, "libres": free}
+
+
+if __name__ == "__main__":
+    # Test básico de arriendos
+    try:
+        manager = CredentialLeaseManager(wait_timeout=0)
+        credential = manager.acquire("qa")
+        print(f"Usuario arrendado: {credential['usuario']}")
+        print(json.dumps(manager.get_status(), indent=2, ensure_ascii=False))
+        manager.release(credential)
+    except Exception as e:
+        print(f"Error: {e}")
@@ -7,9 +7,14 @@ Para uso con Robot Framework y Gemini AI
 import json
 import os
 import re
+import sys
+import threading
 from datetime import datetime
 from pathlib import Path
 
+# Robot Framework importa la librería por ruta: la raíz del repo en el path habilita config.* y libraries.*
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 # 🔧 CONFIGURACIÓN CENTRALIZADA v1.2 - Importar ConfigManager
 try:
     from config.config import ConfigManager
@@ -18,12 +23,23 @@ except ImportError:
     CONFIG_MANAGER_AVAILABLE = False
     print("⚠️ ConfigManager no disponible. Usando método tradicional para credenciales.")
 
-# Importación condicional de Gemini AI
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+from config.credential_leases import CredentialLeaseManager
+from libraries.ai_cache import ResponseCache, calcular_clave
+from libraries.ai_circuit_breaker import circuit_breaker_stats
+from libraries.ai_clients import get_gemini_model, ai_client_stats
+from libraries.ai_hedging import hedged_call, hedging_stats
+from libraries.ai_rate_limiter import rate_limiter_stats
+from libraries.config_snapshot import config_snapshot_stats
+from libraries.content_rules import get_content_rules, literal_text
+from libraries.credential_fuzzer import CredentialFuzzer
+from libraries.credential_index import get_credential_index, credential_index_stats, normalize
+from libraries.credential_jsonl import is_jsonl_path, write_credentials_jsonl, take_credentials
+from libraries.credential_pool import CredentialPool, CATEGORIAS
+from libraries.lazy_imports import module_available
+from libraries.text_similarity import get_similarity_engine
+
+# Importación condicional de Gemini AI (se comprueba sin importar el SDK, que se carga al primer uso)
+GEMINI_AVAILABLE = module_available("google.generativeai")
 
 class GeminiLibrary:
     """Librería Robot Framework híbrida para generar datos de prueba usando Gemini AI"""
@@ -31,44 +47,103 @@ class GeminiLibrary:
     ROBOT_LIBRARY_SCOPE = 'GLOBAL'
     ROBOT_LIBRARY_VERSION = '4.0'  # ← Incrementado para v1.2
 
-    def __init__(self, api_key=None, model="gemini-1.5-flash"):
+    # TTL (segundos) del cache de respuestas por keyword. 0 desactiva el cache para esa keyword
+    CACHE_TTL_POR_KEYWORD = {
+        # Cada corrida debe traer casos nuevos (lo exige además el índice de duplicados)
+        "generar_credenciales_siesa": 0,
+        "generar_datos_de_prueba": 24 * 3600,
+        "verificar_contenido_apropiado": 7 * 24 * 3600,
+        "validar_similitud_semantica": 7 * 24 * 3600,
+        # El relleno del pool necesita credenciales nuevas en cada llamada
+        "pool_credenciales_invalidas": 0,
+    }
+
+    def __init__(self, api_key=None, model="gemini-1.5-flash", cache=True, cache_dir=None, cache_max_entries=5000,
+                 dedupe_index=True):
         """
         Inicializa la librería con configuración de Gemini
 
         Args:
             api_key: API Key de Gemini. Si no se proporciona, busca en GEMINI_API_KEY
             model: Modelo de Gemini a utilizar (adoptado de Claude - configurabilidad)
+            cache: Si reutilizar respuestas de IA idénticas desde el cache en disco
+            cache_dir: Directorio del cache (por defecto data/cache)
+            cache_max_entries: Máximo de respuestas almacenadas antes de desalojar (LRU)
+            dedupe_index: Si descartar credenciales que la IA ya devolvió en corridas anteriores
         """
         self.model_name = model
         self.api_key = api_key or os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
+        # Modelo de Gemini (se crea al primer uso)
         self.model = None
-        
-        # 🔧 CONFIGURACIÓN CENTRALIZADA v1.2 - Inicializar ConfigManager
-        self.config_manager = None
-        if CONFIG_MANAGER_AVAILABLE:
+        self._modelo_inicializado = False
+        self._init_lock = threading.Lock()
+
+        # Cache de respuestas compartido entre ejecuciones y procesos
+        self.cache = None
+        if cache:
             try:
-                self.config_manager = ConfigManager()
-                print("✅ ConfigManager inicializado - Credenciales centralizadas disponibles")
+                self.cache = ResponseCache(cache_dir=cache_dir, max_entries=cache_max_entries)
             except Exception as e:
-                print(f"⚠️ Error inicializando ConfigManager: {e}")
-                self.config_manager = None
+                print(f"⚠️ Error inicializando cache de IA: {e}")
+                self.cache = None
+        
+        # 🔧 CONFIGURACIÓN CENTRALIZADA v1.2 - ConfigManager (se crea al primer uso)
+        self.config_manager = None
+        self._config_inicializada = False
+
+        # Arriendos de credenciales (se crea al primer uso)
+        self.lease_manager = None
+
+        # Pool de credenciales inválidas (se crea al primer uso)
+        self.credential_pool = None
+
+        # Índice de duplicados entre corridas (se crea al primer uso)
+        self.dedupe_index = dedupe_index
+        self.credential_index = None
+
+        # Nivel de la cascada que decidió cada verificación de contenido
+        self.niveles_contenido = {"reglas": 0, "cache": 0, "ia": 0, "basica": 0}
 
         # Validación estricta de API key (adoptado de Claude)
         self._validate_api_key()
 
-        if GEMINI_AVAILABLE and self.api_key:
-            try:
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel(self.model_name)
-                print(f"✅ GeminiLibrary v1.2 inicializada correctamente con {self.model_name}")
-            except Exception as e:
-                print(f"⚠️ Error inicializando Gemini: {e}")
-                self.model = None
-        else:
-            if not GEMINI_AVAILABLE:
-                print("⚠️ Gemini AI no disponible. Instalar: pip install google-generativeai")
-            if not self.api_key:
-                print("⚠️ GEMINI_API_KEY no configurada. Usando datos de fallback")
+        if not GEMINI_AVAILABLE:
+            print("⚠️ Gemini AI no disponible. Instalar: pip install google-generativeai")
+        if not self.api_key:
+            print("⚠️ GEMINI_API_KEY no configurada. Usando datos de fallback")
+
+    def _get_model(self):
+        """Modelo de Gemini, importando el SDK y creándolo en la primera llamada (None si no hay IA)"""
+        if self._modelo_inicializado:
+            return self.model
+        # El hilo de relleno del pool puede pedir el modelo a la vez que la prueba
+        with self._init_lock:
+            if not self._modelo_inicializado:
+                if GEMINI_AVAILABLE and self.api_key:
+                    try:
+                        self.model = get_gemini_model(self.model_name, self.api_key)
+                        print(f"✅ GeminiLibrary v1.2 inicializada correctamente con {self.model_name}")
+                    except Exception as e:
+                        print(f"⚠️ Error inicializando Gemini: {e}")
+                        self.model = None
+                self._modelo_inicializado = True
+        return self.model
+
+    def _get_config_manager(self):
+        """ConfigManager, leyendo credentials.json en la primera llamada (None si no está disponible)"""
+        if self._config_inicializada:
+            return self.config_manager
+        with self._init_lock:
+            if not self._config_inicializada:
+                if CONFIG_MANAGER_AVAILABLE:
+                    try:
+                        self.config_manager = ConfigManager()
+                        print("✅ ConfigManager inicializado - Credenciales centralizadas disponibles")
+                    except Exception as e:
+                        print(f"⚠️ Error inicializando ConfigManager: {e}")
+                        self.config_manager = None
+                self._config_inicializada = True
+        return self.config_manager
 
     def _validate_api_key(self):
         """Valida la API key de Gemini con formato específico (adoptado de Claude)"""
@@ -113,6 +188,47 @@ class GeminiLibrary:
 
         return text  # Devolver el texto original si no se encuentra JSON
 
+    def _validar_json(self, text):
+        """Lanza excepción si el texto no contiene JSON parseable"""
+        json.loads(self._extract_json_from_text(text))
+
+    def _generate_content(self, prompt, keyword, validador=None):
+        """
+        Llama a generate_content pasando por el cache de respuestas
+
+        Args:
+            prompt: Prompt a enviar al modelo
+            keyword: Keyword que origina la llamada (determina el TTL)
+            validador: Función opcional; si lanza excepción la respuesta no se almacena
+
+        Returns:
+            str: Texto de la respuesta (sin espacios al inicio/final)
+        """
+        ttl = self.CACHE_TTL_POR_KEYWORD.get(keyword, 0)
+        clave = None
+
+        if self.cache and ttl > 0:
+            # La keyword define el validador aplicado: un mismo prompt no comparte entrada entre keywords.
+            # Cantidad, criterios y usuarios a evitar ya van dentro del prompt
+            clave = calcular_clave(self.model_name, prompt, {"keyword": keyword})
+            cacheada = self.cache.get(clave, keyword)
+            if cacheada is not None:
+                return cacheada
+
+        response_text = hedged_call("gemini", lambda: self._get_model().generate_content(prompt), prompt,
+                                    keyword=keyword).strip()
+
+        if clave:
+            try:
+                if validador:
+                    validador(response_text)
+                self.cache.set(clave, response_text, ttl, keyword=keyword, modelo=self.model_name)
+            except Exception:
+                # Respuestas no utilizables no se almacenan
+                pass
+
+        return response_text
+
     def generar_credenciales_siesa(self, cantidad=5, incluir_validas=True):
         """
         Genera credenciales específicamente para SIESA ERP (método único de Gemini)
@@ -129,10 +245,10 @@ class GeminiLibrary:
             "metadata": {
                 "generado_en": datetime.now().isoformat(),
                 "cantidad_solicitada": cantidad,
-                "proveedor_ia": self.model_name if self.model else "fallback",
+                "proveedor_ia": self.model_name if self._get_model() else "fallback",
                 "version": "4.0",  # ← Actualizado para v1.2
                 "biblioteca": "GeminiLibrary",
-                "config_centralizada": bool(self.config_manager)  # ← NUEVO: Indicador de config centralizada
+                "config_centralizada": bool(self._get_config_manager())  # ← NUEVO: Indicador de config centralizada
             },
             "credenciales_validas": [],
             "credenciales_invalidas": []
@@ -140,7 +256,7 @@ class GeminiLibrary:
 
         # 🔧 CONFIGURACIÓN CENTRALIZADA v1.2 - Cargar credenciales desde ConfigManager
         if incluir_validas:
-            if self.config_manager:
+            if self._get_config_manager():
                 try:
                     # Obtener todas las credenciales válidas desde configuración central
                     credenciales_centrales = self.config_manager.get_all_valid_credentials()
@@ -168,7 +284,7 @@ class GeminiLibrary:
                 resultado["credenciales_validas"] = self._get_fallback_valid_credentials()
 
         # Generar credenciales inválidas usando IA o fallback
-        if self.model and cantidad > 0:
+        if self._get_model() and cantidad > 0:
             try:
                 credenciales_ia = self._generar_con_ia(cantidad)
                 resultado["credenciales_invalidas"] = credenciales_ia
@@ -198,8 +314,70 @@ class GeminiLibrary:
             }
         ]
 
-    def _generar_con_ia(self, cantidad):
-        """Genera credenciales usando Gemini AI con extracción JSON híbrida"""
+    def _generar_con_ia(self, cantidad, keyword="generar_credenciales_siesa", max_reintentos=2):
+        """
+        Genera credenciales usando Gemini AI con extracción JSON híbrida
+
+        Con el índice de duplicados activo se descartan las credenciales que la IA
+        ya devolvió en corridas anteriores y se piden de nuevo solo las faltantes.
+        Los casos fijos (campos vacíos) se repiten a propósito en cada corrida:
+        no pasan por el índice ni provocan nuevas peticiones
+        """
+        credenciales_invalidas = self._pedir_credenciales_ia(cantidad, keyword)
+        if credenciales_invalidas is None:
+            return self._get_fallback_credentials(cantidad)
+
+        indice = self._get_credential_index()
+        if not indice or not isinstance(credenciales_invalidas, list):
+            return credenciales_invalidas
+
+        nuevas, repetidas, vistas = [], [], set()
+        for intento in range(max_reintentos + 1):
+            for credencial in credenciales_invalidas:
+                if not isinstance(credencial, dict):
+                    continue
+                clave = normalize(credencial)
+                if clave in vistas:
+                    continue
+                vistas.add(clave)
+                if self._es_caso_fijo(credencial) or not indice.contains(credencial):
+                    nuevas.append(credencial)
+                else:
+                    repetidas.append(credencial)
+
+            faltantes = cantidad - len(nuevas)
+            if faltantes <= 0 or intento == max_reintentos:
+                break
+            print(f"🔁 {len(repetidas)} credenciales repetidas de corridas anteriores: pidiendo {faltantes} nuevas")
+            evitar = list(dict.fromkeys(str(c.get("usuario", "")) for c in repetidas))[-20:]
+            credenciales_invalidas = self._pedir_credenciales_ia(faltantes, keyword, evitar)
+            if not isinstance(credenciales_invalidas, list):
+                break
+
+        # Solo se registran en el índice las credenciales que realmente se devuelven
+        for credencial in nuevas:
+            if not self._es_caso_fijo(credencial):
+                indice.add(credencial)
+        try:
+            indice.save()
+        except Exception as e:
+            print(f"⚠️ Error guardando índice de credenciales: {e}")
+
+        # Si la IA no da suficientes casos nuevos, se completa con los repetidos
+        faltantes = cantidad - len(nuevas)
+        if faltantes > 0 and repetidas:
+            print(f"⚠️ Solo {len(nuevas)} credenciales nuevas de {cantidad}: se completan con repetidas")
+            nuevas += repetidas[:faltantes]
+        return nuevas
+
+    @staticmethod
+    def _es_caso_fijo(credencial):
+        """True para los casos que se prueban en cada corrida (usuario o clave vacíos)"""
+        return (credencial.get("categoria") == "campos_vacios"
+                or not credencial.get("usuario") or not credencial.get("clave"))
+
+    def _pedir_credenciales_ia(self, cantidad, keyword, evitar=None):
+        """Una petición de credenciales inválidas a la IA. Devuelve None si el JSON no es utilizable"""
         prompt = f"""
         Genera {cantidad} credenciales inválidas para testing de un sistema ERP empresarial SIESA.
         Incluye diferentes tipos de errores realistas:
@@ -222,19 +400,31 @@ class GeminiLibrary:
         
         NO agregues texto adicional, solo el JSON.
         """
+        if evitar:
+            # Solo en las peticiones de faltantes: la primera conserva su clave de cache
+            prompt += f"""
+        Ya se usaron estos usuarios, NO los repitas: {json.dumps(evitar, ensure_ascii=False)}
+        """
 
-        response = self.model.generate_content(prompt)
-        credenciales_text = response.text.strip()
+        credenciales_text = self._generate_content(prompt, keyword, self._validar_json)
 
         # Usar extracción JSON híbrida (Gemini + Claude)
         json_text = self._extract_json_from_text(credenciales_text)
 
         try:
-            credenciales_invalidas = json.loads(json_text)
-            return credenciales_invalidas
+            return json.loads(json_text)
         except json.JSONDecodeError as e:
             print(f"Error parseando JSON de IA: {e}")
-            return self._get_fallback_credentials(cantidad)
+            return None
+
+    def _get_credential_index(self):
+        if self.credential_index is None and self.dedupe_index:
+            try:
+                self.credential_index = get_credential_index()
+            except Exception as e:
+                print(f"⚠️ Error inicializando índice de credenciales: {e}")
+                self.dedupe_index = False
+        return self.credential_index
 
     def _get_fallback_credentials(self, cantidad):
         """Credenciales de fallback robustas cuando la IA no está disponible"""
@@ -297,11 +487,83 @@ class GeminiLibrary:
             }
         ]
 
+        # Más allá de los casos fijos, completar con el motor de mutación local
+        if cantidad > len(fallback_credentials):
+            fallback_credentials.extend(CredentialFuzzer().generate(cantidad - len(fallback_credentials)))
+
         return fallback_credentials[:cantidad]
 
+    def _generar_para_pool(self, cantidad):
+        """Generador del pool: IA sin cache, o credenciales de fallback"""
+        if self._get_model():
+            try:
+                return self._generar_con_ia(cantidad, keyword="pool_credenciales_invalidas")
+            except Exception as e:
+                print(f"⚠️ Error generando credenciales para el pool con IA: {e}. Usando fallback.")
+        return self._get_fallback_credentials(cantidad)
+
+    def _get_credential_pool(self):
+        if self.credential_pool is None:
+            try:
+                self.credential_pool = CredentialPool(self._generar_para_pool)
+            except Exception as e:
+                print(f"⚠️ Error inicializando pool de credenciales: {e}")
+        return self.credential_pool
+
+    def obtener_credencial_invalida_del_pool(self, categoria=None):
+        """
+        Entrega una credencial inválida pre-generada sin esperar a la IA
+        Si el pool está vacío devuelve una credencial de fallback de la categoría
+        y el pool se rellena en segundo plano
+
+        Args:
+            categoria: campos_vacios, caracteres_especiales, formato_invalido o inexistente.
+                       Sin categoría se toma de la más abundante
+
+        Returns:
+            dict: Credencial con usuario, clave, descripcion, error_esperado y categoria
+        """
+        if categoria and categoria not in CATEGORIAS:
+            raise ValueError(f"Categoría no válida: {categoria}. Opciones: {', '.join(CATEGORIAS)}")
+
+        pool = self._get_credential_pool()
+        credencial = pool.take(categoria) if pool else None
+        if credencial is not None:
+            return credencial
+
+        fallback = self._get_fallback_credentials(8)
+        if categoria:
+            fallback = [c for c in fallback if c["categoria"] == categoria] or fallback
+        return dict(fallback[0])
+
+    def rellenar_pool_de_credenciales(self):
+        """
+        Rellena el pool de forma síncrona hasta su tamaño objetivo (útil en Suite Setup)
+
+        Returns:
+            dict: Credenciales disponibles por categoría
+        """
+        pool = self._get_credential_pool()
+        if not pool:
+            print("⚠️ Pool de credenciales no disponible")
+            return {}
+        pool.refill(force=True)
+        return pool.sizes()
+
+    def obtener_estado_pool_de_credenciales(self):
+        """
+        Retorna el estado del pool de credenciales inválidas
+
+        Returns:
+            dict: Disponibles por categoría y contadores de este proceso
+        """
+        pool = self._get_credential_pool()
+        return pool.stats() if pool else {"habilitado": False}
+
     def guardar_credenciales_json(self, credenciales, archivo_destino):
         """
         Guarda las credenciales en archivo JSON con formato legible
+        Si el destino termina en .jsonl se escribe en JSON Lines (una credencial por línea)
 
         Args:
             credenciales: Dict con credenciales generadas
@@ -314,8 +576,11 @@ class GeminiLibrary:
         Path(archivo_destino).parent.mkdir(parents=True, exist_ok=True)
 
         try:
-            with open(archivo_destino, 'w', encoding='utf-8') as f:
-                json.dump(credenciales, f, ensure_ascii=False, indent=2)
+            if is_jsonl_path(archivo_destino):
+                write_credentials_jsonl(archivo_destino, credenciales)
+            else:
+                with open(archivo_destino, 'w', encoding='utf-8') as f:
+                    json.dump(credenciales, f, ensure_ascii=False, indent=2)
 
             total_validas = len(credenciales.get('credenciales_validas', []))
             total_invalidas = len(credenciales.get('credenciales_invalidas', []))
@@ -325,6 +590,31 @@ class GeminiLibrary:
         except Exception as e:
             return f"❌ Error guardando credenciales: {e}"
 
+    def leer_credenciales_de_archivo(self, archivo, tipo=None, cantidad=None):
+        """
+        Lee credenciales de un archivo generado (.json o .jsonl)
+        En JSON Lines solo se leen las líneas necesarias para `cantidad`
+
+        Args:
+            archivo: Ruta del archivo de credenciales
+            tipo: 'valida', 'invalida' o None para ambas
+            cantidad: Máximo de credenciales a devolver (todas si no se indica)
+
+        Returns:
+            list: Credenciales leídas
+        """
+        cantidad = int(cantidad) if cantidad not in (None, "", "None") else None
+        if is_jsonl_path(archivo):
+            return take_credentials(archivo, tipo, cantidad)
+
+        with open(archivo, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        listas = {"valida": ["credenciales_validas"], "invalida": ["credenciales_invalidas"]}
+        credenciales = []
+        for lista in listas.get(tipo, ["credenciales_validas", "credenciales_invalidas"]):
+            credenciales.extend(datos.get(lista, []))
+        return credenciales[:cantidad] if cantidad is not None else credenciales
+
     # 🔧 CONFIGURACIÓN CENTRALIZADA v1.2 - Nuevos métodos para acceso a credenciales
     def obtener_credenciales_centralizadas(self, entorno="qa"):
         """
@@ -336,7 +626,7 @@ class GeminiLibrary:
         Returns:
             list: Lista de credenciales para el entorno especificado
         """
-        if not self.config_manager:
+        if not self._get_config_manager():
             print("⚠️ ConfigManager no disponible. Usando credenciales de fallback.")
             return self._get_fallback_valid_credentials()
 
@@ -358,7 +648,7 @@ class GeminiLibrary:
         Returns:
             dict: Credencial de mayor prioridad o None
         """
-        if not self.config_manager:
+        if not self._get_config_manager():
             fallback = self._get_fallback_valid_credentials()
             print(f"✅ Credencial prioritaria obtenida para entorno '{entorno}': {fallback[0]['usuario'] if fallback else 'ninguna'}")
             return fallback[0] if fallback else None
@@ -372,6 +662,60 @@ class GeminiLibrary:
             fallback = self._get_fallback_valid_credentials()
             return fallback[0] if fallback else None
 
+    def _get_lease_manager(self):
+        if self.lease_manager is None and self._get_config_manager():
+            try:
+                self.lease_manager = CredentialLeaseManager(config_manager=self.config_manager)
+            except Exception as e:
+                print(f"⚠️ Error inicializando arriendos de credenciales: {e}")
+        return self.lease_manager
+
+    def arrendar_credencial(self, entorno="qa", timeout=None):
+        """
+        Obtiene una credencial activa que ningún otro worker paralelo esté usando
+        Si todas están arrendadas espera hasta `timeout` segundos (por defecto 120) y falla
+
+        Args:
+            entorno: Entorno de la credencial
+            timeout: Segundos máximos de espera
+
+        Returns:
+            dict: Credencial con lease_id para liberarla en el teardown
+        """
+        lease_manager = self._get_lease_manager()
+        if not lease_manager:
+            print("⚠️ Arriendo de credenciales no disponible. Usando credencial prioritaria sin arriendo.")
+            return self.obtener_credencial_prioritaria(entorno)
+
+        return lease_manager.acquire(entorno, timeout=timeout)
+
+    def liberar_credencial(self, credencial):
+        """
+        Libera una credencial obtenida con Arrendar Credencial
+
+        Args:
+            credencial: Credencial devuelta por Arrendar Credencial
+
+        Returns:
+            bool: True si se liberó un arriendo
+        """
+        if not self.lease_manager or not isinstance(credencial, dict):
+            return False
+        return self.lease_manager.release(credencial)
+
+    def liberar_credenciales_del_worker(self):
+        """
+        Libera todos los arriendos de este proceso (para Suite Teardown)
+
+        Returns:
+            int: Número de arriendos liberados
+        """
+        if not self.lease_manager:
+            return 0
+        liberados = self.lease_manager.release_worker()
+        print(f"🔓 Arriendos liberados del worker: {liberados}")
+        return liberados
+
     def validar_configuracion_centralizada(self):
         """
         Valida que el sistema de configuración centralizada esté funcionando
@@ -380,7 +724,7 @@ class GeminiLibrary:
             dict: Estado de la configuración centralizada
         """
         resultado = {
-            "config_manager_disponible": bool(self.config_manager),
+            "config_manager_disponible": bool(self._get_config_manager()),
             "archivo_credenciales_existe": False,
             "total_credenciales": 0,
             "entornos_configurados": [],
@@ -422,7 +766,7 @@ class GeminiLibrary:
         Returns:
             dict: Datos generados con metadata
         """
-        if not self.model:
+        if not self._get_model():
             return {
                 "error": "Gemini AI no disponible",
                 "variaciones": [f"Datos de ejemplo para: {descripcion}"],
@@ -451,8 +795,7 @@ class GeminiLibrary:
             }}
             """
 
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
+            response_text = self._generate_content(prompt, "generar_datos_de_prueba", self._validar_json)
 
             # Usar extracción JSON híbrida
             json_text = self._extract_json_from_text(response_text)
@@ -504,23 +847,100 @@ class GeminiLibrary:
 
     def verificar_contenido_apropiado(self, contenido, criterios=None):
         """
-        Verifica si el contenido cumple con criterios básicos (mejorado híbrido)
+        Verifica si el contenido cumple con criterios básicos (cascada reglas -> cache -> IA)
 
         Args:
             contenido: Texto a verificar
-            criterios: Lista de criterios que debe cumplir
+            criterios: Lista de criterios que debe cumplir. Con prefijo "literal:" el
+                criterio se verifica localmente como texto exacto
 
         Returns:
             bool: True si cumple todos los criterios
         """
-        if not contenido or not isinstance(contenido, str):
-            return False
+        return self._verificar_contenidos([contenido], criterios)[0]["cumple"]
 
-        # Si hay IA disponible, usar análisis inteligente
-        if self.model and criterios:
-            try:
-                criterios_texto = "\n".join([f"- {criterio}" for criterio in criterios])
-                prompt = f"""
+    def verificar_contenidos_en_lote(self, contenidos, criterios=None):
+        """
+        Verifica una lista de contenidos con los mismos criterios en una sola pasada
+        Las reglas locales y el cache deciden lo que pueden; los ambiguos van a la IA
+        agrupados en una sola petición
+
+        Args:
+            contenidos: Lista de textos a verificar
+            criterios: Lista de criterios que debe cumplir cada texto
+
+        Returns:
+            list: Un dict por contenido con contenido, cumple, nivel (reglas, cache, ia o basica) y razones
+        """
+        if isinstance(contenidos, str):
+            contenidos = [contenidos]
+        return self._verificar_contenidos(list(contenidos), criterios)
+
+    # Textos por petición de verificación en lote a la IA
+    TAMANO_LOTE_CONTENIDO = 20
+
+    def _verificar_contenidos(self, contenidos, criterios=None):
+        criterios = list(criterios) if criterios else []
+        resultados = [None] * len(contenidos)
+        ambiguos = []
+
+        def decidir(indice, cumple, nivel, razones):
+            self.niveles_contenido[nivel] += 1
+            resultados[indice] = {"contenido": contenidos[indice], "cumple": bool(cumple), "nivel": nivel,
+                                  "razones": list(razones or [])}
+
+        for indice, contenido in enumerate(contenidos):
+            if not contenido or not isinstance(contenido, str):
+                decidir(indice, False, "reglas", ["Contenido vacío o no es texto"])
+                continue
+
+            # Nivel 1: reglas locales para los casos obvios
+            evaluacion = get_content_rules().evaluate(contenido, criterios)
+            if evaluacion["cumple"] is not None:
+                decidir(indice, evaluacion["cumple"], "reglas", evaluacion["razones"])
+                continue
+
+            if not self._get_model() or not criterios:
+                cumple, razones = self._verificacion_basica(contenido, criterios)
+                decidir(indice, cumple, "basica", razones)
+                continue
+
+            # Nivel 2: veredictos anteriores de la IA
+            cacheado = self._veredicto_cacheado(contenido, criterios)
+            if cacheado:
+                decidir(indice, cacheado.get("cumple", False), "cache", cacheado.get("razones"))
+                continue
+
+            ambiguos.append(indice)
+
+        # Nivel 3: IA solo para lo ambiguo (una petición por lote si hay varios)
+        veredictos = {}
+        if len(ambiguos) > 1:
+            for inicio in range(0, len(ambiguos), self.TAMANO_LOTE_CONTENIDO):
+                lote = ambiguos[inicio:inicio + self.TAMANO_LOTE_CONTENIDO]
+                veredictos.update(self._verificar_lote_con_ia([contenidos[i] for i in lote], lote, criterios))
+        for indice in ambiguos:
+            if indice not in veredictos:
+                veredicto = self._verificar_con_ia(contenidos[indice], criterios)
+                if veredicto is not None:
+                    veredictos[indice] = veredicto
+
+        for indice in ambiguos:
+            veredicto = veredictos.get(indice)
+            if veredicto is None:
+                cumple, razones = self._verificacion_basica(contenidos[indice], criterios)
+                decidir(indice, cumple, "basica", razones)
+                continue
+            self._guardar_veredicto(contenidos[indice], criterios, veredicto)
+            decidir(indice, veredicto["cumple"], "ia", veredicto["razones"])
+
+        return resultados
+
+    def _verificar_con_ia(self, contenido, criterios):
+        """Veredicto de la IA para un contenido, o None si la respuesta falla"""
+        try:
+            criterios_texto = "\n".join([f"- {criterio}" for criterio in criterios])
+            prompt = f"""
                 Analiza si el siguiente texto cumple con TODOS estos criterios:
                 {criterios_texto}
 
@@ -534,34 +954,93 @@ class GeminiLibrary:
                 }}
                 """
 
-                response = self.model.generate_content(prompt)
-                response_text = response.text.strip()
+            response_text = self._generate_content(prompt, "verificar_contenido_apropiado", self._validar_json)
 
-                json_text = self._extract_json_from_text(response_text)
-                datos = json.loads(json_text)
+            json_text = self._extract_json_from_text(response_text)
+            datos = json.loads(json_text)
 
-                return datos.get("cumple", False)
+            return {"cumple": bool(datos.get("cumple", False)), "razones": datos.get("razones") or []}
 
-            except Exception as e:
-                print(f"Error en validación con IA: {e}, usando validación básica")
+        except Exception as e:
+            print(f"Error en validación con IA: {e}, usando validación básica")
+            return None
+
+    def _verificar_lote_con_ia(self, contenidos, indices, criterios):
+        """Veredictos de la IA para varios contenidos en una sola petición: {índice: veredicto}"""
+        try:
+            criterios_texto = "\n".join([f"- {criterio}" for criterio in criterios])
+            textos = json.dumps([{"indice": n, "texto": contenido} for n, contenido in enumerate(contenidos)],
+                                ensure_ascii=False, indent=2)
+            prompt = f"""
+                Analiza si CADA UNO de los siguientes textos cumple con TODOS estos criterios:
+                {criterios_texto}
+
+                Textos a analizar (con su índice):
+                {textos}
+
+                Responde SOLAMENTE con un objeto JSON con la siguiente estructura, un resultado por texto:
+                {{
+                    "resultados": [
+                        {{"indice": 0, "cumple": true o false, "razones": ["razón 1", ...]}}
+                    ]
+                }}
+                """
+
+            response_text = self._generate_content(prompt, "verificar_contenido_apropiado", self._validar_json)
+            datos = json.loads(self._extract_json_from_text(response_text))
 
-        # Validación básica como fallback
-        if criterios:
-            contenido_lower = contenido.lower()
-            for criterio in criterios:
-                if isinstance(criterio, str) and criterio.lower() not in contenido_lower:
-                    return False
+            veredictos = {}
+            for resultado in datos.get("resultados") or []:
+                n = int(resultado.get("indice", -1))
+                if 0 <= n < len(indices):
+                    veredictos[indices[n]] = {"cumple": bool(resultado.get("cumple", False)),
+                                              "razones": resultado.get("razones") or []}
+            return veredictos
+
+        except Exception as e:
+            # Los que falten se verifican uno a uno
+            print(f"Error en validación en lote con IA: {e}, verificando uno a uno")
+            return {}
+
+    @staticmethod
+    def _verificacion_basica(contenido, criterios):
+        """Validación básica: cada criterio de texto debe aparecer en el contenido"""
+        contenido_lower = contenido.lower()
+        for criterio in criterios or []:
+            if isinstance(criterio, str) and (literal_text(criterio) or criterio).lower() not in contenido_lower:
+                return False, [f"Criterio no encontrado: {criterio}"]
+        return True, []
+
+    def _clave_veredicto(self, contenido, criterios):
+        return calcular_clave(self.model_name, "veredicto:verificar_contenido_apropiado",
+                              {"contenido": " ".join(contenido.split()), "criterios": sorted(map(str, criterios))})
+
+    def _veredicto_cacheado(self, contenido, criterios):
+        if not self.cache or not self.CACHE_TTL_POR_KEYWORD.get("verificar_contenido_apropiado"):
+            return None
+        valor = self.cache.get(self._clave_veredicto(contenido, criterios), "veredicto_contenido")
+        try:
+            return json.loads(valor) if valor else None
+        except ValueError:
+            return None
 
-        return True
+    def _guardar_veredicto(self, contenido, criterios, veredicto):
+        ttl = self.CACHE_TTL_POR_KEYWORD.get("verificar_contenido_apropiado", 0)
+        if self.cache and ttl:
+            self.cache.set(self._clave_veredicto(contenido, criterios), json.dumps(veredicto, ensure_ascii=False),
+                           ttl, keyword="veredicto_contenido", modelo=self.model_name)
 
-    def validar_similitud_semantica(self, texto1, texto2, umbral=0.5):
+    def validar_similitud_semantica(self, texto1, texto2, umbral=0.5, banda=None):
         """
-        Validación de similitud semántica híbrida (IA + básica)
+        Validación de similitud semántica híbrida (IA + local)
 
         Args:
             texto1: Primer texto a comparar
             texto2: Segundo texto a comparar
             umbral: Umbral de similitud (0.0 a 1.0)
+            banda: Si se indica, decide el motor local de n-gramas y solo se consulta a
+                   la IA cuando la similitud local queda a menos de `banda` del umbral.
+                   Sin banda decide la IA y, si no está disponible, la intersección de palabras
 
         Returns:
             bool: True si la similitud supera el umbral
@@ -569,10 +1048,88 @@ class GeminiLibrary:
         if not texto1 or not texto2:
             return False
 
+        umbral = float(umbral)
+        if banda is not None:
+            similitud = self._similitud_local(texto1, texto2)
+            if abs(similitud - umbral) <= float(banda):
+                similitud = self._similitud_ia(texto1, texto2, similitud)
+            return similitud >= umbral
+
         # Si hay IA disponible, usar análisis semántico inteligente
-        if self.model:
-            try:
-                prompt = f"""
+        similitud = self._similitud_ia(texto1, texto2)
+        if similitud is None:
+            similitud = self._similitud_jaccard(texto1, texto2)
+        return similitud >= umbral
+
+    def calcular_similitud_en_lote(self, textos, referencias, umbral=0.5, banda=None, por_pares=False):
+        """
+        Similitud local de muchos textos con una sola operación de matrices
+
+        Un texto contra una lista de referencias devuelve una lista; una lista de
+        textos devuelve una matriz (cada texto contra cada referencia) o, con
+        por_pares, la similitud de textos[i] contra referencias[i].
+
+        Args:
+            textos: Texto o lista de textos (p. ej. mensajes capturados de la UI)
+            referencias: Texto o lista de textos esperados
+            umbral: Umbral de similitud (0.0 a 1.0)
+            banda: Consultar a la IA solo los pares a menos de `banda` del umbral
+            por_pares: Comparar por posición en lugar de todos contra todos
+
+        Returns:
+            dict: {"similitudes", "coinciden", "escaladas_ia", "motor"}
+        """
+        uno_contra_muchos = isinstance(textos, str)
+        textos = [textos] if uno_contra_muchos else list(textos)
+        referencias = [referencias] if isinstance(referencias, str) else list(referencias)
+        por_pares = por_pares and not uno_contra_muchos
+        umbral = float(umbral)
+
+        if por_pares:
+            if len(textos) != len(referencias):
+                raise ValueError(f"Comparación por pares con largos distintos: {len(textos)} y {len(referencias)}")
+            pares = [(i, None, textos[i], referencias[i]) for i in range(len(textos))]
+        else:
+            pares = [(i, j, texto, referencia) for i, texto in enumerate(textos)
+                     for j, referencia in enumerate(referencias)]
+
+        engine = get_similarity_engine()
+        similitudes = (engine.pairwise(textos, referencias) if por_pares
+                       else engine.many_to_many(textos, referencias))
+
+        # Solo los pares dudosos pagan una llamada a la IA
+        escaladas = 0
+        if banda is not None and self._get_model():
+            for i, j, texto, referencia in pares:
+                actual = similitudes[i] if j is None else similitudes[i][j]
+                if texto and referencia and abs(actual - umbral) <= float(banda):
+                    nueva = self._similitud_ia(texto, referencia, actual)
+                    escaladas += 1
+                    if j is None:
+                        similitudes[i] = nueva
+                    else:
+                        similitudes[i][j] = nueva
+
+        if por_pares:
+            coinciden = [similitud >= umbral for similitud in similitudes]
+        else:
+            coinciden = [[similitud >= umbral for similitud in fila] for fila in similitudes]
+            if uno_contra_muchos:
+                similitudes, coinciden = similitudes[0], coinciden[0]
+
+        return {
+            "similitudes": similitudes,
+            "coinciden": coinciden,
+            "escaladas_ia": escaladas,
+            "motor": engine.stats()["motor"]
+        }
+
+    def _similitud_ia(self, texto1, texto2, por_defecto=None):
+        """Similitud según la IA, o por_defecto si no hay modelo o la respuesta falla"""
+        if not self._get_model():
+            return por_defecto
+        try:
+            prompt = f"""
                 Compara estos dos textos y determina su similitud semántica en una escala de 0.0 a 1.0,
                 donde 0.0 significa completamente diferentes y 1.0 significa idénticos en significado:
 
@@ -586,30 +1143,34 @@ class GeminiLibrary:
                 }}
                 """
 
-                response = self.model.generate_content(prompt)
-                response_text = response.text.strip()
+            response_text = self._generate_content(prompt, "validar_similitud_semantica", self._validar_json)
 
-                json_text = self._extract_json_from_text(response_text)
-                datos = json.loads(json_text)
+            json_text = self._extract_json_from_text(response_text)
+            datos = json.loads(json_text)
 
-                similitud = datos.get("similitud", 0.0)
-                return similitud >= umbral
+            return float(datos.get("similitud", 0.0))
 
-            except Exception as e:
-                print(f"Error en similitud con IA: {e}, usando validación básica")
+        except Exception as e:
+            print(f"Error en similitud con IA: {e}, usando validación básica")
+            return por_defecto
+
+    def _similitud_local(self, texto1, texto2):
+        """Similitud sin IA: n-gramas de caracteres"""
+        return get_similarity_engine().similarity(texto1, texto2)
 
-        # Implementación básica usando intersección de palabras como fallback
-        palabras1 = set(texto1.lower().split())
-        palabras2 = set(texto2.lower().split())
+    @staticmethod
+    def _similitud_jaccard(texto1, texto2):
+        """Intersección sobre unión de palabras (fallback de Validar Similitud Semantica sin IA)"""
+        palabras1 = set(str(texto1).lower().split())
+        palabras2 = set(str(texto2).lower().split())
 
         if not palabras1 or not palabras2:
-            return False
+            return 0.0
 
         interseccion = len(palabras1.intersection(palabras2))
         union = len(palabras1.union(palabras2))
 
-        similitud = interseccion / union if union > 0 else 0
-        return similitud >= umbral
+        return interseccion / union if union > 0 else 0
 
     def obtener_estado_biblioteca(self):
         """
@@ -624,11 +1185,20 @@ class GeminiLibrary:
         return {
             "gemini_disponible": GEMINI_AVAILABLE,
             "api_key_configurada": bool(self.api_key),
-            "modelo_inicializado": bool(self.model),
+            "modelo_inicializado": self.model is not None,
             "modelo_nombre": self.model_name,
             "version": self.ROBOT_LIBRARY_VERSION,
             "modo": "IA" if self.model else "Fallback",
             "tipo": "Biblioteca Híbrida Gemini-Claude v1.2",
+            "cache": self.cache.estadisticas() if self.cache else {"habilitado": False},
+            "limitador_tasa": rate_limiter_stats(),
+            "circuitos": circuit_breaker_stats(),
+            "hedging": hedging_stats(),
+            "clientes_ia": ai_client_stats(),
+            "snapshots_config": config_snapshot_stats(),
+            "indice_credenciales": credential_index_stats(),
+            "similitud_local": get_similarity_engine().stats(),
+            "verificacion_contenido": dict(self.niveles_contenido),
             
             # 🔧 CONFIGURACIÓN CENTRALIZADA v1.2 - Información adicional
             "config_centralizada": {
@@ -638,4 +1208,17 @@ class GeminiLibrary:
                 "entornos": estado_config["entornos_configurados"],
                 "errores": estado_config["errores"]
             }
-        }
\ No newline at end of file
+        }
+
+    def limpiar_cache_ia(self):
+        """
+        Elimina todas las respuestas de IA almacenadas en el cache
+
+        Returns:
+            str: Mensaje de confirmación
+        """
+        if not self.cache:
+            return "⚠️ Cache de IA no habilitado"
+
+        self.cache.limpiar()
+        return f"✅ Cache de IA limpiado: {self.cache.db_path}"
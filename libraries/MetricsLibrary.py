@@ -0,0 +1,503 @@
+"""
+MetricsLibrary - Medición de eficiencia y ROI para la demo de IA
+Temporizadores monotónicos de alta resolución, mediciones anidadas,
+histogramas por proceso, test y keyword (p50/p95/p99) y un almacén
+append-only en disco seguro para varios procesos concurrentes.
+Genera metricas_eficiencia.json para tools/dashboard_generator.py
+"""
+import json
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Robot Framework importa la librería por ruta: la raíz del repo en el path habilita libraries.*
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Bloqueo entre procesos para el almacén compartido
+from libraries.file_lock import FileLock
+
+DEFAULT_METRICS_DIR = Path(__file__).parent.parent / "data" / "metrics"
+DEFAULT_METRICS_FILE = "metricas.jsonl"
+# Índice de mediciones iniciadas sin fin: finalizar no recorre todo el almacén
+DEFAULT_OPEN_FILE = "metricas_abiertas.json"
+
+
+class LogHistogram:
+    """
+    Histograma con buckets logarítmicos (error relativo acotado por el factor de crecimiento)
+    Memoria constante por histograma y registro O(1), apto para cada keyword ejecutada
+    """
+
+    def __init__(self, growth=1.05):
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """Registra un valor en segundos"""
+        value = max(float(value), 1e-6)
+        index = int(math.floor(math.log(value) / self._log_growth))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Acumula otro histograma con el mismo factor de crecimiento"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, p):
+        """Percentil aproximado (punto medio geométrico del bucket, acotado a min/max)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(p / 100.0 * self.count)))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                value = self.growth ** (index + 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def resumen(self):
+        """Estadísticas en segundos redondeadas para reportes"""
+        return {
+            "ejecuciones": self.count,
+            "total_segundos": round(self.total, 3),
+            "promedio_segundos": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_segundos": round(self.min or 0.0, 3),
+            "max_segundos": round(self.max or 0.0, 3),
+            "p50_segundos": round(self.percentile(50), 3),
+            "p95_segundos": round(self.percentile(95), 3),
+            "p99_segundos": round(self.percentile(99), 3),
+        }
+
+    def to_dict(self):
+        return {"growth": self.growth, "buckets": {str(k): v for k, v in self.buckets.items()},
+                "count": self.count, "total": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data.get("growth", 1.05))
+        histogram.buckets = {int(k): v for k, v in data.get("buckets", {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
+
+
+class _MetricsListener:
+    """Listener de librería: registra la duración de cada test y keyword en histogramas"""
+
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, library):
+        self.library = library
+
+    def end_test(self, name, attrs):
+        self.library._registrar(self.library._hist_tests, attrs.get("longname", name), attrs.get("elapsedtime", 0))
+
+    def end_keyword(self, name, attrs):
+        if self.library.medir_keywords:
+            self.library._registrar(self.library._hist_keywords, name, attrs.get("elapsedtime", 0))
+
+    def close(self):
+        self.library._guardar_histogramas()
+
+
+class MetricsLibrary:
+    """Librería Robot Framework para medir tiempos de la demo y calcular el ahorro frente al proceso manual"""
+
+    ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+    ROBOT_LIBRARY_VERSION = '1.0'
+
+    # Minutos que toma cada proceso de forma manual (línea base para el ROI)
+    TIEMPO_MANUAL_MINUTOS = {
+        "generacion_datos": 30,
+        "analisis_errores": 45,
+        "ejecucion_tests": 60,
+        "generacion_reportes": 40,
+    }
+    TIEMPO_MANUAL_POR_DEFECTO = 15
+
+    def __init__(self, metrics_dir=None, demos_por_mes=20, horas_implementacion=80, medir_keywords=True):
+        """
+        Inicializa la librería de métricas
+
+        Args:
+            metrics_dir: Directorio del almacén de métricas. Por defecto data/metrics
+            demos_por_mes: Ejecuciones mensuales usadas en la proyección anual
+            horas_implementacion: Inversión en horas usada para calcular el ROI
+            medir_keywords: Registrar histogramas por keyword como listener de librería
+        """
+        self.metrics_dir = Path(metrics_dir) if metrics_dir else DEFAULT_METRICS_DIR
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        self.store_path = self.metrics_dir / DEFAULT_METRICS_FILE
+        self.open_path = self.metrics_dir / DEFAULT_OPEN_FILE
+        self.demos_por_mes = float(demos_por_mes)
+        self.horas_implementacion = float(horas_implementacion)
+        self.medir_keywords = str(medir_keywords).lower() not in ("false", "0", "no")
+
+        self._lock = FileLock(str(self.store_path) + ".lock")
+        self._local = threading.local()
+        self._hist_lock = threading.Lock()
+        self._hist_tests = {}
+        self._hist_keywords = {}
+
+        # Listener de librería para medir tests y keywords sin exponerlos como keywords
+        self.ROBOT_LIBRARY_LISTENER = _MetricsListener(self)
+
+    # ------------------------------------------------------------------
+    # Almacén append-only
+    # ------------------------------------------------------------------
+
+    def _append(self, evento):
+        """Añade un evento como una línea JSON bajo bloqueo entre procesos"""
+        evento.setdefault("pid", os.getpid())
+        evento.setdefault("fecha", datetime.now().isoformat())
+        linea = json.dumps(evento, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                # El índice se lee antes de escribir: si hay que reconstruirlo no incluye este evento
+                abiertos = self._leer_abiertos() if evento.get("tipo") in ("inicio", "fin") else None
+                self._write_line(linea)
+                if abiertos is not None:
+                    self._actualizar_abiertos(abiertos, evento)
+        except Exception as e:
+            print(f"⚠️ Error guardando métricas: {e}")
+
+    def _write_line(self, linea):
+        with open(self.store_path, "a", encoding="utf-8") as f:
+            f.write(linea)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _leer_abiertos(self):
+        """Índice {proceso: [eventos de inicio sin fin]}; se reconstruye del almacén si falta o está dañado"""
+        if self.open_path.exists():
+            try:
+                with open(self.open_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, OSError):
+                pass
+        abiertos = {}
+        for evento in self._iter_eventos():
+            self._aplicar_evento(abiertos, evento)
+        return abiertos
+
+    @staticmethod
+    def _aplicar_evento(abiertos, evento):
+        proceso = evento.get("proceso")
+        if evento.get("tipo") == "inicio":
+            abiertos.setdefault(proceso, []).append(evento)
+        elif evento.get("tipo") == "fin" and abiertos.get(proceso):
+            abiertos[proceso].pop()
+            if not abiertos[proceso]:
+                del abiertos[proceso]
+
+    def _actualizar_abiertos(self, abiertos, evento):
+        self._aplicar_evento(abiertos, evento)
+        temporal = self.open_path.with_suffix(".tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(abiertos, f, ensure_ascii=False)
+        os.replace(temporal, self.open_path)
+
+    def _iter_eventos(self):
+        """Lee el almacén ignorando líneas incompletas o corruptas"""
+        if not self.store_path.exists():
+            return
+        with open(self.store_path, "r", encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    yield json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+
+    # ------------------------------------------------------------------
+    # Mediciones (spans anidados)
+    # ------------------------------------------------------------------
+
+    def _pila(self):
+        pila = getattr(self._local, "pila", None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    def iniciar_medicion(self, nombre_proceso):
+        """
+        Inicia la medición de un proceso. Las mediciones pueden anidarse:
+        la medición abierta en curso queda registrada como padre
+
+        Args:
+            nombre_proceso: Nombre del proceso a medir
+
+        Returns:
+            dict: Datos de inicio de la medición
+        """
+        pila = self._pila()
+        padre = pila[-1]["proceso"] if pila else None
+        span = {
+            "proceso": str(nombre_proceso),
+            "padre": padre,
+            "ruta": f"{pila[-1]['ruta']}/{nombre_proceso}" if pila else str(nombre_proceso),
+            "inicio_perf_ns": time.perf_counter_ns(),
+            "inicio_monotonic_ns": time.monotonic_ns(),
+            "inicio_wall": time.time(),
+        }
+        pila.append(span)
+
+        self._append({
+            "tipo": "inicio",
+            "proceso": span["proceso"],
+            "padre": padre,
+            "ruta": span["ruta"],
+            "monotonic_ns": span["inicio_monotonic_ns"],
+            "wall": span["inicio_wall"],
+        })
+        print(f"⏱️ Medición iniciada: {nombre_proceso}")
+        return {"proceso": span["proceso"], "padre": padre, "inicio": datetime.now().isoformat()}
+
+    def finalizar_medicion(self, nombre_proceso):
+        """
+        Finaliza la medición de un proceso. Si se inició en otro proceso del
+        sistema operativo (por ejemplo otro `python -c`), se recupera el inicio del almacén
+
+        Args:
+            nombre_proceso: Nombre del proceso a finalizar
+
+        Returns:
+            dict: Duración, tiempo manual de referencia y ahorro en minutos
+        """
+        nombre_proceso = str(nombre_proceso)
+        pila = self._pila()
+        span = next((s for s in reversed(pila) if s["proceso"] == nombre_proceso), None)
+
+        if span is not None:
+            pila.remove(span)
+            duracion = (time.perf_counter_ns() - span["inicio_perf_ns"]) / 1e9
+            padre, ruta = span["padre"], span["ruta"]
+        else:
+            inicio = self._buscar_inicio_abierto(nombre_proceso)
+            if inicio is None:
+                print(f"⚠️ No hay medición iniciada para: {nombre_proceso}")
+                return {"proceso": nombre_proceso, "duracion_segundos": 0.0, "error": "medicion_no_iniciada"}
+            # CLOCK_MONOTONIC es de sistema: válido entre procesos del mismo arranque
+            duracion = (time.monotonic_ns() - inicio.get("monotonic_ns", 0)) / 1e9
+            if duracion < 0 or duracion > 7 * 24 * 3600:
+                duracion = max(0.0, time.time() - inicio.get("wall", time.time()))
+            padre, ruta = inicio.get("padre"), inicio.get("ruta", nombre_proceso)
+
+        resultado = self._calcular_ahorro_proceso(nombre_proceso, duracion)
+        resultado.update({"padre": padre, "ruta": ruta})
+
+        self._append({
+            "tipo": "fin",
+            "proceso": nombre_proceso,
+            "padre": padre,
+            "ruta": ruta,
+            "duracion_segundos": duracion,
+        })
+        print(f"⏱️ Medición finalizada: {nombre_proceso} ({duracion:.2f}s, ahorro {resultado['ahorro_minutos']:.1f} min)")
+        return resultado
+
+    def _buscar_inicio_abierto(self, nombre_proceso):
+        """Último evento de inicio del proceso que aún no tiene su fin"""
+        with self._lock:
+            abiertos = self._leer_abiertos().get(nombre_proceso)
+        return abiertos[-1] if abiertos else None
+
+    def _calcular_ahorro_proceso(self, nombre_proceso, duracion_segundos):
+        manual = self.TIEMPO_MANUAL_MINUTOS.get(nombre_proceso, self.TIEMPO_MANUAL_POR_DEFECTO)
+        automatizado = duracion_segundos / 60.0
+        return {
+            "proceso": nombre_proceso,
+            "duracion_segundos": round(duracion_segundos, 3),
+            "tiempo_manual_minutos": manual,
+            "tiempo_automatizado_minutos": round(automatizado, 2),
+            "ahorro_minutos": round(max(0.0, manual - automatizado), 2),
+        }
+
+    # ------------------------------------------------------------------
+    # Listener de librería: histogramas por test y keyword
+    # ------------------------------------------------------------------
+
+    def _registrar(self, histogramas, nombre, elapsed_ms):
+        with self._hist_lock:
+            histograma = histogramas.get(nombre)
+            if histograma is None:
+                histograma = histogramas[nombre] = LogHistogram()
+            histograma.add(elapsed_ms / 1000.0)
+
+    def _guardar_histogramas(self):
+        """Vuelca al almacén los histogramas acumulados en este proceso"""
+        with self._hist_lock:
+            tests = {k: v.to_dict() for k, v in self._hist_tests.items()}
+            keywords = {k: v.to_dict() for k, v in self._hist_keywords.items()}
+            self._hist_tests.clear()
+            self._hist_keywords.clear()
+        if tests or keywords:
+            self._append({"tipo": "histogramas", "tests": tests, "keywords": keywords})
+
+    # ------------------------------------------------------------------
+    # Agregación y reportes
+    # ------------------------------------------------------------------
+
+    def _agregar(self):
+        """Combina los eventos del almacén con los histogramas aún en memoria"""
+        procesos, tests, keywords, anidados = {}, {}, {}, set()
+
+        def acumular(destino, nombre, histograma):
+            if nombre in destino:
+                destino[nombre].merge(histograma)
+            else:
+                destino[nombre] = histograma
+
+        for evento in self._iter_eventos():
+            tipo = evento.get("tipo")
+            if tipo == "fin":
+                histograma = procesos.setdefault(evento["proceso"], LogHistogram())
+                histograma.add(evento.get("duracion_segundos", 0.0))
+                if evento.get("padre"):
+                    anidados.add(evento["proceso"])
+            elif tipo == "histogramas":
+                for nombre, datos in evento.get("tests", {}).items():
+                    acumular(tests, nombre, LogHistogram.from_dict(datos))
+                for nombre, datos in evento.get("keywords", {}).items():
+                    acumular(keywords, nombre, LogHistogram.from_dict(datos))
+
+        with self._hist_lock:
+            for nombre, histograma in self._hist_tests.items():
+                acumular(tests, nombre, LogHistogram.from_dict(histograma.to_dict()))
+            for nombre, histograma in self._hist_keywords.items():
+                acumular(keywords, nombre, LogHistogram.from_dict(histograma.to_dict()))
+
+        return procesos, tests, keywords, anidados
+
+    def obtener_metricas_completas(self):
+        """
+        Obtiene las métricas agregadas de todas las ejecuciones registradas
+
+        Returns:
+            dict: Métricas por proceso, test y keyword con percentiles
+        """
+        procesos, tests, keywords, anidados = self._agregar()
+
+        metricas_por_proceso = {}
+        for nombre, histograma in procesos.items():
+            metricas = histograma.resumen()
+            metricas.update(self._calcular_ahorro_proceso(nombre, histograma.total / histograma.count))
+            metricas.pop("duracion_segundos", None)
+            metricas["anidado"] = nombre in anidados
+            metricas_por_proceso[nombre] = metricas
+
+        return {
+            "metricas_por_proceso": metricas_por_proceso,
+            "metricas_por_test": {k: v.resumen() for k, v in tests.items()},
+            "metricas_por_keyword": {k: v.resumen() for k, v in keywords.items()},
+        }
+
+    def calcular_ahorro_total(self):
+        """
+        Calcula el ahorro por demo frente al proceso manual y su proyección anual
+
+        Returns:
+            dict: ahorro_por_demo_minutos, proyeccion_anual_horas y roi_meses
+        """
+        # Las mediciones anidadas ya están incluidas en el tiempo de su proceso padre
+        metricas = {nombre: m for nombre, m in self.obtener_metricas_completas()["metricas_por_proceso"].items()
+                    if not m["anidado"]}
+
+        ahorro_demo = sum(m["ahorro_minutos"] for m in metricas.values())
+        manual_demo = sum(m["tiempo_manual_minutos"] for m in metricas.values())
+        automatizado_demo = sum(m["tiempo_automatizado_minutos"] for m in metricas.values())
+
+        ahorro_mensual_horas = ahorro_demo * self.demos_por_mes / 60.0
+        roi_meses = self.horas_implementacion / ahorro_mensual_horas if ahorro_mensual_horas > 0 else 0.0
+
+        return {
+            "ahorro_por_demo_minutos": round(ahorro_demo, 2),
+            "tiempo_manual_demo_minutos": round(manual_demo, 2),
+            "tiempo_automatizado_demo_minutos": round(automatizado_demo, 2),
+            "porcentaje_ahorro": round(ahorro_demo / manual_demo * 100, 1) if manual_demo else 0.0,
+            "proyeccion_anual_horas": round(ahorro_mensual_horas * 12, 1),
+            "roi_meses": round(roi_meses, 1),
+            "demos_por_mes": self.demos_por_mes,
+            "horas_implementacion": self.horas_implementacion,
+        }
+
+    def generar_reporte_metricas(self, archivo_destino="results/metricas_eficiencia.json"):
+        """
+        Genera el reporte JSON que consume tools/dashboard_generator.py
+
+        Args:
+            archivo_destino: Ruta del archivo JSON
+
+        Returns:
+            str: Ruta del archivo generado
+        """
+        self._guardar_histogramas()
+
+        reporte = {
+            "fecha_generacion": datetime.now().isoformat(),
+            "resumen_ahorro": self.calcular_ahorro_total(),
+        }
+        reporte.update(self.obtener_metricas_completas())
+
+        destino = Path(archivo_destino)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporal = destino.with_suffix(destino.suffix + ".tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        os.replace(temporal, destino)
+
+        print(f"📊 Reporte de métricas generado: {destino}")
+        return str(destino)
+
+    def mostrar_resumen_ejecutivo(self):
+        """Muestra en consola el resumen ejecutivo de ahorro y tiempos"""
+        resumen = self.calcular_ahorro_total()
+        metricas = self.obtener_metricas_completas()["metricas_por_proceso"]
+
+        print("\n" + "=" * 60)
+        print("📈 RESUMEN EJECUTIVO DE EFICIENCIA")
+        print("=" * 60)
+        for nombre, m in metricas.items():
+            print(f"  • {nombre}: {m['tiempo_automatizado_minutos']:.1f} min vs {m['tiempo_manual_minutos']} min manual "
+                  f"(p95 {m['p95_segundos']:.1f}s, {m['ejecuciones']} ejecuciones)")
+        print("-" * 60)
+        print(f"⏱️ Ahorro por demo: {resumen['ahorro_por_demo_minutos']:.1f} minutos ({resumen['porcentaje_ahorro']}%)")
+        print(f"📅 Proyección anual: {resumen['proyeccion_anual_horas']:.0f} horas")
+        print(f"💰 Retorno de inversión: {resumen['roi_meses']:.1f} meses")
+        print("=" * 60 + "\n")
+        return resumen
+
+    def limpiar_metricas(self):
+        """Elimina todas las métricas registradas en el almacén"""
+        try:
+            with self._lock:
+                self.store_path.unlink(missing_ok=True)
+                self.open_path.unlink(missing_ok=True)
+            with self._hist_lock:
+                self._hist_tests.clear()
+                self._hist_keywords.clear()
+            print("🧹 Métricas eliminadas")
+            return True
+        except Exception as e:
+            print(f"⚠️ Error limpiando métricas: {e}")
+            return False
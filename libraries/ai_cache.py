@@ -0,0 +1,207 @@
+"""
+Cache persistente de respuestas de IA para GeminiLibrary
+Almacena respuestas de generate_content direccionadas por contenido
+(modelo + prompt normalizado + parámetros de generación) en SQLite,
+con expiración por keyword y desalojo LRU acotado por tamaño.
+Seguro para varios procesos de Robot Framework en la misma máquina (WAL).
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "cache"
+DEFAULT_CACHE_FILE = "ai_respuestas.sqlite3"
+
+
+def normalizar_prompt(prompt):
+    """Colapsa espacios en blanco para que la indentación del prompt no cambie la clave"""
+    return " ".join(str(prompt).split())
+
+
+def calcular_clave(model, prompt, params=None):
+    """Clave de contenido SHA-256 para (modelo, prompt normalizado, parámetros)"""
+    material = json.dumps(
+        {"model": model, "prompt": normalizar_prompt(prompt), "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Cache en disco con TTL por entrada y desalojo LRU por número de entradas y bytes"""
+
+    def __init__(self, cache_dir=None, max_entries=5000, max_bytes=50 * 1024 * 1024):
+        """
+        Inicializa el cache
+
+        Args:
+            cache_dir: Directorio del archivo SQLite. Por defecto data/cache
+            max_entries: Máximo de entradas antes de desalojar las menos usadas
+            max_bytes: Tamaño máximo acumulado de las respuestas almacenadas
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / DEFAULT_CACHE_FILE
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expirados": 0, "almacenados": 0, "desalojados": 0}
+        self._stats_por_keyword = {}
+
+        self._crear_esquema()
+
+    def _conexion(self):
+        """Conexión SQLite por hilo (sqlite3 no comparte conexiones entre hilos)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def _crear_esquema(self):
+        conn = self._conexion()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                keyword TEXT NOT NULL,
+                modelo TEXT NOT NULL,
+                valor TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                creado REAL NOT NULL,
+                expira REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas (ultimo_acceso)")
+
+    def _contar(self, evento, keyword=None):
+        with self._stats_lock:
+            self._stats[evento] += 1
+            if keyword:
+                por_keyword = self._stats_por_keyword.setdefault(keyword, {"hits": 0, "misses": 0})
+                if evento in por_keyword:
+                    por_keyword[evento] += 1
+
+    def get(self, clave, keyword=None):
+        """
+        Obtiene una respuesta vigente
+
+        Returns:
+            str o None si no existe o expiró
+        """
+        ahora = time.time()
+        try:
+            conn = self._conexion()
+            fila = conn.execute("SELECT valor, expira FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                self._contar("misses", keyword)
+                return None
+
+            valor, expira = fila
+            if expira <= ahora:
+                conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+                self._contar("expirados")
+                self._contar("misses", keyword)
+                return None
+
+            conn.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+            self._contar("hits", keyword)
+            return valor
+        except sqlite3.Error as e:
+            print(f"⚠️ Error leyendo cache de IA: {e}")
+            self._contar("misses", keyword)
+            return None
+
+    def set(self, clave, valor, ttl, keyword="", modelo=""):
+        """Almacena una respuesta con TTL en segundos. TTL <= 0 no almacena"""
+        if ttl is None or ttl <= 0:
+            return
+        ahora = time.time()
+        tamano = len(valor.encode("utf-8"))
+        try:
+            conn = self._conexion()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO respuestas (clave, keyword, modelo, valor, bytes, creado, expira, ultimo_acceso)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (clave, keyword, modelo, valor, tamano, ahora, ahora + ttl, ahora),
+            )
+            self._contar("almacenados")
+            self._desalojar()
+        except sqlite3.Error as e:
+            print(f"⚠️ Error escribiendo cache de IA: {e}")
+
+    def invalidar(self, clave):
+        """Elimina una entrada concreta"""
+        try:
+            self._conexion().execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+        except sqlite3.Error as e:
+            print(f"⚠️ Error invalidando cache de IA: {e}")
+
+    def limpiar(self):
+        """Elimina todas las entradas"""
+        try:
+            self._conexion().execute("DELETE FROM respuestas")
+        except sqlite3.Error as e:
+            print(f"⚠️ Error limpiando cache de IA: {e}")
+
+    def _desalojar(self):
+        """Elimina expirados y, si se superan los límites, las entradas menos usadas"""
+        conn = self._conexion()
+        conn.execute("DELETE FROM respuestas WHERE expira <= ?", (time.time(),))
+
+        total, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()
+        if total <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        # Recorrer de la menos a la más recientemente usada hasta volver a los límites
+        eliminar = []
+        for clave, tamano in conn.execute("SELECT clave, bytes FROM respuestas ORDER BY ultimo_acceso ASC"):
+            if total <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            eliminar.append((clave,))
+            total -= 1
+            total_bytes -= tamano
+
+        if eliminar:
+            conn.executemany("DELETE FROM respuestas WHERE clave = ?", eliminar)
+            with self._stats_lock:
+                self._stats["desalojados"] += len(eliminar)
+
+    def estadisticas(self):
+        """Contadores del proceso actual y ocupación del archivo compartido"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["por_keyword"] = {k: dict(v) for k, v in self._stats_por_keyword.items()}
+
+        consultas = stats["hits"] + stats["misses"]
+        stats["tasa_aciertos"] = round(stats["hits"] / consultas, 3) if consultas else 0.0
+
+        try:
+            total, total_bytes = self._conexion().execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM respuestas"
+            ).fetchone()
+        except sqlite3.Error:
+            total, total_bytes = 0, 0
+
+        stats.update({
+            "habilitado": True,
+            "entradas": total,
+            "bytes": total_bytes,
+            "max_entradas": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "archivo": str(self.db_path),
+        })
+        return stats
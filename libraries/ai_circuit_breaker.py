@@ -0,0 +1,286 @@
+"""
+Circuit breaker por proveedor de IA
+Registra el resultado y la latencia de cada llamada real. Cuando un proveedor
+acumula fallos o llamadas lentas el circuito se abre y las llamadas se rechazan
+de inmediato (sin esperar su timeout) hasta que pasa open_seconds; entonces se
+deja pasar una llamada de prueba (half-open) que decide si se cierra o reabre.
+La configuración se toma de settings.circuit_breaker en config/ai_providers.json.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+from libraries.ai_endpoints import PROVIDERS_FILE
+from libraries.config_snapshot import load_json
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """El circuito del proveedor está abierto: la llamada no se realizó"""
+
+    def __init__(self, provider, retry_in):
+        self.provider = provider
+        self.retry_in = retry_in
+        super().__init__(f"Circuito abierto para {provider}: se reintenta en {retry_in:.0f}s")
+
+
+class ProviderCircuitBreaker:
+    """Circuito closed/open/half-open con latencia media móvil de un proveedor"""
+
+    def __init__(self, provider, failure_threshold=5, failure_rate=0.5, window=20,
+                 open_seconds=30.0, slow_call_seconds=20.0, latency_alpha=0.3, latency_samples=200):
+        """
+        Args:
+            provider: Nombre del proveedor
+            failure_threshold: Fallos mínimos en la ventana para abrir el circuito
+            failure_rate: Proporción de fallos en la ventana que abre el circuito
+            window: Número de llamadas recientes consideradas
+            open_seconds: Segundos que el circuito permanece abierto antes de probar
+            slow_call_seconds: Una llamada exitosa más lenta que esto cuenta como fallo (0 = desactivado)
+            latency_alpha: Peso de la última muestra en la latencia media móvil
+            latency_samples: Latencias recientes conservadas para calcular percentiles
+        """
+        self.provider = provider
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.failure_rate = float(failure_rate)
+        self.open_seconds = float(open_seconds)
+        self.slow_call_seconds = float(slow_call_seconds or 0)
+        self.latency_alpha = float(latency_alpha)
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=max(1, int(window)))
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._latency = None
+        self._samples = deque(maxlen=max(1, int(latency_samples)))
+        self._stats = {"exitos": 0, "fallos": 0, "lentas": 0, "rechazadas": 0, "aperturas": 0}
+
+    def _update_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self._stats["aperturas"] += 1
+        print(f"🔌 Circuito abierto para {self.provider} durante {self.open_seconds:.0f}s")
+
+    @property
+    def state(self):
+        with self._lock:
+            self._update_state(time.monotonic())
+            return self._state
+
+    @property
+    def latency(self):
+        """Latencia media móvil en segundos (None si no hay muestras)"""
+        with self._lock:
+            return self._latency
+
+    def latency_percentile(self, percentile, min_samples=1):
+        """
+        Percentil de las latencias recientes en segundos
+
+        Returns:
+            float o None si hay menos de min_samples muestras
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples or len(samples) < min_samples:
+            return None
+        # Método nearest-rank
+        index = min(len(samples) - 1, max(0, math.ceil(percentile / 100.0 * len(samples)) - 1))
+        return samples[index]
+
+    def retry_in(self):
+        """Segundos hasta que el circuito deje pasar una llamada de prueba"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def is_available(self):
+        """True si una llamada sería aceptada ahora (sin reservar la prueba half-open)"""
+        with self._lock:
+            self._update_state(time.monotonic())
+            return self._state == CLOSED or (self._state == HALF_OPEN and not self._probe_in_flight)
+
+    def allow_request(self):
+        """
+        Reserva el paso de una llamada
+
+        Returns:
+            bool: False si el circuito está abierto o ya hay una prueba half-open en curso
+        """
+        with self._lock:
+            self._update_state(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._stats["rechazadas"] += 1
+            return False
+
+    def _record_latency(self, latency):
+        if latency is None:
+            return
+        self._samples.append(latency)
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += self.latency_alpha * (latency - self._latency)
+
+    def record_success(self, latency=None):
+        """Registra una llamada exitosa. Si fue más lenta que slow_call_seconds cuenta como fallo"""
+        if self.slow_call_seconds and latency is not None and latency > self.slow_call_seconds:
+            with self._lock:
+                self._stats["lentas"] += 1
+            self.record_failure(latency)
+            return
+
+        with self._lock:
+            self._record_latency(latency)
+            self._stats["exitos"] += 1
+            self._outcomes.append(True)
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                print(f"🔌 Circuito cerrado para {self.provider}")
+            self._probe_in_flight = False
+
+    def record_failure(self, latency=None):
+        """Registra un timeout, error transitorio o llamada lenta"""
+        now = time.monotonic()
+        with self._lock:
+            self._record_latency(latency)
+            self._stats["fallos"] += 1
+            self._outcomes.append(False)
+
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            failures = self._outcomes.count(False)
+            if (self._state == CLOSED and failures >= self.failure_threshold
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._open(now)
+
+    def release(self):
+        """Libera la prueba half-open sin registrar resultado (error no atribuible al proveedor)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._outcomes.clear()
+            self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            self._update_state(time.monotonic())
+            stats = dict(self._stats)
+            stats.update({
+                "proveedor": self.provider,
+                "estado": self._state,
+                "latencia_media": round(self._latency, 3) if self._latency is not None else None,
+                "fallos_en_ventana": self._outcomes.count(False),
+                "llamadas_en_ventana": len(self._outcomes),
+            })
+        stats["reintento_en"] = round(self.retry_in(), 1)
+        return stats
+
+
+# ----------------------------------------------------------------------
+# Registro por proceso
+# ----------------------------------------------------------------------
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def _load_settings():
+    try:
+        settings = load_json(PROVIDERS_FILE).get("settings", {})
+    except (OSError, ValueError):
+        settings = {}
+
+    options = dict(settings.get("circuit_breaker", {}))
+    # Una llamada que supera el timeout configurado se considera lenta
+    options.setdefault("slow_call_seconds", settings.get("timeout_seconds", 20))
+    return options
+
+
+def get_circuit_breaker(provider="gemini", **overrides):
+    """
+    Circuit breaker compartido del proceso para un proveedor
+
+    Args:
+        provider: Nombre del proveedor
+        **overrides: Valores que reemplazan los de ai_providers.json (solo al crearlo o reconfigurarlo)
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None or overrides:
+            options = _load_settings()
+            options.update({k: v for k, v in overrides.items() if v is not None})
+            breaker = _breakers[provider] = ProviderCircuitBreaker(provider, **options)
+        return breaker
+
+
+def route_providers(candidates, tolerance=None):
+    """
+    Ordena proveedores por salud y latencia
+
+    Se descartan los proveedores con el circuito abierto. Los de circuito cerrado
+    van antes que los que están en prueba (half-open) y, entre ellos, los más
+    lentos que el más rápido por encima de routing.latency_tolerance pasan al
+    final. Con latencias similares o sin medir se respeta el orden recibido.
+
+    Args:
+        candidates: Proveedores en orden de preferencia (fallback_order)
+        tolerance: Margen de latencia sobre el más rápido (por defecto el de ai_providers.json)
+
+    Returns:
+        list: Proveedores en orden de uso
+    """
+    if tolerance is None:
+        try:
+            routing = load_json(PROVIDERS_FILE).get("settings", {}).get("routing", {})
+        except (OSError, ValueError):
+            routing = {}
+        tolerance = routing.get("latency_tolerance", 0.25)
+
+    health = {}
+    for provider in candidates:
+        breaker = get_circuit_breaker(provider)
+        if breaker.is_available():
+            health[provider] = (breaker.state, breaker.latency)
+
+    measured = [latency for state, latency in health.values() if state == CLOSED and latency is not None]
+    fastest = min(measured) if measured else None
+
+    def route_key(provider):
+        state, latency = health[provider]
+        if state != CLOSED:
+            return (1, 0.0)
+        if latency is None or fastest is None or latency <= fastest * (1 + tolerance):
+            return (0, 0.0)
+        return (0, latency)
+
+    # sorted es estable: a igualdad de clave se mantiene el orden recibido
+    return sorted(health, key=route_key)
+
+
+def circuit_breaker_stats():
+    """Estado de todos los circuitos creados en el proceso"""
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    return {provider: breaker.stats() for provider, breaker in breakers}
@@ -0,0 +1,220 @@
+"""
+Registro de clientes de IA compartido por el proceso
+La librería, el listener, el reporter y el generador piden aquí sus clientes
+en lugar de configurar el SDK y crear un GenerativeModel cada uno (el reporter
+creaba uno por test fallido). Los clientes se guardan por (proveedor, modelo,
+huella de la API key) y se reutilizan, y las llamadas REST (proveedor
+secundario del hedging) usan un pool de conexiones HTTP keep-alive por host.
+
+genai.configure es global al proceso: pedir un modelo con otra API key
+reconfigura el SDK y descarta los clientes de Gemini de la key anterior.
+"""
+import hashlib
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from libraries.ai_endpoints import gemini_configure_options
+from libraries.lazy_imports import load_module
+
+
+class HTTPStatusError(Exception):
+    """Respuesta HTTP con código de error (expone code y headers para los reintentos)"""
+
+    def __init__(self, code, reason, headers, body):
+        self.code = code
+        self.headers = headers
+        self.body = body
+        super().__init__(f"HTTP {code} {reason}: {body[:200].decode('utf-8', errors='replace')}")
+
+
+def _fingerprint(api_key):
+    """Huella corta de la API key: distingue clientes sin guardar la key en las métricas"""
+    return hashlib.sha256(str(api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+class HTTPConnectionPool:
+    """Conexiones HTTP/HTTPS persistentes por host, reutilizadas entre peticiones y hilos"""
+
+    def __init__(self, max_idle_per_host=4):
+        """
+        Args:
+            max_idle_per_host: Conexiones inactivas que se conservan por host
+        """
+        self.max_idle_per_host = max(1, int(max_idle_per_host))
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._stats = {"peticiones": 0, "conexiones_creadas": 0, "conexiones_reutilizadas": 0,
+                       "conexiones_descartadas": 0, "errores_http": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _acquire(self, host, timeout):
+        with self._lock:
+            libres = self._idle.get(host)
+            conexion = libres.pop() if libres else None
+        if conexion is not None:
+            self._count("conexiones_reutilizadas")
+            conexion.timeout = timeout
+            if conexion.sock is not None:
+                conexion.sock.settimeout(timeout)
+            return conexion, True
+
+        # http.client (con email) solo se importa con la primera petición REST
+        http_client = load_module("http.client")
+        scheme, netloc = host
+        clase = http_client.HTTPSConnection if scheme == "https" else http_client.HTTPConnection
+        self._count("conexiones_creadas")
+        return clase(netloc, timeout=timeout), False
+
+    def _release(self, host, conexion):
+        with self._lock:
+            libres = self._idle.setdefault(host, [])
+            if len(libres) < self.max_idle_per_host:
+                libres.append(conexion)
+                return
+        conexion.close()
+
+    def post_json(self, url, payload, headers, timeout):
+        """
+        POST con cuerpo JSON
+
+        Returns:
+            dict: Respuesta decodificada
+
+        Raises:
+            HTTPStatusError: Si el servidor responde con código >= 400
+        """
+        http_client = load_module("http.client")
+        partes = urlsplit(url)
+        host = (partes.scheme or "http", partes.netloc)
+        ruta = (partes.path or "/") + (f"?{partes.query}" if partes.query else "")
+        cuerpo = json.dumps(payload).encode("utf-8")
+        headers = dict(headers, **{"Content-Type": "application/json"})
+        self._count("peticiones")
+
+        while True:
+            conexion, reutilizada = self._acquire(host, timeout)
+            try:
+                conexion.request("POST", ruta, body=cuerpo, headers=headers)
+                respuesta = conexion.getresponse()
+                datos = respuesta.read()
+            except (http_client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conexion.close()
+                self._count("conexiones_descartadas")
+                # El servidor pudo cerrar la conexión mientras estaba inactiva: repetir con una nueva
+                if reutilizada:
+                    continue
+                raise
+            except Exception:
+                conexion.close()
+                self._count("conexiones_descartadas")
+                raise
+            break
+
+        if respuesta.will_close:
+            conexion.close()
+        else:
+            self._release(host, conexion)
+
+        if respuesta.status >= 400:
+            self._count("errores_http")
+            raise HTTPStatusError(respuesta.status, respuesta.reason, dict(respuesta.getheaders()), datos)
+        return json.loads(datos.decode("utf-8"))
+
+    def close(self):
+        """Cierra las conexiones inactivas"""
+        with self._lock:
+            conexiones = [conexion for libres in self._idle.values() for conexion in libres]
+            self._idle.clear()
+        for conexion in conexiones:
+            conexion.close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, hosts=len(self._idle),
+                        conexiones_inactivas=sum(len(libres) for libres in self._idle.values()))
+
+
+class ClientRegistry:
+    """Clientes de IA configurados, por (proveedor, modelo, huella de la API key)"""
+
+    def __init__(self, max_idle_per_host=4):
+        self.http = HTTPConnectionPool(max_idle_per_host)
+        self._clients = {}
+        self._gemini_key = None
+        self._lock = threading.Lock()
+        self._stats = {"creados": 0, "reutilizados": 0, "configuraciones_sdk": 0, "descartados": 0}
+
+    def gemini_model(self, model, api_key):
+        """
+        GenerativeModel de Gemini, configurando el SDK solo si cambia la API key
+
+        Raises:
+            ImportError: Si google-generativeai no está instalado
+        """
+        genai = load_module("google.generativeai")
+        if genai is None:
+            raise ImportError("google-generativeai no está instalado")
+
+        huella = _fingerprint(api_key)
+        clave = ("gemini", model, huella)
+        with self._lock:
+            entrada = self._clients.get(clave)
+            if entrada is not None:
+                entrada["entregas"] += 1
+                self._stats["reutilizados"] += 1
+                return entrada["cliente"]
+
+            if self._gemini_key != huella:
+                genai.configure(**gemini_configure_options(api_key))
+                self._gemini_key = huella
+                self._stats["configuraciones_sdk"] += 1
+                # Sus transportes ya no corresponden a la configuración global
+                for otra in [c for c in self._clients if c[0] == "gemini" and c[2] != huella]:
+                    del self._clients[otra]
+                    self._stats["descartados"] += 1
+
+            cliente = genai.GenerativeModel(model)
+            self._clients[clave] = {"cliente": cliente, "entregas": 1, "creado": time.time()}
+            self._stats["creados"] += 1
+            return cliente
+
+    def stats(self):
+        with self._lock:
+            clientes = {f"{proveedor}:{modelo}:{huella}": entrada["entregas"]
+                        for (proveedor, modelo, huella), entrada in self._clients.items()}
+            stats = dict(self._stats, clientes=clientes)
+        stats["pool_http"] = self.http.stats()
+        return stats
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry(**overrides):
+    """Registro compartido por el proceso (se crea en la primera llamada)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry(**overrides)
+        return _registry
+
+
+def get_gemini_model(model, api_key):
+    """GenerativeModel compartido para (modelo, API key)"""
+    return get_client_registry().gemini_model(model, api_key)
+
+
+def post_json(url, payload, headers, timeout):
+    """POST JSON por el pool de conexiones compartido"""
+    return get_client_registry().http.post_json(url, payload, headers, timeout)
+
+
+def ai_client_stats():
+    """Métricas del registro del proceso, o None si no se ha usado"""
+    return _registry.stats() if _registry else None
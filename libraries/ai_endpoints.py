@@ -0,0 +1,60 @@
+"""
+Endpoints de los proveedores de IA
+Permite redirigir los clientes a otro servidor (por ejemplo el servidor local
+tools/fake_ai_server.py) con variables de entorno <PROVEEDOR>_BASE_URL,
+sin modificar config/ai_providers.json.
+
+Ejemplo:
+    GEMINI_BASE_URL=http://127.0.0.1:8765/v1beta/models
+"""
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from libraries.config_snapshot import load_json
+
+PROVIDERS_FILE = Path(__file__).parent.parent / "config" / "ai_providers.json"
+
+
+def base_url_env_var(provider):
+    """Nombre de la variable de entorno que sobrescribe el base_url del proveedor"""
+    return f"{provider.upper()}_BASE_URL"
+
+
+def load_providers(providers_file=None):
+    """Lee la sección providers de ai_providers.json (vacía si no se puede leer)"""
+    try:
+        return load_json(providers_file or PROVIDERS_FILE).get("providers", {})
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No se pudo leer la configuración de proveedores de IA: {e}")
+        return {}
+
+
+def get_base_url(provider, providers_file=None):
+    """
+    base_url efectivo de un proveedor
+
+    Args:
+        provider: Nombre del proveedor (gemini, claude, aws)
+
+    Returns:
+        str: Valor de <PROVEEDOR>_BASE_URL o el base_url configurado
+    """
+    override = os.getenv(base_url_env_var(provider))
+    if override:
+        return override.rstrip("/")
+    return load_providers(providers_file).get(provider, {}).get("base_url", "").rstrip("/")
+
+
+def gemini_configure_options(api_key):
+    """
+    Argumentos para genai.configure. Con GEMINI_BASE_URL definido se usa el
+    transporte REST contra ese host en lugar del endpoint público de Google
+    """
+    options = {"api_key": api_key}
+    override = os.getenv(base_url_env_var("gemini"))
+    if override:
+        parts = urlsplit(override)
+        options["transport"] = "rest"
+        options["client_options"] = {"api_endpoint": f"{parts.scheme or 'http'}://{parts.netloc}"}
+    return options
@@ -0,0 +1,208 @@
+"""
+Hedged requests entre proveedores de IA
+Para keywords sensibles a la latencia de cola: se lanza la petición al proveedor
+principal y, si no responde dentro del percentil configurado de su latencia
+observada, se lanza una segunda petición al mejor proveedor de
+settings.fallback_order según su circuito y latencia. Gana la primera respuesta válida; la otra se abandona.
+
+Es opcional: settings.hedging.enabled en config/ai_providers.json o la variable
+de entorno AI_HEDGING=1. Solo se aplica a las keywords de settings.hedging.keywords.
+"""
+import os
+import queue
+import threading
+import time
+
+from libraries.ai_circuit_breaker import get_circuit_breaker, route_providers
+from libraries.ai_clients import post_json
+from libraries.config_snapshot import load_json
+from libraries.ai_endpoints import PROVIDERS_FILE, get_base_url
+from libraries.ai_rate_limiter import CallCancelled, call_with_retry
+
+DEFAULT_HEDGING = {
+    "enabled": False,
+    "percentile": 95,
+    "min_samples": 10,
+    "initial_delay_seconds": 5.0,
+    "keywords": [],
+}
+
+ANTHROPIC_VERSION = "2023-06-01"
+
+_stats = {"llamadas": 0, "hedges_lanzados": 0, "ganadas_por_hedge": 0, "fallos_principal": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def hedging_stats():
+    """Contadores de hedging del proceso"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _load_config():
+    try:
+        return load_json(PROVIDERS_FILE)
+    except (OSError, ValueError):
+        return {}
+
+
+def hedging_settings(config=None):
+    """Configuración de hedging con AI_HEDGING como interruptor de entorno"""
+    config = config if config is not None else _load_config()
+    settings = dict(DEFAULT_HEDGING)
+    settings.update(config.get("settings", {}).get("hedging", {}))
+    env = os.getenv("AI_HEDGING")
+    if env:
+        settings["enabled"] = env.lower() in ("1", "true", "yes")
+    return settings
+
+
+def is_hedging_enabled(keyword=None, settings=None):
+    """True si el hedging está activo para la keyword indicada"""
+    settings = settings or hedging_settings()
+    if not settings.get("enabled"):
+        return False
+    keywords = settings.get("keywords") or []
+    return keyword is None or not keywords or keyword in keywords
+
+
+# ----------------------------------------------------------------------
+# Clientes REST mínimos (proveedor secundario, por el pool HTTP de ai_clients)
+# ----------------------------------------------------------------------
+
+def _gemini_text(prompt, model, api_key, timeout):
+    body = post_json(f"{get_base_url('gemini')}/{model}:generateContent",
+                     {"contents": [{"parts": [{"text": prompt}]}]},
+                     {"x-goog-api-key": api_key}, timeout)
+    parts = body["candidates"][0]["content"]["parts"]
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _claude_text(prompt, model, api_key, timeout):
+    body = post_json(get_base_url("claude"),
+                     {"model": model, "max_tokens": 2048, "messages": [{"role": "user", "content": prompt}]},
+                     {"x-api-key": api_key, "anthropic-version": ANTHROPIC_VERSION}, timeout)
+    return "".join(block.get("text", "") for block in body.get("content", []) if block.get("type") == "text")
+
+
+# AWS Bedrock requiere firma SigV4: no se usa como proveedor de hedge
+REST_CLIENTS = {"gemini": _gemini_text, "claude": _claude_text}
+
+
+def secondary_provider(primary, config=None):
+    """
+    Proveedor de fallback_order utilizable para el hedge, el más sano y rápido primero
+
+    Returns:
+        tuple (proveedor, configuración) o (None, None)
+    """
+    config = config if config is not None else _load_config()
+    providers = config.get("providers", {})
+    candidates = []
+    for provider in config.get("settings", {}).get("fallback_order", []):
+        provider_config = providers.get(provider, {})
+        if (provider != primary and provider in REST_CLIENTS and provider_config.get("enabled")
+                and os.getenv(provider_config.get("api_key_var", ""))):
+            candidates.append(provider)
+    tolerance = config.get("settings", {}).get("routing", {}).get("latency_tolerance", 0.25)
+    for provider in route_providers(candidates, tolerance):
+        return provider, providers[provider]
+    return None, None
+
+
+def hedge_delay(provider, settings):
+    """Segundos a esperar al proveedor principal antes de lanzar el hedge"""
+    observed = get_circuit_breaker(provider).latency_percentile(
+        settings.get("percentile", 95), settings.get("min_samples", 10))
+    return observed if observed is not None else float(settings.get("initial_delay_seconds", 5.0))
+
+
+def hedged_call(provider, fn, prompt, keyword=None, text_of=lambda response: response.text):
+    """
+    Llamada de IA con hedging opcional hacia un segundo proveedor
+
+    Sin hedging activo equivale a text_of(call_with_retry(provider, fn, prompt)).
+
+    Args:
+        provider: Proveedor principal (el del cliente del llamador)
+        fn: Función sin argumentos que llama al proveedor principal
+        prompt: Prompt enviado (se reenvía tal cual al proveedor secundario)
+        keyword: Keyword que origina la llamada, para filtrar por settings.hedging.keywords
+        text_of: Convierte la respuesta del principal en texto
+
+    Returns:
+        str: Texto de la primera respuesta exitosa
+    """
+    config = _load_config()
+    settings = hedging_settings(config)
+    if not is_hedging_enabled(keyword, settings):
+        return text_of(call_with_retry(provider, fn, prompt))
+
+    secondary, secondary_config = secondary_provider(provider, config)
+    if not secondary:
+        return text_of(call_with_retry(provider, fn, prompt))
+
+    _count("llamadas")
+    timeout = config.get("settings", {}).get("timeout_seconds", 30)
+    client = REST_CLIENTS[secondary]
+    api_key = os.getenv(secondary_config.get("api_key_var", ""))
+    model = secondary_config.get("default_model")
+
+    cancel = threading.Event()
+    results = queue.Queue()
+
+    def run(name, call):
+        try:
+            results.put((name, True, call()))
+        except CallCancelled:
+            results.put((name, False, None))
+        except Exception as e:
+            results.put((name, False, e))
+
+    def start(name, call):
+        # Hilos daemon: una petición abandonada no retiene el cierre del proceso
+        threading.Thread(target=run, args=(name, call), daemon=True, name=f"hedge-{name}").start()
+
+    start(provider, lambda: text_of(call_with_retry(provider, fn, prompt, cancel)))
+    started = time.monotonic()
+    pending, errors = 1, {}
+    delay = hedge_delay(provider, settings)
+
+    try:
+        first = results.get(timeout=delay)
+    except queue.Empty:
+        first = None
+
+    if first and first[1]:
+        return first[2]
+    if first:
+        pending -= 1
+        errors[first[0]] = first[2]
+        _count("fallos_principal")
+
+    print(f"⚡ Hedge a {secondary} tras {time.monotonic() - started:.1f}s sin respuesta de {provider}")
+    _count("hedges_lanzados")
+    start(secondary, lambda: call_with_retry(secondary, lambda: client(prompt, model, api_key, timeout),
+                                             prompt, cancel))
+    pending += 1
+
+    try:
+        while pending:
+            name, ok, value = results.get()
+            pending -= 1
+            if ok:
+                if name == secondary:
+                    _count("ganadas_por_hedge")
+                return value
+            errors[name] = value
+    finally:
+        # La petición perdedora no hace más intentos; su respuesta en curso se descarta
+        cancel.set()
+
+    error = errors.get(provider) or errors.get(secondary)
+    raise error if isinstance(error, Exception) else RuntimeError(f"Sin respuesta de {provider} ni {secondary}")
@@ -0,0 +1,363 @@
+"""
+Limitador de tasa y reintentos compartido por todos los clientes de IA
+Token bucket por proveedor con presupuesto de peticiones por minuto (RPM) y
+tokens por minuto (TPM) tomados de config/ai_providers.json (rate_limits).
+El estado puede compartirse entre procesos (pabot, listener + reporter) con
+un archivo protegido por FileLock. Los 429 y errores transitorios se
+reintentan con backoff exponencial con jitter respetando Retry-After.
+Cada llamada informa su resultado y latencia al circuit breaker del proveedor.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from libraries.ai_circuit_breaker import CircuitOpenError, get_circuit_breaker
+from libraries.ai_endpoints import PROVIDERS_FILE
+from libraries.config_snapshot import load_json
+from libraries.file_lock import FileLock
+
+DEFAULT_STATE_DIR = Path(__file__).parent.parent / "data" / "rate_limits"
+
+# Nombres de excepción de google.api_core / SDKs que indican un error transitorio
+_RATE_LIMIT_ERRORS = {"ResourceExhausted", "TooManyRequests", "RateLimitError"}
+_TRANSIENT_ERRORS = {"ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout",
+                     "BadGateway", "ServerError", "APIConnectionError", "Timeout", "TimeoutError",
+                     "ConnectionError", "ConnectionResetError", "RemoteDisconnected", "URLError"}
+# 429 solo cuenta como estado HTTP: al inicio del mensaje o junto a status/code/HTTP
+_RATE_LIMIT_MESSAGE = re.compile(r"^\s*429\b|\b(?:status|code|http|error)\W{0,12}429\b|\bresource[_ ]exhausted\b"
+                                 r"|\btoo many requests\b", re.IGNORECASE)
+_RETRY_IN_MESSAGE = re.compile(r"retry(?:[_ ]delay)?\D{0,20}?(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+
+class CallCancelled(Exception):
+    """La llamada se abandonó porque otra petición (hedging) respondió antes"""
+
+
+class _MemoryState:
+    """Estado del bucket compartido por los hilos de este proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self._data
+
+
+class _FileState:
+    """Estado del bucket compartido entre procesos mediante archivo JSON + FileLock"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = FileLock(str(self.path) + ".lock", timeout=30)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                data = {}
+            before = dict(data)
+            yield data
+            if data != before:
+                temporal = self.path.with_suffix(".tmp")
+                with open(temporal, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(temporal, self.path)
+
+
+class ProviderRateLimiter:
+    """Doble token bucket (peticiones y tokens) para un proveedor"""
+
+    def __init__(self, provider, requests_per_minute=0, tokens_per_minute=0, burst=1,
+                 max_retries=3, base_backoff=1.0, max_backoff=60.0, cross_process=False, state_dir=None):
+        """
+        Args:
+            provider: Nombre del proveedor
+            requests_per_minute: Presupuesto de peticiones por minuto (0 = sin límite)
+            tokens_per_minute: Presupuesto de tokens por minuto (0 = sin límite)
+            burst: Peticiones que pueden salir juntas tras un periodo inactivo
+            max_retries: Reintentos ante 429 o errores transitorios
+            base_backoff: Segundos del primer backoff
+            max_backoff: Tope de cada espera de backoff
+            cross_process: Compartir el presupuesto entre procesos de la máquina
+            state_dir: Directorio del estado compartido. Por defecto data/rate_limits
+        """
+        self.provider = provider
+        self.requests_per_minute = float(requests_per_minute or 0)
+        self.tokens_per_minute = float(tokens_per_minute or 0)
+        self.burst = max(1.0, float(burst))
+        self.max_retries = int(max_retries)
+        self.base_backoff = float(base_backoff)
+        self.max_backoff = float(max_backoff)
+        self.cross_process = bool(cross_process)
+
+        if self.cross_process:
+            self._state = _FileState(Path(state_dir or DEFAULT_STATE_DIR) / f"{provider}.json")
+        else:
+            self._state = _MemoryState()
+
+        self._rng = random.Random()
+        self._stats_lock = threading.Lock()
+        self._stats = {"peticiones": 0, "esperas": 0, "segundos_esperados": 0.0,
+                       "reintentos": 0, "rate_limited": 0, "errores_transitorios": 0}
+
+    def _count(self, key, value=1):
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def _refill(self, state, now):
+        """Rellena ambos buckets según el tiempo transcurrido (reloj de pared: válido entre procesos)"""
+        last = state.get("actualizado", now)
+        elapsed = max(0.0, now - last)
+        if self.requests_per_minute:
+            tokens = state.get("peticiones", self.burst) + elapsed * self.requests_per_minute / 60.0
+            state["peticiones"] = min(self.burst, tokens)
+        if self.tokens_per_minute:
+            tokens = state.get("tokens", self.tokens_per_minute) + elapsed * self.tokens_per_minute / 60.0
+            state["tokens"] = min(self.tokens_per_minute, tokens)
+        state["actualizado"] = now
+
+    def acquire(self, tokens=1):
+        """
+        Bloquea hasta que haya presupuesto para una petición de `tokens` tokens estimados
+
+        Returns:
+            float: Segundos esperados
+        """
+        if self.tokens_per_minute:
+            tokens = min(float(tokens), self.tokens_per_minute)
+        waited = 0.0
+
+        while True:
+            with self._state.transaction() as state:
+                now = time.time()
+                self._refill(state, now)
+                wait = max(0.0, state.get("bloqueado_hasta", 0.0) - now)
+
+                if not wait:
+                    need_requests = (1 - state["peticiones"]) if self.requests_per_minute else 0
+                    need_tokens = (tokens - state["tokens"]) if self.tokens_per_minute else 0
+                    if need_requests <= 0 and need_tokens <= 0:
+                        if self.requests_per_minute:
+                            state["peticiones"] -= 1
+                        if self.tokens_per_minute:
+                            state["tokens"] -= tokens
+                        break
+                    wait = max(need_requests * 60.0 / self.requests_per_minute if need_requests > 0 else 0,
+                               need_tokens * 60.0 / self.tokens_per_minute if need_tokens > 0 else 0)
+
+            # Esperar fuera del bloqueo; se reevalúa por si otro proceso consumió antes
+            wait = min(wait, 5.0) + 0.001
+            time.sleep(wait)
+            waited += wait
+
+        self._count("peticiones")
+        if waited:
+            self._count("esperas")
+            self._count("segundos_esperados", waited)
+        return waited
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        """Ajusta el bucket de tokens con el consumo real informado por la API"""
+        if not self.tokens_per_minute or actual_tokens is None:
+            return
+        with self._state.transaction() as state:
+            self._refill(state, time.time())
+            state["tokens"] = min(self.tokens_per_minute, state["tokens"] + estimated_tokens - actual_tokens)
+
+    def penalize(self, seconds):
+        """Pausa a todos los llamadores del proveedor (tras un 429 con Retry-After)"""
+        with self._state.transaction() as state:
+            state["bloqueado_hasta"] = max(state.get("bloqueado_hasta", 0.0), time.time() + seconds)
+
+    def backoff(self, attempt, retry_after=None):
+        """Espera antes del reintento `attempt` (0-based): Retry-After o exponencial con jitter completo"""
+        if retry_after is not None:
+            return retry_after + self._rng.uniform(0, min(1.0, 0.25 * retry_after))
+        return self._rng.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "proveedor": self.provider,
+            "rpm": self.requests_per_minute,
+            "tpm": self.tokens_per_minute,
+            "entre_procesos": self.cross_process,
+            "segundos_esperados": round(stats["segundos_esperados"], 3),
+        })
+        return stats
+
+
+# ----------------------------------------------------------------------
+# Registro por proceso
+# ----------------------------------------------------------------------
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _load_limits(provider):
+    try:
+        config = load_json(PROVIDERS_FILE)
+    except (OSError, ValueError):
+        config = {}
+    settings = config.get("settings", {})
+    limits = dict(config.get("providers", {}).get(provider, {}).get("rate_limits", {}))
+    limiter_settings = settings.get("rate_limiter", {})
+    cross_process = os.getenv("AI_RATE_LIMIT_CROSS_PROCESS")
+
+    return {
+        "requests_per_minute": limits.get("requests_per_minute", 0),
+        "tokens_per_minute": limits.get("tokens_per_minute", 0),
+        "burst": limits.get("burst", 1),
+        "max_retries": settings.get("max_retries", 3),
+        "max_backoff": limiter_settings.get("max_backoff_seconds", 60),
+        "cross_process": (cross_process.lower() in ("1", "true", "yes")) if cross_process
+        else limiter_settings.get("cross_process", False),
+    }
+
+
+def get_rate_limiter(provider="gemini", **overrides):
+    """
+    Limitador compartido del proceso para un proveedor
+
+    Args:
+        provider: Nombre del proveedor
+        **overrides: Valores que reemplazan los de ai_providers.json (solo al crearlo o reconfigurarlo)
+    """
+    # Un override None significa "sin cambio": no debe reconstruir el limitador compartido
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None or overrides:
+            options = _load_limits(provider)
+            options.update(overrides)
+            limiter = _limiters[provider] = ProviderRateLimiter(provider, **options)
+        return limiter
+
+
+def rate_limiter_stats():
+    """Estadísticas de todos los limitadores creados en el proceso"""
+    with _limiters_lock:
+        return {provider: limiter.stats() for provider, limiter in _limiters.items()}
+
+
+# ----------------------------------------------------------------------
+# Reintentos
+# ----------------------------------------------------------------------
+
+def estimate_tokens(prompt):
+    """Estimación aproximada (4 caracteres por token) para el presupuesto TPM"""
+    return max(1, len(str(prompt or "")) // 4)
+
+
+def _status_code(error):
+    for attr in ("code", "status_code", "status"):
+        value = getattr(error, attr, None)
+        value = value() if callable(value) else value
+        if isinstance(value, int) and value >= 100:
+            return value
+    return None
+
+
+def retry_after_seconds(error):
+    """Retry-After de la respuesta HTTP o 'retry in Ns' del mensaje de error"""
+    for holder in (error, getattr(error, "response", None)):
+        headers = getattr(holder, "headers", None)
+        if headers:
+            value = headers.get("Retry-After") or headers.get("retry-after")
+            if value:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    pass
+    match = _RETRY_IN_MESSAGE.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def classify_error(error):
+    """'rate_limit', 'transient' o None (no reintentable)"""
+    code = _status_code(error)
+    name = type(error).__name__
+    if code == 429 or name in _RATE_LIMIT_ERRORS or _RATE_LIMIT_MESSAGE.search(str(error)[:200]):
+        return "rate_limit"
+    if code in (500, 502, 503, 504) or name in _TRANSIENT_ERRORS:
+        return "transient"
+    return None
+
+
+def _usage_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None)
+    return total if isinstance(total, int) else None
+
+
+def call_with_retry(provider, fn, prompt=None, cancel_event=None):
+    """
+    Ejecuta una llamada de IA respetando el presupuesto del proveedor y reintentando
+    429 y errores transitorios. Relanza la última excepción si se agotan los reintentos
+
+    El resultado y la latencia de cada intento alimentan el circuit breaker del
+    proveedor; con el circuito abierto se lanza CircuitOpenError sin llamar a la API
+
+    Args:
+        provider: Nombre del proveedor (gemini, claude, aws)
+        fn: Función sin argumentos que realiza la llamada
+        prompt: Prompt enviado, para estimar tokens
+        cancel_event: threading.Event opcional; si se activa no se hacen más intentos (CallCancelled)
+    """
+    limiter = get_rate_limiter(provider)
+    breaker = get_circuit_breaker(provider)
+    estimated = estimate_tokens(prompt)
+    attempt = 0
+
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            raise CallCancelled(provider)
+        if not breaker.allow_request():
+            raise CircuitOpenError(provider, breaker.retry_in())
+        limiter.acquire(estimated)
+        started = time.monotonic()
+        try:
+            response = fn()
+        except Exception as e:
+            kind = classify_error(e)
+            # Un 429 es cuota, no salud del proveedor; los errores no reintentables tampoco
+            if kind == "transient":
+                breaker.record_failure(time.monotonic() - started)
+            else:
+                breaker.release()
+            if kind is None or attempt >= limiter.max_retries or not breaker.is_available():
+                raise
+
+            retry_after = retry_after_seconds(e) if kind == "rate_limit" else None
+            wait = limiter.backoff(attempt, retry_after)
+            if kind == "rate_limit":
+                limiter._count("rate_limited")
+                limiter.penalize(wait)
+            else:
+                limiter._count("errores_transitorios")
+            limiter._count("reintentos")
+            print(f"⏳ {provider}: {type(e).__name__} ({kind}), reintento {attempt + 1}/{limiter.max_retries} en {wait:.1f}s")
+            if cancel_event is not None:
+                cancel_event.wait(wait)
+            else:
+                time.sleep(wait)
+            attempt += 1
+            continue
+
+        breaker.record_success(time.monotonic() - started)
+        limiter.reconcile(estimated, _usage_tokens(response))
+        return response
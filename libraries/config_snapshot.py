@@ -0,0 +1,140 @@
+"""
+Snapshot compartido de los archivos de configuración JSON
+credentials.json y ai_providers.json se leían y parseaban de nuevo en cada
+ConfigManager, AIConfigManager, llamada con hedging o limitador creado. Aquí
+cada archivo se parsea una vez por proceso y solo se relee si cambia su
+firma (mtime, tamaño, inodo), así que una edición se ve sin reiniciar.
+
+Los módulos internos reciben vistas inmutables (MappingProxyType y tuplas)
+compartidas entre hilos; los getters públicos de ConfigManager y
+AIConfigManager entregan copias con thaw() (modificables y serializables con
+json). Para modificar la configuración: copia con thaw(), escribir el archivo
+e invalidar el snapshot.
+"""
+import json
+import os
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+
+# utf-8-sig también lee UTF-8 sin BOM; latin-1 rescata archivos guardados en ANSI
+DEFAULT_ENCODINGS = ("utf-8-sig", "latin-1")
+
+
+def freeze(value):
+    """Copia inmutable: dicts como MappingProxyType y listas como tuplas"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Copia modificable (dicts y listas) de una vista congelada"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class ConfigSnapshot:
+    """Contenido parseado de un archivo JSON, recargado solo cuando el archivo cambia"""
+
+    def __init__(self, path, encodings=DEFAULT_ENCODINGS):
+        """
+        Args:
+            path: Archivo JSON
+            encodings: Codificaciones a probar en orden
+        """
+        self.path = Path(path)
+        self.encodings = tuple(encodings)
+        self.encoding = None
+        self._data = None
+        self._signature = None
+        self._failed_signature = None
+        self._lock = threading.Lock()
+        self._stats = {"lecturas": 0, "aciertos": 0, "recargas": 0, "errores": 0}
+
+    def _current_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _parse(self, content):
+        error = None
+        for encoding in self.encodings:
+            try:
+                return json.loads(content.decode(encoding)), encoding
+            except ValueError as e:  # UnicodeDecodeError y JSONDecodeError
+                error = e
+        raise error
+
+    def get(self):
+        """
+        Vista inmutable del contenido vigente
+
+        Si el archivo cambió pero no se puede leer (edición a medias, borrado) se
+        conserva la última versión válida.
+
+        Raises:
+            OSError o ValueError: Si el archivo nunca se pudo leer
+        """
+        with self._lock:
+            signature = None
+            try:
+                signature = self._current_signature()
+                if signature == self._signature:
+                    self._stats["aciertos"] += 1
+                    return self._data
+                with open(self.path, 'rb') as f:
+                    data, encoding = self._parse(f.read())
+            except (OSError, ValueError) as e:
+                self._stats["errores"] += 1
+                if self._data is None:
+                    raise
+                if signature != self._failed_signature:
+                    self._failed_signature = signature
+                    print(f"⚠️ No se pudo recargar {self.path.name}, se conserva la versión anterior: {e}")
+                return self._data
+
+            self._stats["recargas" if self._data is not None else "lecturas"] += 1
+            # La firma es la tomada antes de leer: un cambio durante la lectura se relee en la siguiente llamada
+            self._data, self._signature, self.encoding = freeze(data), signature, encoding
+            return self._data
+
+    def invalidate(self):
+        """Fuerza la relectura en el próximo get (tras escribir el archivo desde este proceso)"""
+        with self._lock:
+            self._signature = None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, codificacion=self.encoding)
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(path):
+    """Snapshot compartido por el proceso para un archivo"""
+    key = os.path.abspath(path)
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None:
+            snapshot = _snapshots[key] = ConfigSnapshot(path)
+        return snapshot
+
+
+def load_json(path):
+    """Contenido vigente (vista inmutable) de un archivo JSON de configuración"""
+    return get_snapshot(path).get()
+
+
+def config_snapshot_stats():
+    """Métricas de los snapshots creados en el proceso"""
+    with _snapshots_lock:
+        snapshots = list(_snapshots.values())
+    return {str(snapshot.path): snapshot.stats() for snapshot in snapshots}
@@ -0,0 +1,177 @@
+"""
+Reglas locales para verificar_contenido_apropiado
+Un autómata Aho-Corasick precompilado busca de una sola pasada todos los
+términos sospechosos (plantillas sin resolver, trazas de error, marcadores de
+prueba, inyección, lenguaje ofensivo) en el texto. Solo decide sin IA los
+casos obvios:
+- sin criterios pasa, como en la validación original;
+- pasa si todos los criterios están marcados como literales ("literal:texto"),
+  aparecen en el texto y no hay términos sospechosos;
+- reprueba si falta un criterio literal o hay inyección o plantillas sin
+  resolver.
+Los criterios sin marcar ("menciona la capacidad") son semánticos: aparecer
+tal cual en el texto no basta para aprobar, así que quedan para la IA (o la
+validación básica), igual que el resto de términos sospechosos. Un término
+que un criterio exige literalmente no cuenta como sospechoso.
+"""
+import threading
+import unicodedata
+from collections import deque
+
+# Categoría -> términos. Se comparan sin mayúsculas ni tildes; los términos que
+# empiezan o terminan en letra/dígito solo cuentan como palabra completa.
+# Solo marcadores específicos: palabras de uso normal ("exception", "nan",
+# "undefined") escalarían a la IA textos correctos
+BLOCKED_TERMS = {
+    "plantilla_sin_resolver": ["{{", "}}", "${", "[object object]"],
+    "error_tecnico": ["traceback (most recent call last)", "nullpointerexception"],
+    "marcador_de_prueba": ["lorem ipsum", "fixme"],
+    "inyeccion": ["<script", "javascript:", "onerror=", "' or '1'='1"],
+    "lenguaje_ofensivo": ["idiota", "estupido", "imbecil", "mierda", "fuck", "shit"],
+}
+
+# Categorías que reprueban sin consultar a la IA
+CATEGORIAS_REPRUEBAN = {"plantilla_sin_resolver", "inyeccion"}
+
+# Prefijo de los criterios que se verifican como texto literal
+LITERAL_PREFIX = "literal:"
+
+
+def normalize(text):
+    """Minúsculas y sin tildes"""
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def literal_text(criterio):
+    """Texto exigido por un criterio literal ("literal:texto"), o None si el criterio es semántico"""
+    if isinstance(criterio, str) and criterio[:len(LITERAL_PREFIX)].lower() == LITERAL_PREFIX:
+        return criterio[len(LITERAL_PREFIX):].strip() or None
+    return None
+
+
+class KeywordAutomaton:
+    """Autómata Aho-Corasick: todas las apariciones de todos los patrones en O(n + coincidencias)"""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            siguiente = self._goto[state].get(char)
+            if siguiente is None:
+                siguiente = len(self._goto)
+                self._goto[state][char] = siguiente
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = siguiente
+        self._output[state].append(pattern)
+
+    def _build(self):
+        cola = deque(self._goto[0].values())
+        while cola:
+            state = cola.popleft()
+            for char, siguiente in self._goto[state].items():
+                cola.append(siguiente)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                # Los hijos de la raíz fallan a la raíz
+                self._fail[siguiente] = self._goto[fallback].get(char, 0) if state else 0
+                self._output[siguiente] = self._output[siguiente] + self._output[self._fail[siguiente]]
+
+    def find(self, text):
+        """
+        Returns:
+            list: (inicio, fin, patrón) de cada aparición
+        """
+        state, encontrados = 0, []
+        for posicion, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                encontrados.append((posicion - len(pattern) + 1, posicion + 1, pattern))
+        return encontrados
+
+
+class ContentRules:
+    """Nivel de reglas de la cascada de verificación de contenido"""
+
+    def __init__(self, blocked_terms=None):
+        """
+        Args:
+            blocked_terms: Dict {categoría: [términos]}. Por defecto BLOCKED_TERMS
+        """
+        self.categorias = {}
+        for categoria, terminos in (blocked_terms or BLOCKED_TERMS).items():
+            for termino in terminos:
+                self.categorias[normalize(termino)] = categoria
+        self.automaton = KeywordAutomaton(self.categorias)
+
+    @staticmethod
+    def _palabra_completa(texto, inicio, fin, termino):
+        antes = inicio == 0 or not texto[inicio - 1].isalnum() or not termino[0].isalnum()
+        despues = fin == len(texto) or not texto[fin].isalnum() or not termino[-1].isalnum()
+        return antes and despues
+
+    def blocked(self, contenido):
+        """Términos bloqueados presentes: [(término, categoría)] sin repetir"""
+        return self._blocked(normalize(contenido))
+
+    def _blocked(self, texto):
+        encontrados = {}
+        for inicio, fin, termino in self.automaton.find(texto):
+            if self._palabra_completa(texto, inicio, fin, termino):
+                encontrados.setdefault(termino, self.categorias[termino])
+        return list(encontrados.items())
+
+    def evaluate(self, contenido, criterios=None):
+        """
+        Decide los casos obvios
+
+        Returns:
+            dict: {"cumple": True, False o None si es ambiguo, "razones": [...],
+                   "faltantes": criterios literales no presentes}
+        """
+        # Sin criterios la validación siempre aprobó el texto
+        if not criterios:
+            return {"cumple": True, "faltantes": [], "razones": ["Sin criterios"]}
+
+        texto = normalize(contenido)
+        literales = {criterio: normalize(literal_text(criterio)) for criterio in criterios if literal_text(criterio)}
+        semanticos = [criterio for criterio in criterios if not literal_text(criterio)]
+        faltantes = [criterio for criterio, buscado in literales.items() if buscado not in texto]
+        # Un término que el propio criterio pide literalmente no es sospechoso
+        bloqueados = [(termino, categoria) for termino, categoria in self._blocked(texto)
+                      if not any(termino in buscado for buscado in literales.values())]
+
+        razones = [f"Criterio literal no encontrado: {literal_text(criterio)}" for criterio in faltantes]
+        razones += [f"Contiene '{termino}' ({categoria})" for termino, categoria in bloqueados]
+        if faltantes or any(categoria in CATEGORIAS_REPRUEBAN for _, categoria in bloqueados):
+            return {"cumple": False, "faltantes": faltantes, "razones": razones}
+        if not razones and not semanticos:
+            return {"cumple": True, "faltantes": [], "razones": ["Todos los criterios literales aparecen en el texto"]}
+        razones += [f"Criterio semántico: {criterio}" for criterio in semanticos]
+        return {"cumple": None, "faltantes": faltantes, "razones": razones}
+
+
+_rules = None
+_rules_lock = threading.Lock()
+
+
+def get_content_rules():
+    """Reglas compartidas por el proceso (el autómata se compila una sola vez)"""
+    global _rules
+    with _rules_lock:
+        if _rules is None:
+            _rules = ContentRules()
+        return _rules
@@ -0,0 +1,284 @@
+"""
+Motor local de mutación para credenciales inválidas
+Genera credenciales inválidas categorizadas a partir de una gramática de
+valores base y operadores de mutación (longitudes límite, unicode, cadenas de
+inyección, variantes de espacios en blanco). Es determinista para una semilla
+dada y produce cientos de miles de credenciales por segundo, de modo que la IA
+solo se usa para casos realmente nuevos.
+
+Uso:
+    fuzzer = CredentialFuzzer(seed=42)
+    credenciales = fuzzer.generate(100000)
+"""
+import random
+import string
+import unicodedata
+
+# Categorías compatibles con GeminiLibrary y el pool de credenciales
+CATEGORIAS = ["campos_vacios", "caracteres_especiales", "formato_invalido", "inexistente"]
+
+ERROR_ESPERADO = {
+    "campos_vacios": "required_fields",
+    "caracteres_especiales": "invalid_credentials",
+    "formato_invalido": "invalid_credentials",
+    "inexistente": "invalid_credentials",
+}
+
+NOMBRES = ["ana", "carlos", "sofia", "pedro", "maria", "luis", "laura", "diego", "elena", "miguel",
+           "carmen", "jose", "patricia", "rafael", "sandra", "alberto", "claudia", "fernando", "monica", "andres"]
+APELLIDOS = ["lopez", "martinez", "garcia", "rodriguez", "perez", "sanchez", "diaz", "torres", "ramirez", "moreno",
+             "castro", "ruiz", "vargas", "herrera", "medina", "jimenez", "rojas", "silva", "mendoza", "ortega"]
+USUARIOS_COMUNES = ["admin", "administrator", "root", "test", "demo", "guest", "user", "usuario", "soporte", "qa"]
+CLAVES_COMUNES = ["123456", "password", "12345678", "qwerty", "abc123", "111111", "admin", "siesa2025",
+                  "Password1", "contraseña"]
+
+INYECCIONES = [
+    "' OR '1'='1", "' OR 1=1 --", "admin'--", "\"; DROP TABLE usuarios; --", "1; SELECT * FROM users",
+    "<script>alert(1)</script>", "\"><img src=x onerror=alert(1)>", "javascript:alert(1)",
+    "*)(uid=*))(|(uid=*", "../../../../etc/passwd", "..\\..\\windows\\win.ini",
+    "{{7*7}}", "${7*7}", "#{7*7}", "%00", "%27%20OR%201%3D1", "$(whoami)", "`id`", "| ls", "{\"$gt\": \"\"}",
+]
+ESPECIALES = "!@#$%^&*()+=[]{}|\\;:'\",<>/?`~"
+
+# Espacios: normal, tabulador, saltos de línea, NBSP, em space e ideográfico
+ESPACIOS = [" ", "\t", "\n", "\r\n", "\u00a0", "\u2003", "\u3000"]
+# Ancho cero, BOM, word joiner, override derecha-izquierda y guion suave
+INVISIBLES = ["\u200b", "\u200c", "\u200d", "\ufeff", "\u2060", "\u202e", "\u00ad"]
+# Homoglifos: cirílico/griego visualmente idéntico al latino
+HOMOGLIFOS = {"a": "\u0430", "e": "\u0435", "o": "\u043e", "p": "\u0440", "c": "\u0441", "x": "\u0445",
+              "i": "\u0456", "s": "\u0455", "l": "\u04cf", "n": "\u03b7"}
+UNICODE_VARIOS = ["ñ", "ü", "ç", "ß", "ø", "日本", "用户", "пароль", "مرحبا", "😀", "🔑", "Ω", "µ", "ﬁ", "Ａ"]
+
+LONGITUDES_LIMITE = [1, 2, 3, 63, 64, 65, 127, 128, 129, 255, 256, 257, 1024]
+
+_NOMBRES_APELLIDOS = [f"{nombre}.{apellido}" for nombre in NOMBRES for apellido in APELLIDOS]
+_N_NOMBRES_APELLIDOS = len(_NOMBRES_APELLIDOS)
+_N_CLAVES = len(CLAVES_COMUNES)
+
+
+class CredentialFuzzer:
+    """Generador de credenciales inválidas por gramática y mutación, reproducible por semilla"""
+
+    def __init__(self, seed=None, categories=None, base_users=None, unique=True):
+        """
+        Inicializa el motor
+
+        Args:
+            seed: Semilla para resultados reproducibles (None = aleatorio)
+            categories: Categorías a generar y su peso, lista o dict {categoria: peso}
+            base_users: Usuarios reales cuyos typos se usan como usuarios inexistentes
+            unique: Descartar pares usuario/clave repetidos
+        """
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._random = self._rng.random
+        if isinstance(categories, dict):
+            self.weights = {c: float(p) for c, p in categories.items() if c in CATEGORIAS and p > 0}
+        else:
+            self.weights = {c: 1.0 for c in (categories or CATEGORIAS) if c in CATEGORIAS}
+        if not self.weights:
+            raise ValueError(f"Ninguna categoría válida. Opciones: {', '.join(CATEGORIAS)}")
+        self.base_users = [u for u in (base_users or []) if u]
+        self.unique = unique
+
+        self._operators = {
+            "campos_vacios": [self._vacio_usuario, self._vacio_clave, self._vacio_ambos, self._solo_espacios],
+            "caracteres_especiales": [self._inyeccion_usuario, self._inyeccion_clave, self._especial_insertado,
+                                      self._byte_nulo],
+            "formato_invalido": [self._longitud_limite, self._espacios_bordes, self._espacios_internos,
+                                 self._invisibles, self._homoglifos, self._unicode, self._normalizacion,
+                                 self._mayusculas, self._solo_digitos],
+            "inexistente": [self._usuario_plausible, self._usuario_comun, self._typo_usuario_real],
+        }
+
+    # ------------------------------------------------------------------
+    # Gramática base
+    # ------------------------------------------------------------------
+
+    # random() indexando listas es varias veces más rápido que choice/randrange en el bucle caliente
+
+    def _usuario(self):
+        r = self._random
+        return f"{_NOMBRES_APELLIDOS[int(r() * _N_NOMBRES_APELLIDOS)]}{int(r() * 1000)}"
+
+    def _clave(self):
+        r = self._random
+        return f"{CLAVES_COMUNES[int(r() * _N_CLAVES)]}{int(r() * 10000)}"
+
+    # ------------------------------------------------------------------
+    # Operadores: devuelven (usuario, clave, descripcion)
+    # ------------------------------------------------------------------
+
+    def _vacio_usuario(self):
+        return "", self._clave(), "Usuario vacío"
+
+    def _vacio_clave(self):
+        return self._usuario(), "", "Contraseña vacía"
+
+    def _vacio_ambos(self):
+        return "", "", "Campos completamente vacíos"
+
+    def _solo_espacios(self):
+        espacio = self._rng.choice(ESPACIOS) * self._rng.randint(1, 4)
+        if self._rng.random() < 0.5:
+            return espacio, self._clave(), "Usuario solo con espacios en blanco"
+        return self._usuario(), espacio, "Contraseña solo con espacios en blanco"
+
+    def _inyeccion_usuario(self):
+        return self._rng.choice(INYECCIONES), self._clave(), "Cadena de inyección en usuario"
+
+    def _inyeccion_clave(self):
+        return self._usuario(), self._rng.choice(INYECCIONES), "Cadena de inyección en contraseña"
+
+    def _especial_insertado(self):
+        rng = self._rng
+        usuario = self._usuario()
+        posicion = rng.randint(0, len(usuario))
+        return (usuario[:posicion] + rng.choice(ESPECIALES) + usuario[posicion:], self._clave(),
+                "Carácter especial no permitido en usuario")
+
+    def _byte_nulo(self):
+        usuario = self._usuario()
+        return usuario + "\x00" + usuario[:3], self._clave(), "Byte nulo dentro del usuario"
+
+    def _longitud_limite(self):
+        rng = self._rng
+        longitud = rng.choice(LONGITUDES_LIMITE)
+        relleno = rng.choice(string.ascii_lowercase) * longitud
+        if rng.random() < 0.5:
+            return relleno, self._clave(), f"Usuario de longitud límite ({longitud})"
+        return self._usuario(), relleno, f"Contraseña de longitud límite ({longitud})"
+
+    def _espacios_bordes(self):
+        rng = self._rng
+        espacio = rng.choice(ESPACIOS)
+        return espacio + self._usuario() + espacio, " " + self._clave(), "Espacios al inicio/final"
+
+    def _espacios_internos(self):
+        rng = self._rng
+        usuario = self._usuario()
+        posicion = rng.randint(1, len(usuario) - 1)
+        return usuario[:posicion] + rng.choice(ESPACIOS) + usuario[posicion:], self._clave(), "Espacio dentro del usuario"
+
+    def _invisibles(self):
+        rng = self._rng
+        usuario = self._usuario()
+        posicion = rng.randint(0, len(usuario))
+        return (usuario[:posicion] + rng.choice(INVISIBLES) + usuario[posicion:], self._clave(),
+                "Carácter invisible (ancho cero / control bidireccional) en usuario")
+
+    def _homoglifos(self):
+        usuario = self._usuario()
+        letras = [i for i, c in enumerate(usuario) if c in HOMOGLIFOS]
+        if not letras:
+            return usuario + HOMOGLIFOS["a"], self._clave(), "Homoglifo cirílico en usuario"
+        i = self._rng.choice(letras)
+        return usuario[:i] + HOMOGLIFOS[usuario[i]] + usuario[i + 1:], self._clave(), "Homoglifo cirílico en usuario"
+
+    def _unicode(self):
+        rng = self._rng
+        if rng.random() < 0.5:
+            return self._usuario() + rng.choice(UNICODE_VARIOS), self._clave(), "Unicode fuera de ASCII en usuario"
+        return self._usuario(), self._clave() + rng.choice(UNICODE_VARIOS), "Unicode fuera de ASCII en contraseña"
+
+    def _normalizacion(self):
+        # Se ve igual que la forma compuesta (NFC) pero difiere byte a byte
+        usuario = unicodedata.normalize("NFD", f"{self._rng.choice(['josé', 'maría', 'andrés', 'peña'])}.{self._rng.choice(APELLIDOS)}")
+        return usuario, self._clave(), "Usuario con acentos en forma Unicode descompuesta (NFD)"
+
+    def _mayusculas(self):
+        return self._usuario().upper(), self._clave().upper(), "Credenciales en mayúsculas"
+
+    def _solo_digitos(self):
+        rng = self._rng
+        return str(rng.randrange(10 ** rng.randint(1, 12))), self._clave(), "Usuario solo números"
+
+    def _usuario_plausible(self):
+        return self._usuario(), self._clave(), "Usuario con formato válido inexistente en el sistema"
+
+    def _usuario_comun(self):
+        rng = self._rng
+        return rng.choice(USUARIOS_COMUNES), rng.choice(CLAVES_COMUNES), "Usuario genérico con contraseña común"
+
+    def _typo_usuario_real(self):
+        if not self.base_users:
+            return self._usuario_plausible()
+        rng = self._rng
+        usuario = rng.choice(self.base_users)
+        if len(usuario) < 2:
+            return usuario + usuario, self._clave(), "Usuario real duplicado"
+        i = rng.randrange(len(usuario) - 1)
+        operacion = rng.randrange(4)
+        if operacion == 0:
+            mutado, detalle = usuario[:i] + usuario[i + 1] + usuario[i] + usuario[i + 2:], "letras transpuestas"
+        elif operacion == 1:
+            mutado, detalle = usuario[:i] + usuario[i + 1:], "letra omitida"
+        elif operacion == 2:
+            mutado, detalle = usuario[:i] + usuario[i] + usuario[i:], "letra duplicada"
+        else:
+            mutado, detalle = usuario + rng.choice(string.digits), "dígito agregado"
+        if mutado == usuario:
+            mutado += rng.choice(string.ascii_lowercase)
+        return mutado, self._clave(), f"Usuario real con error de digitación ({detalle})"
+
+    # ------------------------------------------------------------------
+    # Generación
+    # ------------------------------------------------------------------
+
+    def _quotas(self, cantidad):
+        """Reparte la cantidad entre categorías según los pesos (restos mayores)"""
+        total = sum(self.weights.values())
+        exactas = {c: cantidad * p / total for c, p in self.weights.items()}
+        quotas = {c: int(v) for c, v in exactas.items()}
+        restantes = cantidad - sum(quotas.values())
+        for c in sorted(exactas, key=lambda c: exactas[c] - quotas[c], reverse=True)[:restantes]:
+            quotas[c] += 1
+        return quotas
+
+    def generate(self, cantidad, shuffle=True):
+        """
+        Genera exactamente `cantidad` credenciales inválidas
+
+        Args:
+            cantidad: Número de credenciales
+            shuffle: Mezclar las categorías (False las deja agrupadas)
+
+        Returns:
+            list: Credenciales con usuario, clave, descripcion, error_esperado y categoria
+        """
+        rng = self._rng
+        r = self._random
+        vistos = set()
+        credenciales = []
+
+        for categoria, quota in self._quotas(int(cantidad)).items():
+            operadores = self._operators[categoria]
+            n_operadores = len(operadores)
+            error = ERROR_ESPERADO[categoria]
+            producidas = intentos = 0
+            # Cota de intentos: los operadores con pocos valores posibles (campos vacíos) se agotan
+            while producidas < quota and intentos < quota * 20 + 100:
+                intentos += 1
+                usuario, clave, descripcion = operadores[int(r() * n_operadores)]()
+                if self.unique:
+                    clave_unica = (usuario, clave)
+                    if clave_unica in vistos:
+                        continue
+                    vistos.add(clave_unica)
+                credenciales.append({"usuario": usuario, "clave": clave, "descripcion": descripcion,
+                                     "error_esperado": error, "categoria": categoria})
+                producidas += 1
+
+            # Si una categoría se agotó, completar con usuarios inexistentes para mantener la cantidad
+            while producidas < quota:
+                usuario, clave, descripcion = self._usuario_plausible()
+                if (usuario, clave) in vistos:
+                    continue
+                vistos.add((usuario, clave))
+                credenciales.append({"usuario": usuario, "clave": clave, "descripcion": descripcion,
+                                     "error_esperado": "invalid_credentials", "categoria": "inexistente"})
+                producidas += 1
+
+        if shuffle:
+            rng.shuffle(credenciales)
+        return credenciales
@@ -0,0 +1,203 @@
+"""
+Índice persistente de credenciales ya generadas por la IA
+Filtro de Bloom sobre pares usuario/clave normalizados, compartido entre
+corridas y procesos, para rechazar los casos que la IA repite y pedir solo
+los que falten. Ocupa unos pocos bytes por credencial; a cambio admite una
+tasa pequeña de falsos positivos (una credencial nueva tomada por repetida),
+nunca falsos negativos.
+
+El archivo se fusiona al guardar (OR de bits bajo FileLock), de modo que
+varios procesos pueden registrar credenciales a la vez sin perder ninguna.
+"""
+import hashlib
+import math
+import os
+import struct
+import threading
+import unicodedata
+from pathlib import Path
+
+from libraries.file_lock import FileLock
+
+DEFAULT_INDEX_FILE = Path(__file__).parent.parent / "data" / "indexes" / "credenciales_ia.bloom"
+
+_MAGIC = b"CRIX"
+_HEADER = struct.Struct(">4sBQBQ")  # magia, versión, bits, hashes, elementos agregados
+_VERSION = 1
+_BITS_POR_BYTE = bytes(bin(valor).count("1") for valor in range(256))
+
+
+def normalize(credential):
+    """
+    Clave normalizada de una credencial
+
+    El usuario se compara sin distinguir mayúsculas ni formas Unicode
+    equivalentes; la clave solo se normaliza en Unicode. Los espacios se
+    conservan: '  admin' y 'admin' son casos de prueba distintos.
+    """
+    usuario = unicodedata.normalize("NFKC", str(credential.get("usuario") or "")).casefold()
+    clave = unicodedata.normalize("NFKC", str(credential.get("clave") or ""))
+    return f"{usuario}\x00{clave}".encode("utf-8")
+
+
+class CredentialIndex:
+    """Filtro de Bloom persistente de credenciales vistas"""
+
+    def __init__(self, path=None, capacity=100000, error_rate=0.001):
+        """
+        Inicializa el índice, cargando el archivo si existe
+
+        Args:
+            path: Archivo del índice. Por defecto data/indexes/credenciales_ia.bloom
+            capacity: Credenciales previstas (dimensiona el filtro si no existe)
+            error_rate: Tasa de falsos positivos objetivo a plena capacidad
+        """
+        self.path = Path(path) if path else DEFAULT_INDEX_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.capacity = max(1, int(capacity))
+        self.error_rate = min(0.5, max(1e-9, float(error_rate)))
+
+        self._lock = FileLock(str(self.path) + ".lock", timeout=30)
+        self._thread_lock = threading.Lock()
+        self._stats = {"consultas": 0, "rechazadas": 0, "agregadas": 0}
+
+        loaded = self._read()
+        if loaded:
+            self.num_bits, self.num_hashes, self.added, self.bits = loaded
+            # El tamaño del archivo manda sobre los argumentos
+            self.capacity = max(1, int(self.num_bits * math.log(2) / self.num_hashes))
+        else:
+            self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(self.error_rate) / math.log(2) ** 2)))
+            self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+            self.added = 0
+            self.bits = bytearray((self.num_bits + 7) // 8)
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def _read(self):
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                magia, version, num_bits, num_hashes, added = _HEADER.unpack(f.read(_HEADER.size))
+                bits = bytearray(f.read())
+        except (OSError, struct.error) as e:
+            print(f"⚠️ Índice de credenciales ilegible, se reinicia: {e}")
+            return None
+        if magia != _MAGIC or version != _VERSION or len(bits) != (num_bits + 7) // 8:
+            print(f"⚠️ Índice de credenciales con formato desconocido, se reinicia: {self.path}")
+            return None
+        return num_bits, num_hashes, added, bits
+
+    def save(self):
+        """Fusiona con el archivo (otros procesos pueden haber agregado) y lo guarda de forma atómica"""
+        with self._lock, self._thread_lock:
+            disco = self._read()
+            if disco and disco[:2] == (self.num_bits, self.num_hashes):
+                nuevos = self.added
+                union = int.from_bytes(self.bits, "big") | int.from_bytes(disco[3], "big")
+                self.bits = bytearray(union.to_bytes(len(self.bits), "big"))
+                # Los agregados de ambos lados pueden solaparse: tomar la estimación por bits
+                self.added = max(disco[2], nuevos, self.estimated_count())
+            temporal = self.path.with_name(self.path.name + ".tmp")
+            with open(temporal, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, self.num_bits, self.num_hashes, self.added))
+                f.write(self.bits)
+            os.replace(temporal, self.path)
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def _positions(self, key):
+        # Doble hash (Kirsch-Mitzenmacher): k posiciones a partir de un solo digest
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1, h2 = struct.unpack(">QQ", digest)
+        h2 |= 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _contains_positions(self, positions):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def contains(self, credential):
+        """True si la credencial (probablemente) ya fue registrada"""
+        positions = self._positions(normalize(credential))
+        with self._thread_lock:
+            return self._contains_positions(positions)
+
+    def add(self, credential):
+        """
+        Registra una credencial
+
+        Returns:
+            bool: True si era nueva, False si ya estaba (o es un falso positivo)
+        """
+        positions = self._positions(normalize(credential))
+        with self._thread_lock:
+            self._stats["consultas"] += 1
+            if self._contains_positions(positions):
+                self._stats["rechazadas"] += 1
+                return False
+            for p in positions:
+                self.bits[p >> 3] |= 1 << (p & 7)
+            self.added += 1
+            self._stats["agregadas"] += 1
+            return True
+
+    def filter_new(self, credentials):
+        """
+        Deja solo las credenciales no vistas antes (también dentro del mismo lote) y las registra
+
+        Returns:
+            list: Credenciales nuevas, en el orden recibido
+        """
+        return [credential for credential in credentials if isinstance(credential, dict) and self.add(credential)]
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def estimated_count(self):
+        """Elementos distintos estimados a partir de los bits encendidos"""
+        encendidos = sum(map(_BITS_POR_BYTE.__getitem__, self.bits))
+        if encendidos >= self.num_bits:
+            return self.added
+        return int(round(-self.num_bits / self.num_hashes * math.log(1 - encendidos / self.num_bits)))
+
+    def false_positive_rate(self):
+        """Tasa de falsos positivos esperada con el llenado actual"""
+        return (1 - math.exp(-self.num_hashes * self.added / self.num_bits)) ** self.num_hashes
+
+    def stats(self):
+        with self._thread_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "archivo": str(self.path),
+            "elementos": self.added,
+            "capacidad": self.capacity,
+            "bytes": len(self.bits),
+            "hashes": self.num_hashes,
+            "tasa_falsos_positivos": round(self.false_positive_rate(), 6),
+            "tasa_objetivo": self.error_rate,
+        })
+        return stats
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_credential_index(**overrides):
+    """Índice compartido por el proceso (se crea en la primera llamada)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CredentialIndex(**overrides)
+        return _index
+
+
+def credential_index_stats():
+    """Métricas del índice del proceso, o None si no se ha usado"""
+    return _index.stats() if _index else None
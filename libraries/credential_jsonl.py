@@ -0,0 +1,207 @@
+"""
+Formato JSON Lines para archivos de credenciales
+Una credencial por línea, con la metadata en un registro de cabecera y los
+totales en un registro de cierre. Se escribe de forma incremental a un archivo
+temporal que se renombra al terminar, de modo que un lector nunca ve un archivo
+a medio escribir, y se lee de forma perezosa sin cargar todo en memoria.
+
+    {"_registro": "cabecera", "metadata": {...}}
+    {"_registro": "valida", "usuario": "...", "clave": "...", ...}
+    {"_registro": "invalida", "usuario": "...", "clave": "...", ...}
+    {"_registro": "cierre", "totales": {"validas": 1, "invalidas": 1, "total": 2}}
+
+La metadata que solo se conoce al terminar (distribución lograda) puede ir en
+el cierre; al leer se combina sobre la de la cabecera.
+"""
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+# Lista del formato JSON clásico -> tipo de registro JSONL
+LISTAS = {"credenciales_validas": "valida", "credenciales_invalidas": "invalida"}
+
+
+def is_jsonl_path(path):
+    """True si la extensión del archivo indica formato JSON Lines"""
+    return str(path).lower().endswith(JSONL_EXTENSIONS)
+
+
+class CredentialJsonlWriter:
+    """
+    Escritor incremental de credenciales en JSON Lines
+
+    Uso:
+        with CredentialJsonlWriter("data/generated/credenciales.jsonl", metadata) as writer:
+            for credencial in credenciales:
+                writer.write(credencial, "invalida")
+    """
+
+    def __init__(self, path, metadata=None, flush_every=1000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.temporal = self.path.with_name(self.path.name + ".tmp")
+        self.metadata = metadata or {}
+        self.flush_every = int(flush_every)
+        self.totales = {"validas": 0, "invalidas": 0}
+        self.metadata_final = None
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.temporal, 'w', encoding='utf-8', newline='\n')
+        self._write_record({"_registro": "cabecera", "metadata": self.metadata})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Un error a mitad de escritura no debe dejar un archivo parcial visible
+            self._file.close()
+            self.temporal.unlink(missing_ok=True)
+        return False
+
+    def _write_record(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+
+    def write(self, credential, tipo="invalida"):
+        """
+        Escribe una credencial
+
+        Args:
+            credential: Dict de la credencial
+            tipo: 'valida' o 'invalida'
+        """
+        if tipo not in ("valida", "invalida"):
+            raise ValueError(f"Tipo de credencial no válido: {tipo}")
+        self._write_record(dict(credential, _registro=tipo))
+        self.totales[tipo + "s"] += 1
+        if self.flush_every and sum(self.totales.values()) % self.flush_every == 0:
+            self._file.flush()
+
+    def update_metadata(self, metadata):
+        """Metadata a guardar en el cierre (reemplaza campos de la cabecera al leer)"""
+        self.metadata_final = dict(self.metadata_final or {}, **metadata)
+
+    def close(self):
+        """Escribe el cierre y publica el archivo con un renombrado atómico"""
+        totales = dict(self.totales, total=sum(self.totales.values()))
+        cierre = {"_registro": "cierre", "totales": totales, "completado_en": datetime.now().isoformat()}
+        if self.metadata_final:
+            cierre["metadata"] = self.metadata_final
+        self._write_record(cierre)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.temporal, self.path)
+        return totales
+
+
+def write_credentials_jsonl(path, credentials_data):
+    """
+    Guarda una estructura de credenciales (formato JSON clásico) como JSON Lines
+
+    Returns:
+        dict: Totales escritos
+    """
+    with CredentialJsonlWriter(path, credentials_data.get("metadata", {})) as writer:
+        for lista, tipo in LISTAS.items():
+            for credential in credentials_data.get(lista) or []:
+                writer.write(credential, tipo)
+    return dict(writer.totales, total=sum(writer.totales.values()))
+
+
+def iter_records(path):
+    """
+    Recorre las credenciales de un archivo JSON Lines con su tipo, en una pasada
+
+    Yields:
+        tuple: ('valida' o 'invalida', credencial sin el campo _registro)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for numero, linea in enumerate(f, 1):
+            if not linea.strip():
+                continue
+            try:
+                record = json.loads(linea)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Línea {numero} inválida en {path}: {e}") from e
+            registro = record.pop("_registro", None)
+            if registro in ("valida", "invalida"):
+                yield registro, record
+
+
+def iter_credentials(path, tipo=None):
+    """
+    Recorre las credenciales de un archivo JSON Lines sin cargarlo completo
+
+    Args:
+        path: Archivo .jsonl
+        tipo: 'valida', 'invalida' o None para ambas
+
+    Yields:
+        dict: Credencial sin el campo _registro
+    """
+    for registro, record in iter_records(path):
+        if tipo is None or registro == tipo:
+            yield record
+
+
+def take_credentials(path, tipo=None, cantidad=None):
+    """Primeras `cantidad` credenciales del archivo (todas si es None)"""
+    return list(islice(iter_credentials(path, tipo), cantidad))
+
+
+def read_jsonl_metadata(path):
+    """
+    Metadata (cabecera más la del cierre) y totales de cierre sin recorrer el archivo
+
+    Returns:
+        dict: {"metadata": {...}, "totales": {...} o None si falta el cierre}
+    """
+    with open(path, 'rb') as f:
+        cabecera = json.loads(f.readline().decode("utf-8"))
+        # El cierre es la última línea: leer solo el final del archivo, ampliando hasta tenerla completa
+        f.seek(0, os.SEEK_END)
+        tamano = f.tell()
+        bloque = 4096
+        while True:
+            f.seek(max(0, tamano - bloque))
+            final = f.read().rstrip(b"\n")
+            if b"\n" in final or bloque >= tamano:
+                break
+            bloque *= 4
+        ultima = final.rsplit(b"\n", 1)[-1].decode("utf-8", errors="ignore")
+
+    cierre = None
+    try:
+        cierre = json.loads(ultima)
+    except json.JSONDecodeError:
+        pass
+    if not (isinstance(cierre, dict) and cierre.get("_registro") == "cierre"):
+        cierre = {}
+    metadata = dict(cabecera.get("metadata", {}), **(cierre.get("metadata") or {}))
+    return {"metadata": metadata, "totales": cierre.get("totales")}
+
+
+def load_credentials_file(path):
+    """
+    Carga un archivo de credenciales en formato JSON clásico o JSON Lines
+
+    Returns:
+        dict: Estructura con metadata, credenciales_validas y credenciales_invalidas
+    """
+    if not is_jsonl_path(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    data = {"metadata": read_jsonl_metadata(path)["metadata"]}
+    data.update({lista: [] for lista in LISTAS})
+    listas = {tipo: data[lista] for lista, tipo in LISTAS.items()}
+    for tipo, credential in iter_records(path):
+        listas[tipo].append(credential)
+    return data
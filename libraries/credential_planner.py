@@ -0,0 +1,204 @@
+"""
+Planificador de distribución de credenciales por cuotas
+Reparte el total solicitado en cuotas exactas de válidas e inválidas por
+categoría antes de generar nada (método de restos mayores), de modo que la
+cantidad exacta no dependa de rellenos ni recortes posteriores. Cada cuota se
+llena desde las fuentes más baratas primero y se informa lo planificado frente
+a lo logrado.
+"""
+from collections import Counter
+
+# Categorías de credenciales inválidas y el error que produce cada una
+ERROR_POR_CATEGORIA = {
+    "campos_vacios": "required_fields",
+    "caracteres_especiales": "invalid_credentials",
+    "formato_invalido": "invalid_credentials",
+    "inexistente": "invalid_credentials",
+}
+
+DEFAULT_CATEGORY_RATIOS = {categoria: 1.0 for categoria in ERROR_POR_CATEGORIA}
+
+
+def largest_remainder(total, ratios):
+    """
+    Reparte `total` en enteros proporcionales a `ratios` que suman exactamente `total`
+
+    Args:
+        total: Cantidad a repartir
+        ratios: Dict {clave: peso} con pesos no negativos
+
+    Returns:
+        dict: {clave: cuota}
+    """
+    ratios = {clave: float(peso) for clave, peso in ratios.items() if float(peso) > 0}
+    if total <= 0 or not ratios:
+        return {clave: 0 for clave in ratios}
+
+    suma = sum(ratios.values())
+    exactas = {clave: total * peso / suma for clave, peso in ratios.items()}
+    cuotas = {clave: int(valor) for clave, valor in exactas.items()}
+    restantes = total - sum(cuotas.values())
+    # Desempate estable: mayor resto primero, luego el orden de declaración
+    orden = sorted(exactas, key=lambda clave: exactas[clave] - cuotas[clave], reverse=True)
+    for clave in orden[:restantes]:
+        cuotas[clave] += 1
+    return cuotas
+
+
+def parse_ratios(texto):
+    """
+    Convierte 'campos_vacios=2,inexistente=1' en {'campos_vacios': 2.0, 'inexistente': 1.0}
+
+    Raises:
+        ValueError: Si una categoría no existe o un peso no es numérico
+    """
+    ratios = {}
+    for parte in filter(None, (p.strip() for p in str(texto).split(","))):
+        categoria, _, peso = parte.partition("=")
+        categoria = categoria.strip()
+        if categoria not in ERROR_POR_CATEGORIA:
+            raise ValueError(f"Categoría desconocida: {categoria}. Opciones: {', '.join(ERROR_POR_CATEGORIA)}")
+        ratios[categoria] = float(peso) if peso.strip() else 1.0
+    return ratios
+
+
+def plan_distribution(total, valid_ratio=1 / 3, category_ratios=None):
+    """
+    Planifica cuotas exactas de válidas e inválidas por categoría
+
+    Args:
+        total: Credenciales solicitadas
+        valid_ratio: Proporción de credenciales válidas (0 a 1)
+        category_ratios: Pesos por categoría de inválidas. Por defecto partes iguales
+
+    Returns:
+        dict: {"total", "validas", "invalidas", "categorias": {categoria: cuota},
+               "error_esperado": {error: cuota}}
+    """
+    total = max(0, int(total))
+    valid_ratio = min(1.0, max(0.0, float(valid_ratio)))
+    tipos = largest_remainder(total, {"validas": valid_ratio, "invalidas": 1 - valid_ratio})
+    validas, invalidas = tipos.get("validas", 0), tipos.get("invalidas", 0)
+
+    categorias = largest_remainder(invalidas, category_ratios or DEFAULT_CATEGORY_RATIOS)
+    errores = Counter()
+    for categoria, cuota in categorias.items():
+        errores[ERROR_POR_CATEGORIA[categoria]] += cuota
+
+    return {
+        "total": total,
+        "validas": validas,
+        "invalidas": invalidas,
+        "categorias": categorias,
+        "error_esperado": dict(errores),
+    }
+
+
+def plan_ai_budget(categorias, share):
+    """
+    Reparte el presupuesto de IA entre las cuotas de inválidas
+
+    El presupuesto se calcula sobre el total de inválidas (no por categoría, donde
+    las cuotas pequeñas redondearían a 0) y se reparte con restos mayores. Con
+    una fracción positiva se pide al menos una credencial.
+
+    Args:
+        categorias: Dict {categoría: cuota}
+        share: Fracción de las inválidas pedida a la IA (0 a 1)
+
+    Returns:
+        dict: {categoría: credenciales a pedir}, nunca más que la cuota
+    """
+    share = min(1.0, max(0.0, float(share)))
+    total = sum(categorias.values())
+    if total <= 0 or share <= 0:
+        return {categoria: 0 for categoria in categorias}
+    presupuesto = largest_remainder(max(1, int(round(total * share))), categorias)
+    return {categoria: presupuesto.get(categoria, 0) for categoria in categorias}
+
+
+class DistributionTally:
+    """Distribución lograda acumulada credencial a credencial, sin guardar las credenciales"""
+
+    def __init__(self):
+        self.validas = 0
+        self.categorias = Counter()
+        self.errores = Counter()
+
+    def add(self, credencial, tipo="invalida"):
+        """Cuenta una credencial ('valida' o 'invalida')"""
+        if tipo == "valida":
+            self.validas += 1
+            return
+        self.categorias[credencial.get("categoria", "sin_categoria")] += 1
+        self.errores[credencial.get("error_esperado", "sin_error")] += 1
+
+    def as_dict(self):
+        """Distribución en el mismo formato del plan"""
+        invalidas = sum(self.categorias.values())
+        return {
+            "total": self.validas + invalidas,
+            "validas": self.validas,
+            "invalidas": invalidas,
+            "categorias": dict(self.categorias),
+            "error_esperado": dict(self.errores),
+        }
+
+
+def achieved_distribution(validas, invalidas):
+    """Distribución real de una lista de válidas e inválidas, en el mismo formato del plan"""
+    tally = DistributionTally()
+    tally.validas = len(validas)
+    for credencial in invalidas:
+        tally.add(credencial)
+    return tally.as_dict()
+
+
+def fill_quota(cuota, fuentes, vistos=None, sink=None):
+    """
+    Llena una cuota desde fuentes ordenadas de la más barata a la más cara
+
+    Args:
+        cuota: Credenciales necesarias
+        fuentes: Lista de (nombre, función(cantidad) -> lista, máximo o None)
+        vistos: Set de (usuario, clave) ya usados, para no repetir entre cuotas
+        sink: Función(credencial) que recibe cada aceptada en lugar de acumularla
+
+    Returns:
+        tuple: (credenciales (vacía con sink), {fuente: cantidad aportada})
+    """
+    vistos = vistos if vistos is not None else set()
+    resultado, aportes = [], {}
+    aceptadas = 0
+
+    for nombre, fuente, maximo in fuentes:
+        faltantes = cuota - aceptadas
+        if faltantes <= 0:
+            break
+        pedir = faltantes if maximo is None else min(faltantes, int(maximo))
+        if pedir <= 0:
+            continue
+        try:
+            candidatas = fuente(pedir) or []
+        except Exception as e:
+            print(f"⚠️ Fuente '{nombre}' no disponible: {e}")
+            continue
+
+        aportadas = 0
+        for credencial in candidatas:
+            clave = (credencial.get("usuario"), credencial.get("clave"))
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            if sink:
+                sink(credencial)
+            else:
+                resultado.append(credencial)
+            aportadas += 1
+            aceptadas += 1
+            if aportadas >= pedir:
+                break
+        if aportadas:
+            aportes[nombre] = aportes.get(nombre, 0) + aportadas
+
+    return resultado, aportes
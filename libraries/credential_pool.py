@@ -0,0 +1,230 @@
+"""
+Pool persistente de credenciales inválidas pre-generadas
+Las pruebas toman credenciales por categoría desde un archivo JSON compartido
+(protegido por FileLock) en lugar de pagar una generación completa con IA.
+Cuando una categoría baja de la marca mínima se rellena en un hilo de fondo
+con la función generadora (IA o fallback) sin bloquear a la prueba.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+
+from libraries.file_lock import FileLock
+
+DEFAULT_POOL_FILE = Path(__file__).parent.parent / "data" / "pools" / "credenciales_invalidas.json"
+
+CATEGORIAS = ["campos_vacios", "caracteres_especiales", "formato_invalido", "inexistente"]
+
+
+class CredentialPool:
+    """Pool de credenciales inválidas por categoría con relleno en segundo plano"""
+
+    def __init__(self, generator, pool_file=None, categories=None, low_watermark=3,
+                 target_size=10, refill_timeout=300, refill_cooldown=60):
+        """
+        Inicializa el pool
+
+        Args:
+            generator: Función (cantidad) -> lista de credenciales con campo 'categoria'
+            pool_file: Archivo JSON del pool. Por defecto data/pools/credenciales_invalidas.json
+            categories: Categorías mantenidas en el pool
+            low_watermark: Tamaño por categoría que dispara el relleno
+            target_size: Tamaño por categoría al que se rellena
+            refill_timeout: Segundos tras los que un relleno de otro proceso se considera abandonado
+            refill_cooldown: Segundos mínimos entre rellenos mientras ninguna categoría esté vacía
+        """
+        self.generator = generator
+        self.pool_file = Path(pool_file) if pool_file else DEFAULT_POOL_FILE
+        self.pool_file.parent.mkdir(parents=True, exist_ok=True)
+        self.categories = list(categories or CATEGORIAS)
+        self.low_watermark = int(low_watermark)
+        self.target_size = max(int(target_size), self.low_watermark + 1)
+        self.refill_timeout = float(refill_timeout)
+        self.refill_cooldown = float(refill_cooldown)
+
+        self._lock = FileLock(str(self.pool_file) + ".lock", timeout=30)
+        self._refill_thread = None
+        self._thread_lock = threading.Lock()
+        self._stats = {"entregadas": 0, "vacias": 0, "rellenos": 0, "agregadas": 0}
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def _read(self):
+        if not self.pool_file.exists():
+            return {"categorias": {}}
+        try:
+            with open(self.pool_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Pool de credenciales ilegible, se reinicia: {e}")
+            return {"categorias": {}}
+
+    def _write(self, data):
+        data["actualizado"] = time.time()
+        temporal = self.pool_file.with_suffix(".tmp")
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(temporal, self.pool_file)
+
+    # ------------------------------------------------------------------
+    # Consumo
+    # ------------------------------------------------------------------
+
+    def take(self, categoria=None):
+        """
+        Toma una credencial del pool (la elimina del archivo)
+
+        Args:
+            categoria: Categoría deseada. Sin categoría se toma de la más abundante
+
+        Returns:
+            dict o None si la categoría está vacía
+        """
+        with self._lock:
+            data = self._read()
+            pool = data.setdefault("categorias", {})
+            if categoria is None:
+                categoria = max(self.categories, key=lambda c: len(pool.get(c, [])))
+            disponibles = pool.get(categoria, [])
+            credencial = disponibles.pop(0) if disponibles else None
+            if credencial is not None:
+                self._write(data)
+            necesita_relleno = any(len(pool.get(c, [])) < self.low_watermark for c in self.categories)
+
+        self._stats["entregadas" if credencial is not None else "vacias"] += 1
+        if necesita_relleno:
+            self.refill_async()
+        return credencial
+
+    def peek(self, categoria, cantidad):
+        """Lee hasta `cantidad` credenciales de una categoría sin consumirlas"""
+        with self._lock:
+            pool = self._read().get("categorias", {})
+        return [dict(credencial) for credencial in pool.get(categoria, [])[:int(cantidad)]]
+
+    def sizes(self):
+        """Credenciales disponibles por categoría"""
+        with self._lock:
+            pool = self._read().get("categorias", {})
+        return {categoria: len(pool.get(categoria, [])) for categoria in self.categories}
+
+    # ------------------------------------------------------------------
+    # Relleno
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _refill_in_progress(data, now):
+        """
+        True si otro relleno sigue en curso
+
+        La marca guarda el proceso que la tomó: si el hilo daemon murió con su
+        proceso sin liberarla, en esta máquina se descarta de inmediato (como los
+        arriendos de credential_leases). En otras máquinas o en Windows decide
+        refill_timeout.
+        """
+        if data.get("rellenando_hasta", 0) <= now:
+            return False
+        titular = data.get("rellenando_por") or {}
+        if os.name == "posix" and titular.get("host") == socket.gethostname():
+            try:
+                os.kill(titular.get("pid", 0), 0)
+            except ProcessLookupError:
+                return False
+            except OSError:
+                pass
+        return True
+
+    def _claim_refill(self, force=False):
+        """Marca el relleno como en curso para que otros procesos no generen a la vez"""
+        with self._lock:
+            data = self._read()
+            now = time.time()
+            if self._refill_in_progress(data, now):
+                return None
+            pool = data.get("categorias", {})
+            # El generador puede no producir alguna categoría: no insistir en cada toma
+            alguna_vacia = any(not pool.get(c) for c in self.categories)
+            if not force and not alguna_vacia and now - data.get("ultimo_relleno", 0) < self.refill_cooldown:
+                return None
+            faltantes = {c: self.target_size - len(pool.get(c, [])) for c in self.categories}
+            faltantes = {c: n for c, n in faltantes.items() if n > 0}
+            if not faltantes or not force and all(len(pool.get(c, [])) >= self.low_watermark for c in self.categories):
+                return None
+            data["rellenando_hasta"] = now + self.refill_timeout
+            data["rellenando_por"] = {"host": socket.gethostname(), "pid": os.getpid()}
+            self._write(data)
+            return faltantes
+
+    def _merge(self, nuevas):
+        """Agrega credenciales nuevas sin duplicados y libera la marca de relleno"""
+        agregadas = 0
+        with self._lock:
+            data = self._read()
+            pool = data.setdefault("categorias", {})
+            for credencial in nuevas:
+                categoria = credencial.get("categoria")
+                if categoria not in self.categories:
+                    continue
+                existentes = pool.setdefault(categoria, [])
+                clave = (credencial.get("usuario"), credencial.get("clave"))
+                if len(existentes) >= self.target_size or any(
+                        (c.get("usuario"), c.get("clave")) == clave for c in existentes):
+                    continue
+                existentes.append(credencial)
+                agregadas += 1
+            data.pop("rellenando_hasta", None)
+            data.pop("rellenando_por", None)
+            data["ultimo_relleno"] = time.time()
+            self._write(data)
+        return agregadas
+
+    def refill(self, force=False):
+        """
+        Rellena de forma síncrona las categorías por debajo de la marca mínima
+
+        Args:
+            force: Rellenar hasta target_size aunque ninguna categoría esté bajo la marca
+
+        Returns:
+            int: Credenciales agregadas
+        """
+        faltantes = self._claim_refill(force)
+        if not faltantes:
+            return 0
+
+        nuevas = []
+        try:
+            nuevas = self.generator(sum(faltantes.values())) or []
+        except Exception as e:
+            print(f"⚠️ Error generando credenciales para el pool: {e}")
+        finally:
+            agregadas = self._merge(nuevas)
+
+        self._stats["rellenos"] += 1
+        self._stats["agregadas"] += agregadas
+        print(f"♻️ Pool de credenciales rellenado: +{agregadas} ({self.sizes()})")
+        return agregadas
+
+    def refill_async(self):
+        """Lanza el relleno en un hilo de fondo si no hay uno en curso"""
+        with self._thread_lock:
+            if self._refill_thread and self._refill_thread.is_alive():
+                return False
+            self._refill_thread = threading.Thread(target=self.refill, daemon=True, name="credential-pool-refill")
+            self._refill_thread.start()
+            return True
+
+    def wait_for_refill(self, timeout=None):
+        """Espera a que termine el relleno en curso de este proceso"""
+        thread = self._refill_thread
+        if thread:
+            thread.join(timeout)
+        return not (thread and thread.is_alive())
+
+    def stats(self):
+        return dict(self._stats, disponibles=self.sizes(), archivo=str(self.pool_file))
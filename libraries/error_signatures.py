@@ -0,0 +1,70 @@
+"""
+Normalización de mensajes de error y agrupación por firma
+Permite analizar con IA un único representante por grupo de fallos idénticos
+(mismo mensaje salvo timestamps, ids de elementos, números o ids de sesión)
+y reutilizar el resultado en todos los tests del grupo.
+"""
+import hashlib
+import re
+
+# Orden relevante: primero los patrones más específicos
+_PATRONES_NORMALIZACION = [
+    # Timestamps ISO / Robot Framework: 2025-07-09T22:27:21.198579, 20250709 22:27:21.198
+    (re.compile(r"\b\d{4}-?\d{2}-?\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"), "<ts>"),
+    # Horas sueltas: 22:27:21.198
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<ts>"),
+    # GUIDs como el id del ELEMENTO_CONFIRMACION_LOGIN
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<id>"),
+    # Ids de sesión de WebDriver y similares: session id: 4f7c..., sessionId=abc123
+    (re.compile(r"(session[\s_-]?id\s*[:=]?\s*)[\w.-]+", re.IGNORECASE), r"\1<sesion>"),
+    # Cadenas hexadecimales largas (hashes, ids de elementos de Selenium)
+    (re.compile(r"\b[0-9a-fA-F]{16,}\b"), "<hex>"),
+    # Direcciones de memoria: 0x7f3a2c
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<hex>"),
+    # Números (incluye duraciones como 20s o 1.5 seconds)
+    (re.compile(r"\d+(?:[.,]\d+)?"), "<n>"),
+]
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_error(mensaje):
+    """
+    Normaliza un mensaje de error eliminando los datos variables entre ejecuciones
+
+    Args:
+        mensaje: Mensaje de error original
+
+    Returns:
+        str: Mensaje normalizado
+    """
+    if not mensaje:
+        return ""
+
+    texto = str(mensaje)
+    for patron, reemplazo in _PATRONES_NORMALIZACION:
+        texto = patron.sub(reemplazo, texto)
+
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+def firma_error(mensaje):
+    """Firma corta (SHA-1) del mensaje normalizado"""
+    return hashlib.sha1(normalizar_error(mensaje).encode("utf-8")).hexdigest()[:16]
+
+
+def agrupar_por_firma(elementos, mensaje=lambda elemento: elemento):
+    """
+    Agrupa elementos por la firma de su mensaje de error, conservando el orden de aparición
+
+    Args:
+        elementos: Iterable de elementos (tests, tuplas, dicts...)
+        mensaje: Función que obtiene el mensaje de error de cada elemento
+
+    Returns:
+        dict: firma -> lista de elementos; el primero de cada lista es el representante
+    """
+    grupos = {}
+    for elemento in elementos:
+        grupos.setdefault(firma_error(mensaje(elemento)), []).append(elemento)
+    return grupos
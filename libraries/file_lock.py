@@ -0,0 +1,168 @@
+"""
+Bloqueo entre procesos basado en archivo
+Usa fcntl en Linux/macOS y msvcrt en Windows sobre un archivo .lock dedicado,
+de modo que varios procesos (robot, pabot, scripts PowerShell) puedan
+escribir de forma segura en los mismos archivos de datos.
+Incluye process_alive para que los dueños de marcas y arriendos se
+comprueben también en Windows.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+    _FCNTL = True
+except ImportError:
+    import msvcrt
+    _FCNTL = False
+
+
+class FileLockTimeout(TimeoutError):
+    """No se pudo obtener el bloqueo en el tiempo indicado"""
+
+
+class FileLock:
+    """
+    Bloqueo exclusivo entre procesos y entre hilos del mismo proceso
+
+    Uso:
+        with FileLock("data/metrics/metricas.jsonl.lock", timeout=10):
+            ...
+    """
+
+    def __init__(self, lock_path, timeout=10.0, poll_interval=0.05):
+        self.lock_path = Path(lock_path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._fd = None
+        self._depth = 0
+
+    def acquire(self):
+        """Obtiene el bloqueo o lanza FileLockTimeout"""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        if not self._thread_lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise FileLockTimeout(f"Timeout esperando bloqueo de {self.lock_path}")
+
+        # Reentrante dentro del mismo hilo
+        if self._depth:
+            self._depth += 1
+            return self
+
+        try:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+            while True:
+                try:
+                    self._lock_fd(fd)
+                    break
+                except OSError:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        os.close(fd)
+                        raise FileLockTimeout(f"Timeout esperando bloqueo de {self.lock_path}")
+                    time.sleep(self.poll_interval)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+        self._fd = fd
+        self._depth = 1
+        return self
+
+    def release(self):
+        """Libera el bloqueo"""
+        if not self._depth:
+            return
+        self._depth -= 1
+        if not self._depth:
+            try:
+                self._unlock_fd(self._fd)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    @staticmethod
+    def _lock_fd(fd):
+        if _FCNTL:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+    @staticmethod
+    def _unlock_fd(fd):
+        if _FCNTL:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+# Constantes de la API de Windows para process_alive
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_STILL_ACTIVE = 259
+_ERROR_ACCESS_DENIED = 5
+
+
+def process_alive(pid):
+    """
+    Comprueba si un proceso de esta máquina sigue vivo
+
+    En Linux/macOS usa os.kill(pid, 0); en Windows OpenProcess y
+    GetExitCodeProcess, porque allí os.kill terminaría el proceso.
+
+    Returns:
+        bool o None: None si no se puede determinar
+    """
+    try:
+        pid = int(pid)
+    except (TypeError, ValueError):
+        return False
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        return _windows_process_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Sin permiso para señalarlo: existe, pero es de otro usuario
+        return True
+    return True
+
+
+def _windows_process_alive(pid):
+    try:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    except (ImportError, OSError, AttributeError):
+        return None
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    kernel32.GetExitCodeProcess.restype = wintypes.BOOL
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Acceso denegado: existe, pero es de otro usuario
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+    try:
+        codigo = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(codigo)):
+            return None
+        return codigo.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
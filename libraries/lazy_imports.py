@@ -0,0 +1,40 @@
+"""
+Importación diferida de dependencias pesadas
+Los SDK de proveedores de IA (y NumPy) tardan cientos de milisegundos en
+importarse. Robot Framework importa las librerías y el listener en cada
+suite aunque ninguna keyword use IA, así que solo se comprueba que estén
+instalados al importar y el import real se hace en el primer uso.
+"""
+import importlib
+import importlib.util
+import threading
+
+_modules = {}
+_lock = threading.Lock()
+
+
+def module_available(name):
+    """True si el módulo está instalado, sin importarlo"""
+    if name in _modules:
+        return _modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # find_spec importa los paquetes padre: si falta 'google' no hay 'google.generativeai'
+        return False
+
+
+def load_module(name):
+    """
+    Importa el módulo en el primer uso y lo reutiliza
+
+    Returns:
+        module o None si no está instalado
+    """
+    with _lock:
+        if name not in _modules:
+            try:
+                _modules[name] = importlib.import_module(name)
+            except ImportError:
+                _modules[name] = None
+        return _modules[name]
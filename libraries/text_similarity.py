@@ -0,0 +1,207 @@
+"""
+Motor local de similitud de textos
+Vectores de n-gramas de caracteres con hashing (sin vocabulario que entrenar)
+y similitud coseno. Un texto se vectoriza una sola vez (cache LRU) y las
+comparaciones uno-contra-muchos y muchos-contra-muchos se resuelven con un
+único producto de matrices en NumPy, o con vectores dispersos en Python puro
+si NumPy no está instalado. Los resultados son deterministas entre procesos.
+"""
+import math
+import re
+import threading
+import unicodedata
+import zlib
+from collections import Counter, OrderedDict
+
+from libraries.lazy_imports import module_available, load_module
+
+# NumPy se importa al crear el primer motor, no al importar el módulo
+NUMPY_AVAILABLE = module_available("numpy")
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(text):
+    """Minúsculas, sin tildes ni puntuación y con espacios colapsados"""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _NO_ALFANUMERICO.sub(" ", text).strip()
+
+
+class SimilarityEngine:
+    """Similitud coseno sobre n-gramas de caracteres con hashing"""
+
+    _MAX_NGRAMAS = 200000
+
+    def __init__(self, ngram_range=(2, 4), dimension=4096, cache_size=20000, use_numpy=None):
+        """
+        Args:
+            ngram_range: Longitudes mínima y máxima de los n-gramas (por palabra, con bordes)
+            dimension: Columnas del vector; potencia de 2
+            cache_size: Textos vectorizados que se conservan (LRU)
+            use_numpy: Forzar (True/False) el uso de NumPy. Por defecto si está instalado
+        """
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.dimension = 1 << max(4, int(dimension - 1).bit_length())
+        self.cache_size = int(cache_size)
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else bool(use_numpy) and NUMPY_AVAILABLE
+        self._np = load_module("numpy") if self.use_numpy else None
+        self.use_numpy = self._np is not None
+
+        # n-grama -> (columna, signo): el "vocabulario" se arma bajo demanda y se reutiliza
+        self._columnas = {}
+        self._vectores = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"vectorizados": 0, "aciertos_cache": 0, "comparaciones": 0}
+
+    # ------------------------------------------------------------------
+    # Vectorización
+    # ------------------------------------------------------------------
+
+    def _ngrams(self, normalized):
+        minimo, maximo = self.ngram_range
+        for palabra in normalized.split():
+            palabra = f" {palabra} "
+            for n in range(minimo, maximo + 1):
+                for i in range(len(palabra) - n + 1):
+                    yield palabra[i:i + n]
+
+    def _columna(self, ngram):
+        columna = self._columnas.get(ngram)
+        if columna is None:
+            h = zlib.crc32(ngram.encode("utf-8"))
+            # El signo compensa las colisiones: en promedio se cancelan en el producto punto
+            columna = (h & (self.dimension - 1), 1.0 if h & 0x80000000 else -1.0)
+            if len(self._columnas) >= self._MAX_NGRAMAS:
+                self._columnas.clear()
+            self._columnas[ngram] = columna
+        return columna
+
+    def vector(self, text):
+        """
+        Vector disperso normalizado (L2) de un texto
+
+        Returns:
+            dict: {columna: peso}
+        """
+        normalized = normalize_text(text)
+        with self._lock:
+            cached = self._vectores.get(normalized)
+            if cached is not None:
+                self._vectores.move_to_end(normalized)
+                self._stats["aciertos_cache"] += 1
+                return cached
+
+            pesos = {}
+            for ngram, tf in Counter(self._ngrams(normalized)).items():
+                columna, signo = self._columna(ngram)
+                pesos[columna] = pesos.get(columna, 0.0) + signo * (1.0 + math.log(tf))
+            norma = math.sqrt(sum(peso * peso for peso in pesos.values()))
+            vector = {columna: peso / norma for columna, peso in pesos.items() if peso} if norma else {}
+
+            self._vectores[normalized] = vector
+            self._stats["vectorizados"] += 1
+            if len(self._vectores) > self.cache_size:
+                self._vectores.popitem(last=False)
+            return vector
+
+    def matrix(self, texts):
+        """Matriz densa (len(texts) x dimension) de NumPy con una fila por texto"""
+        np = self._np
+        vectores = [self.vector(text) for text in texts]
+        matriz = np.zeros((len(vectores), self.dimension), dtype=np.float32)
+        filas = np.repeat(np.arange(len(vectores)), [len(v) for v in vectores])
+        columnas = np.fromiter((c for v in vectores for c in v), dtype=np.int64, count=len(filas))
+        valores = np.fromiter((p for v in vectores for p in v.values()), dtype=np.float32, count=len(filas))
+        matriz[filas, columnas] = valores
+        return matriz
+
+    # ------------------------------------------------------------------
+    # Comparación
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _dot(a, b):
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(peso * b.get(columna, 0.0) for columna, peso in a.items())
+
+    @staticmethod
+    def _clamp(score):
+        return min(1.0, max(0.0, float(score)))
+
+    def similarity(self, text1, text2):
+        """Similitud entre 0.0 y 1.0 de dos textos"""
+        self._stats["comparaciones"] += 1
+        return round(self._clamp(self._dot(self.vector(text1), self.vector(text2))), 4)
+
+    def many_to_many(self, texts, references):
+        """
+        Similitud de cada texto contra cada referencia
+
+        Returns:
+            list: Matriz len(texts) x len(references) como listas de floats
+        """
+        texts, references = list(texts), list(references)
+        self._stats["comparaciones"] += len(texts) * len(references)
+        if not texts or not references:
+            return [[] for _ in texts]
+        if self.use_numpy:
+            np = self._np
+            scores = np.clip(self.matrix(texts) @ self.matrix(references).T, 0.0, 1.0)
+            return np.round(scores.astype(np.float64), 4).tolist()
+
+        # Sin NumPy: índice invertido columna -> referencias, solo se recorren columnas compartidas
+        invertido = {}
+        for indice, reference in enumerate(references):
+            for columna, peso in self.vector(reference).items():
+                invertido.setdefault(columna, []).append((indice, peso))
+        matriz = []
+        for text in texts:
+            fila = [0.0] * len(references)
+            for columna, peso in self.vector(text).items():
+                for indice, peso_referencia in invertido.get(columna, ()):
+                    fila[indice] += peso * peso_referencia
+            matriz.append([round(self._clamp(score), 4) for score in fila])
+        return matriz
+
+    def one_to_many(self, text, references):
+        """Similitud de un texto contra cada referencia"""
+        return self.many_to_many([text], references)[0]
+
+    def pairwise(self, texts, references):
+        """
+        Similitud de texts[i] contra references[i]
+
+        Raises:
+            ValueError: Si las listas no tienen el mismo largo
+        """
+        texts, references = list(texts), list(references)
+        if len(texts) != len(references):
+            raise ValueError(f"Comparación por pares con largos distintos: {len(texts)} y {len(references)}")
+        self._stats["comparaciones"] += len(texts)
+        if not texts:
+            return []
+        if self.use_numpy:
+            np = self._np
+            scores = np.clip((self.matrix(texts) * self.matrix(references)).sum(axis=1), 0.0, 1.0)
+            return np.round(scores.astype(np.float64), 4).tolist()
+        return [round(self._clamp(self._dot(self.vector(a), self.vector(b))), 4) for a, b in zip(texts, references)]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, motor="numpy" if self.use_numpy else "python", dimension=self.dimension,
+                        textos_en_cache=len(self._vectores), ngramas_conocidos=len(self._columnas))
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_similarity_engine(**overrides):
+    """Motor compartido por el proceso (conserva el cache de vectores entre keywords)"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SimilarityEngine(**overrides)
+        return _engine
@@ -1,16 +1,23 @@
 ﻿# listeners/robot_ai_listener_gemini.py
 import os
 import json
+import sys
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 
-# ImportaciÃ³n condicional de Gemini AI
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+# Robot Framework importa el listener por ruta: la raiz del repo en el path habilita libraries.*
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from libraries.ai_clients import get_gemini_model
+from libraries.ai_hedging import hedged_call
+from libraries.error_signatures import firma_error
+from libraries.lazy_imports import module_available
+
+# El SDK solo se importa cuando hay un fallo que analizar
+GEMINI_AVAILABLE = module_available("google.generativeai")
 
 class RobotAIListenerGemini:
     """
@@ -23,18 +30,36 @@ class RobotAIListenerGemini:
     
     ROBOT_LISTENER_API_VERSION = 2
     
-    def __init__(self, model="gemini-1.5-flash"):
+    def __init__(self, model="gemini-1.5-flash", max_workers=2, drain_timeout=120, max_pending=50):
         """
         Inicializa el listener con la configuraciÃ³n bÃ¡sica.
         
         Args:
             model (str): Modelo de Gemini a utilizar. Por defecto es gemini-pro.
+            max_workers: Hilos que analizan fallos en segundo plano
+            drain_timeout: Segundos maximos que close/end_suite esperan los analisis pendientes
+            max_pending: Analisis encolados como maximo; por encima se usa el analisis basico
+
+        Uso: robot --listener listeners/robot_ai_listener_gemini.py:gemini-1.5-flash:4:60 tests/
         """
         self.model_name = model
         self.model = None
         self.current_test = None
         self.errors = {}
         self.api_key = None
+
+        # Analisis en segundo plano: la suite sigue ejecutandose mientras Gemini responde
+        self.max_workers = max(1, int(max_workers))
+        self.drain_timeout = float(drain_timeout)
+        self._executor = None
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, int(max_pending)))
+        self._print_lock = threading.Lock()
+        self._model_lock = threading.Lock()
+
+        # firma de error -> {firma, representante, miembros, analisis}
+        self._clusters = {}
         
         self._initialize_gemini()
         print(f"\nðŸ¤– Gemini AI Listener inicializado - Analizando errores con {model}")
@@ -54,14 +79,21 @@ class RobotAIListenerGemini:
             self.active = False
             return
         
-        try:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(self.model_name)
-            self.active = True
-            print(f"âœ… Gemini AI configurado correctamente con modelo: {self.model_name}")
-        except Exception as e:
-            print(f"âŒ Error configurando Gemini: {e}")
-            self.active = False
+        # El modelo se crea con el primer fallo (ver _get_model): una suite sin fallos
+        # no paga la importacion del SDK
+        self.active = True
+    
+    def _get_model(self):
+        """Pide el modelo al registro de clientes en el primer uso; desactiva el listener si falla"""
+        with self._model_lock:
+            if self.model is None and self.active:
+                try:
+                    self.model = get_gemini_model(self.model_name, self.api_key)
+                    print(f"âœ… Gemini AI configurado correctamente con modelo: {self.model_name}")
+                except Exception as e:
+                    print(f"âŒ Error configurando Gemini: {e}")
+                    self.active = False
+            return self.model
     
     def start_test(self, name, attrs):
         """Captura el inicio de un caso de prueba"""
@@ -71,17 +103,108 @@ class RobotAIListenerGemini:
     def end_test(self, name, attrs):
         """
         Maneja el final de un caso de prueba, generando anÃ¡lisis para casos fallidos.
+
+        El analisis con Gemini se encola en el pool de hilos para no bloquear
+        el inicio del siguiente caso de prueba.
         """
         if attrs['status'] != 'PASS' and self.active:
             error_message = attrs.get('message', '')
             
             print(f"\nâŒ Caso de prueba fallido: {name}")
-            print(f"ðŸ” Generando anÃ¡lisis del error con Gemini AI...")
-            
-            try:
-                analysis = self._analyze_error_with_gemini(name, error_message, attrs)
-                
-                print("\nðŸ¤– ANÃLISIS DE ERROR GEMINI AI:")
+
+            firma = firma_error(error_message)
+
+            # Un fallo con la misma firma ya fue analizado (o esta en curso): reutilizar
+            with self._pending_lock:
+                cluster = self._clusters.get(firma)
+                analysis_ready = cluster is not None and cluster['analisis'] is not None
+                if cluster is not None and not analysis_ready:
+                    cluster['miembros'].append(name)
+
+            if cluster is not None:
+                if analysis_ready:
+                    self._share_analysis(name, cluster)
+                else:
+                    print(f"Mismo error que '{cluster['representante']}': se reutilizara su analisis")
+            elif self._slots.acquire(blocking=False):
+                print(f"Analisis del error encolado para Gemini AI ({self.max_workers} hilos)")
+                with self._pending_lock:
+                    self._clusters[firma] = {'firma': firma, 'representante': name, 'miembros': [name],
+                                             'mensaje': error_message, 'analisis': None}
+                future = self._get_executor().submit(self._analyze_failure, name, error_message, dict(attrs), firma)
+                future.add_done_callback(lambda _: self._slots.release())
+                with self._pending_lock:
+                    self._clusters[firma]['futuro'] = future
+                    self._pending = [f for f in self._pending if not f.done()]
+                    self._pending.append(future)
+            else:
+                # Cola llena: no bloquear la ejecucion, usar el analisis basico inmediato
+                self._print_fallback_analysis(error_message)
+        
+        self.current_test = None
+
+    def end_suite(self, name, attrs):
+        """Espera los analisis pendientes al terminar la suite raiz"""
+        if attrs.get('id') == 's1':
+            self._drain_pending()
+
+    def close(self):
+        """Espera los analisis pendientes (con limite de tiempo) y libera el pool de hilos"""
+        self._drain_pending()
+        if self._executor:
+            # Los analisis sin iniciar ya se cancelaron en _drain_pending
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_executor(self):
+        """Crea el pool de hilos en el primer fallo"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="gemini-listener")
+        return self._executor
+
+    def _drain_pending(self):
+        """Espera los analisis en curso hasta drain_timeout; cancela los que no alcancen a iniciar"""
+        with self._pending_lock:
+            pending = [f for f in self._pending if not f.done()]
+            self._pending = []
+
+        if not pending:
+            return
+
+        print(f"\nEsperando {len(pending)} analisis de Gemini AI pendientes (maximo {self.drain_timeout:.0f}s)...")
+        _, not_done = wait(pending, timeout=self.drain_timeout)
+
+        if not_done:
+            cancelled = [f for f in not_done if f.cancel()]
+            print(f"ADVERTENCIA: {len(not_done)} analisis no terminaron a tiempo ({len(cancelled)} cancelados antes de iniciar)")
+            with self._pending_lock:
+                clusters = [c for c in self._clusters.values() if c.get('futuro') in cancelled]
+            for cluster in clusters:
+                self._share_fallback(cluster)
+
+    def _share_fallback(self, cluster):
+        """Analisis basico para un grupo cuyo analisis con Gemini se cancelo antes de iniciar"""
+        analysis = self._get_fallback_analysis(cluster['mensaje'])
+        with self._pending_lock:
+            cluster['analisis'] = analysis
+            members = cluster['miembros'][1:]
+
+        with self._print_lock:
+            print(f"\nAnalisis basico para '{cluster['representante']}' (analisis con Gemini cancelado)")
+            self._print_fallback_analysis(cluster['mensaje'])
+            self._save_analysis_to_file(cluster['representante'], analysis, cluster['firma'])
+
+        for member in members:
+            self._share_analysis(member, cluster)
+
+    def _analyze_failure(self, name, error_message, attrs, firma):
+        """Ejecuta el analisis de un fallo en un hilo del pool, lo imprime y lo comparte con su grupo"""
+        try:
+            analysis = self._analyze_error_with_gemini(name, error_message, attrs)
+
+            with self._print_lock:
+                print(f"\nðŸ¤– ANÃLISIS DE ERROR GEMINI AI: {name}")
                 print("=" * 80)
                 print(f"ðŸŽ¯ CAUSA PROBABLE: {analysis['causa_probable']}")
                 print(f"\nðŸ“Š NIVEL DE CONFIANZA: {analysis.get('confianza', 'N/A')}")
@@ -95,23 +218,41 @@ class RobotAIListenerGemini:
                 print("=" * 80)
                 
                 # Guardar anÃ¡lisis en archivo para referencia
-                self._save_analysis_to_file(name, analysis)
-                
-            except Exception as e:
+                self._save_analysis_to_file(name, analysis, firma)
+
+        except Exception as e:
+            analysis = self._get_fallback_analysis(error_message)
+            with self._print_lock:
                 print(f"âš ï¸ No se pudo generar anÃ¡lisis con Gemini AI: {e}")
                 traceback.print_exc()
-                
-                # Proporcionar anÃ¡lisis bÃ¡sico de fallback
-                fallback_analysis = self._get_fallback_analysis(error_message)
-                print("\nðŸ“‹ ANÃLISIS BÃSICO (FALLBACK):")
-                print("=" * 80)
-                print(f"ðŸ” POSIBLE CAUSA: {fallback_analysis['causa_probable']}")
-                print("\nðŸ”§ SUGERENCIAS BÃSICAS:")
-                for idx, solution in enumerate(fallback_analysis['soluciones'], 1):
-                    print(f"  {idx}. {solution}")
-                print("=" * 80)
-        
-        self.current_test = None
+                self._print_fallback_analysis(error_message)
+
+        # Repartir el resultado a los tests que fallaron con la misma firma mientras tanto
+        with self._pending_lock:
+            cluster = self._clusters[firma]
+            cluster['analisis'] = analysis
+            members = cluster['miembros'][1:]
+
+        for member in members:
+            self._share_analysis(member, cluster)
+
+    def _share_analysis(self, name, cluster):
+        """Asigna a un test el analisis ya obtenido para su firma de error"""
+        with self._print_lock:
+            print(f"\nAnalisis reutilizado para '{name}' (misma firma de error que '{cluster['representante']}')")
+            print(f"CAUSA PROBABLE: {cluster['analisis']['causa_probable']}")
+            self._save_analysis_to_file(name, cluster['analisis'], cluster['firma'])
+
+    def _print_fallback_analysis(self, error_message):
+        """Imprime el analisis basico de fallback"""
+        fallback_analysis = self._get_fallback_analysis(error_message)
+        print("\nðŸ“‹ ANÃLISIS BÃSICO (FALLBACK):")
+        print("=" * 80)
+        print(f"ðŸ” POSIBLE CAUSA: {fallback_analysis['causa_probable']}")
+        print("\nðŸ”§ SUGERENCIAS BÃSICAS:")
+        for idx, solution in enumerate(fallback_analysis['soluciones'], 1):
+            print(f"  {idx}. {solution}")
+        print("=" * 80)
     
     def _analyze_error_with_gemini(self, test_name, error_message, attrs):
         """
@@ -125,7 +266,8 @@ class RobotAIListenerGemini:
         Returns:
             dict: AnÃ¡lisis del error con causa probable y soluciones recomendadas
         """
-        if not self.active:
+        model = self._get_model() if self.active else None
+        if model is None:
             return self._get_fallback_analysis(error_message)
         
         # Preparar contexto detallado del error
@@ -173,8 +315,8 @@ class RobotAIListenerGemini:
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
+            response_text = hedged_call("gemini", lambda: model.generate_content(prompt), prompt,
+                                        keyword="analisis_fallo_listener").strip()
             
             # Limpiar respuesta si viene con markdown
             if response_text.startswith('```'):
@@ -271,7 +413,7 @@ class RobotAIListenerGemini:
             "tipo_error": "anÃ¡lisis_bÃ¡sico"
         }
     
-    def _save_analysis_to_file(self, test_name, analysis):
+    def _save_analysis_to_file(self, test_name, analysis, error_signature=None):
         """Guarda el anÃ¡lisis en un archivo para referencia posterior"""
         try:
             # Crear directorio de anÃ¡lisis si no existe
@@ -289,6 +431,7 @@ class RobotAIListenerGemini:
                 "test_name": test_name,
                 "timestamp": datetime.now().isoformat(),
                 "listener_version": "gemini-v2.0",
+                "error_signature": error_signature,
                 "analysis": analysis
             }
             
@@ -330,6 +473,10 @@ def main():
     O ejecÃºtalo desde la lÃ­nea de comandos:
     
     robot --listener ../listeners/robot_ai_listener_gemini.py test_file.robot
+
+    Argumentos opcionales (modelo:hilos:espera_maxima_segundos):
+
+    robot --listener ../listeners/robot_ai_listener_gemini.py:gemini-1.5-flash:4:60 test_file.robot
     
     CONFIGURACIÃ“N REQUERIDA:
     - Instalar: pip install google-generativeai
@@ -0,0 +1,5 @@
+"""Pruebas unitarias de las librerías: la raíz del repo en el path habilita libraries.*"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
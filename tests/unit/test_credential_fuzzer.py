@@ -0,0 +1,35 @@
+"""Pruebas de CredentialFuzzer"""
+import pytest
+
+from libraries.credential_fuzzer import CATEGORIAS, CredentialFuzzer
+
+
+def test_misma_semilla_misma_salida():
+    assert CredentialFuzzer(seed=42).generate(50) == CredentialFuzzer(seed=42).generate(50)
+
+
+def test_semillas_distintas_difieren():
+    assert CredentialFuzzer(seed=1).generate(50) != CredentialFuzzer(seed=2).generate(50)
+
+
+@pytest.mark.parametrize("cantidad", [0, 1, 7, 100])
+def test_cantidad_exacta_y_sin_repetidos(cantidad):
+    credenciales = CredentialFuzzer(seed=7).generate(cantidad)
+    assert len(credenciales) == cantidad
+    assert len({(c["usuario"], c["clave"]) for c in credenciales}) == cantidad
+
+
+def test_solo_categorias_pedidas():
+    credenciales = CredentialFuzzer(seed=3, categories=["formato_invalido"]).generate(20)
+    assert {c["categoria"] for c in credenciales} == {"formato_invalido"}
+
+
+def test_campos_completos():
+    for credencial in CredentialFuzzer(seed=5).generate(40):
+        assert set(credencial) >= {"usuario", "clave", "descripcion", "error_esperado", "categoria"}
+        assert credencial["categoria"] in CATEGORIAS
+
+
+def test_categoria_desconocida():
+    with pytest.raises(ValueError):
+        CredentialFuzzer(categories=["no_existe"])
@@ -0,0 +1,64 @@
+"""Pruebas del índice de credenciales (filtro de Bloom)"""
+from libraries.credential_index import CredentialIndex
+
+
+def credencial(n):
+    return {"usuario": f"usuario{n}", "clave": f"clave{n}"}
+
+
+def test_agregar_y_consultar(tmp_path):
+    indice = CredentialIndex(path=tmp_path / "indice.bloom", capacity=1000)
+    assert indice.add(credencial(1))
+    assert not indice.add(credencial(1))
+    assert indice.contains(credencial(1))
+    assert not indice.contains(credencial(2))
+
+
+def test_normalizacion_del_usuario(tmp_path):
+    indice = CredentialIndex(path=tmp_path / "indice.bloom", capacity=1000)
+    indice.add({"usuario": "Admin", "clave": "x"})
+    assert indice.contains({"usuario": "ADMIN", "clave": "x"})
+    assert not indice.contains({"usuario": "admin", "clave": "X"})
+    assert not indice.contains({"usuario": " admin", "clave": "x"})
+
+
+def test_filter_new_descarta_repetidas_del_lote(tmp_path):
+    indice = CredentialIndex(path=tmp_path / "indice.bloom", capacity=1000)
+    indice.add(credencial(1))
+    lote = [credencial(1), credencial(2), credencial(2), "no es dict", credencial(3)]
+    assert indice.filter_new(lote) == [credencial(2), credencial(3)]
+
+
+def test_guardar_y_recargar(tmp_path):
+    ruta = tmp_path / "indice.bloom"
+    indice = CredentialIndex(path=ruta, capacity=1000)
+    for n in range(100):
+        indice.add(credencial(n))
+    indice.save()
+
+    recargado = CredentialIndex(path=ruta, capacity=5)
+    assert (recargado.num_bits, recargado.num_hashes) == (indice.num_bits, indice.num_hashes)
+    assert all(recargado.contains(credencial(n)) for n in range(100))
+
+
+def test_guardar_fusiona_con_otro_proceso(tmp_path):
+    ruta = tmp_path / "indice.bloom"
+    primero = CredentialIndex(path=ruta, capacity=1000)
+    segundo = CredentialIndex(path=ruta, capacity=1000)
+    primero.add(credencial(1))
+    segundo.add(credencial(2))
+    primero.save()
+    segundo.save()
+
+    fusionado = CredentialIndex(path=ruta)
+    assert fusionado.contains(credencial(1))
+    assert fusionado.contains(credencial(2))
+    assert fusionado.added >= 2
+
+
+def test_archivo_danado_se_reinicia(tmp_path):
+    ruta = tmp_path / "indice.bloom"
+    ruta.write_bytes(b"basura")
+    indice = CredentialIndex(path=ruta, capacity=1000)
+    assert indice.added == 0
+    assert indice.add(credencial(1))
@@ -0,0 +1,60 @@
+"""Pruebas del formato JSON Lines de credenciales"""
+import json
+
+from libraries.credential_jsonl import (CredentialJsonlWriter, iter_credentials, load_credentials_file,
+                                        read_jsonl_metadata, take_credentials, write_credentials_jsonl)
+
+DATOS = {
+    "metadata": {"cantidad_solicitada": 3, "proveedor_ia": "gemini"},
+    "credenciales_validas": [{"usuario": "juan.reina", "clave": "1235"}],
+    "credenciales_invalidas": [{"usuario": "", "clave": "", "categoria": "campos_vacios"},
+                               {"usuario": "ñandú", "clave": "x" * 300, "categoria": "formato_invalido"}],
+}
+
+
+def test_ida_y_vuelta(tmp_path):
+    ruta = tmp_path / "credenciales.jsonl"
+    totales = write_credentials_jsonl(ruta, DATOS)
+    assert totales == {"validas": 1, "invalidas": 2, "total": 3}
+    assert load_credentials_file(ruta) == DATOS
+
+
+def test_cierre_con_totales_y_metadata_final(tmp_path):
+    ruta = tmp_path / "credenciales.jsonl"
+    with CredentialJsonlWriter(ruta, {"cantidad_solicitada": 2, "estado": "en_curso"}) as writer:
+        writer.write({"usuario": "a", "clave": "1"}, "valida")
+        writer.write({"usuario": "b", "clave": "2"}, "invalida")
+        writer.update_metadata({"estado": "completo"})
+
+    ultima = json.loads(ruta.read_text(encoding="utf-8").splitlines()[-1])
+    assert ultima["_registro"] == "cierre"
+    leida = read_jsonl_metadata(ruta)
+    assert leida["totales"] == {"validas": 1, "invalidas": 1, "total": 2}
+    assert leida["metadata"] == {"cantidad_solicitada": 2, "estado": "completo"}
+
+
+def test_cierre_mas_largo_que_el_bloque_de_lectura(tmp_path):
+    ruta = tmp_path / "credenciales.jsonl"
+    with CredentialJsonlWriter(ruta) as writer:
+        writer.write({"usuario": "a", "clave": "1"})
+        writer.update_metadata({"notas": "n" * 20000})
+    assert read_jsonl_metadata(ruta)["metadata"]["notas"] == "n" * 20000
+
+
+def test_error_no_deja_archivo_parcial(tmp_path):
+    ruta = tmp_path / "credenciales.jsonl"
+    try:
+        with CredentialJsonlWriter(ruta) as writer:
+            writer.write({"usuario": "a", "clave": "1"})
+            raise RuntimeError("fallo a mitad de escritura")
+    except RuntimeError:
+        pass
+    assert not ruta.exists()
+    assert not list(tmp_path.iterdir())
+
+
+def test_lectura_por_tipo_y_parcial(tmp_path):
+    ruta = tmp_path / "credenciales.jsonl"
+    write_credentials_jsonl(ruta, DATOS)
+    assert [c["usuario"] for c in iter_credentials(ruta, "valida")] == ["juan.reina"]
+    assert take_credentials(ruta, "invalida", 1) == DATOS["credenciales_invalidas"][:1]
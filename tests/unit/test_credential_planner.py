@@ -0,0 +1,48 @@
+"""Pruebas del planificador de cuotas"""
+import pytest
+
+from libraries.credential_planner import (fill_quota, largest_remainder, parse_ratios, plan_ai_budget,
+                                          plan_distribution)
+
+
+@pytest.mark.parametrize("total", [0, 1, 2, 5, 7, 13, 100, 1001])
+def test_plan_suma_exacta(total):
+    plan = plan_distribution(total)
+    assert plan["validas"] + plan["invalidas"] == total
+    assert sum(plan["categorias"].values()) == plan["invalidas"]
+    assert sum(plan["error_esperado"].values()) == plan["invalidas"]
+
+
+def test_restos_mayores_suma_exacta_y_proporcional():
+    cuotas = largest_remainder(10, {"a": 1, "b": 1, "c": 1})
+    assert sum(cuotas.values()) == 10
+    assert sorted(cuotas.values()) == [3, 3, 4]
+
+
+def test_pesos_por_categoria():
+    plan = plan_distribution(30, valid_ratio=0, category_ratios=parse_ratios("campos_vacios=2,inexistente=1"))
+    assert plan["categorias"] == {"campos_vacios": 20, "inexistente": 10}
+
+
+def test_parse_ratios_categoria_desconocida():
+    with pytest.raises(ValueError):
+        parse_ratios("no_existe=1")
+
+
+def test_presupuesto_ia_nunca_supera_la_cuota():
+    categorias = {"campos_vacios": 3, "inexistente": 0, "formato_invalido": 1}
+    presupuesto = plan_ai_budget(categorias, 0.5)
+    assert sum(presupuesto.values()) == 2
+    assert all(presupuesto[c] <= cuota for c, cuota in categorias.items())
+    assert sum(plan_ai_budget(categorias, 0).values()) == 0
+
+
+def test_fill_quota_completa_con_la_siguiente_fuente():
+    repetida = {"usuario": "a", "clave": "1"}
+    fuentes = [
+        ("cache", lambda n: [repetida, repetida], None),
+        ("local", lambda n: [{"usuario": f"u{i}", "clave": "x"} for i in range(n)], None),
+    ]
+    credenciales, aportes = fill_quota(5, fuentes)
+    assert len(credenciales) == 5
+    assert aportes == {"cache": 1, "local": 4}
@@ -0,0 +1,43 @@
+"""Pruebas del motor local de similitud"""
+import pytest
+
+from libraries.text_similarity import NUMPY_AVAILABLE, SimilarityEngine, normalize_text
+
+MOTORES = [False] + ([True] if NUMPY_AVAILABLE else [])
+
+
+def test_normalize_text():
+    assert normalize_text("  Batería, PORTÁTIL!! ") == "bateria portatil"
+
+
+@pytest.mark.parametrize("use_numpy", MOTORES)
+def test_identicos_y_distintos(use_numpy):
+    motor = SimilarityEngine(use_numpy=use_numpy)
+    assert motor.similarity("Usuario o clave incorrectos", "usuario o clave INCORRECTOS") == 1.0
+    assert motor.similarity("", "texto") == 0.0
+    parecido = motor.similarity("batería externa de gran capacidad", "batería portátil de gran capacidad")
+    distinto = motor.similarity("batería externa de gran capacidad", "error de conexión con el servidor")
+    assert 0.0 <= distinto < parecido <= 1.0
+
+
+@pytest.mark.parametrize("use_numpy", MOTORES)
+def test_lotes_coinciden_con_pares(use_numpy):
+    motor = SimilarityEngine(use_numpy=use_numpy)
+    textos = ["campos requeridos", "credenciales inválidas", "sesión iniciada"]
+    referencias = ["campo requerido", "clave inválida"]
+    matriz = motor.many_to_many(textos, referencias)
+    for i, texto in enumerate(textos):
+        for j, referencia in enumerate(referencias):
+            assert matriz[i][j] == pytest.approx(motor.similarity(texto, referencia), abs=1e-3)
+    assert motor.one_to_many(textos[0], referencias) == matriz[0]
+    assert motor.pairwise(textos[:2], referencias) == pytest.approx([matriz[0][0], matriz[1][1]], abs=1e-3)
+
+
+def test_pares_con_largos_distintos():
+    with pytest.raises(ValueError):
+        SimilarityEngine().pairwise(["a"], ["a", "b"])
+
+
+def test_determinista_entre_motores():
+    assert SimilarityEngine().similarity("login fallido", "fallo de login") == \
+        SimilarityEngine().similarity("login fallido", "fallo de login")
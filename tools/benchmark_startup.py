@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DE ARRANQUE v1.0
+Mide cuánto tardan en importarse y construirse GeminiLibrary, el listener y el
+reporter, cada uno en un proceso Python nuevo (sin módulos en memoria), y
+falla si alguno supera el presupuesto o si el arranque carga un módulo pesado
+(SDK de IA, NumPy) que debería importarse solo en el primer uso.
+
+- Mediana de varias corridas por objetivo: import, construcción y total en ms
+- Presupuesto en settings.startup de config/ai_providers.json o con --budget-ms
+- --profile muestra los imports más lentos de cada objetivo (python -X importtime)
+- Código de salida 1 si hay regresiones, para usarlo en CI
+
+Uso:
+    python tools/benchmark_startup.py
+    python tools/benchmark_startup.py --runs 9 --budget-ms 400 --profile
+    python tools/benchmark_startup.py --target libreria --json resultados.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+PROVIDERS_FILE = ROOT / "config" / "ai_providers.json"
+
+DEFAULT_STARTUP = {
+    "budget_ms": 500,
+    "runs": 5,
+    "heavy_modules": ["google.generativeai", "google.ai.generativelanguage", "grpc", "numpy"],
+}
+
+# Objetivo -> (módulo, código que construye la instancia como la crea Robot Framework)
+TARGETS = {
+    "libreria": ("libraries.GeminiLibrary", "modulo.GeminiLibrary()"),
+    "listener": ("listeners.robot_ai_listener_gemini", "modulo.RobotAIListenerGemini()"),
+    "reporter": ("tools.robot_md_reporter_gemini", None),
+}
+
+# Se ejecuta en el proceso hijo; la última línea de la salida es el resultado en JSON
+_CHILD = """
+import importlib, json, sys, time
+inicio = time.perf_counter()
+modulo = importlib.import_module({modulo!r})
+importado = time.perf_counter()
+{construir}
+construido = time.perf_counter()
+print()
+print(json.dumps({{
+    "import_ms": (importado - inicio) * 1000,
+    "init_ms": (construido - importado) * 1000,
+    "pesados": sorted(m for m in {pesados!r} if m in sys.modules),
+}}))
+"""
+
+
+def load_startup_settings():
+    """Configuración settings.startup de ai_providers.json sobre los valores por defecto"""
+    settings = dict(DEFAULT_STARTUP)
+    try:
+        with open(PROVIDERS_FILE, 'r', encoding='utf-8-sig') as f:
+            settings.update(json.load(f).get("settings", {}).get("startup", {}))
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ No se pudo leer settings.startup, usando valores por defecto: {e}")
+    return settings
+
+
+def _child_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env["PYTHONIOENCODING"] = "utf-8"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    # Con API key el arranque debe seguir sin crear el modelo ni importar el SDK
+    env.setdefault("GEMINI_API_KEY", "AIza-benchmark-arranque")
+    return env
+
+
+def run_once(target, heavy_modules, importtime=False):
+    """
+    Importa y construye un objetivo en un proceso nuevo
+
+    Returns:
+        dict: import_ms, init_ms, total_ms, pesados (y stderr si importtime)
+    """
+    modulo, construir = TARGETS[target]
+    code = _CHILD.format(modulo=modulo, construir=construir or "pass", pesados=list(heavy_modules))
+    comando = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proceso = subprocess.run(comando, cwd=ROOT, env=_child_env(), capture_output=True,
+                             text=True, encoding="utf-8", errors="replace", timeout=120)
+    lineas = proceso.stdout.strip().splitlines()
+    if proceso.returncode != 0 or not lineas:
+        raise RuntimeError(f"{target} no arrancó (código {proceso.returncode}): "
+                           f"{proceso.stderr.strip().splitlines()[-1:] or 'sin salida'}")
+    resultado = json.loads(lineas[-1])
+    resultado["total_ms"] = resultado["import_ms"] + resultado["init_ms"]
+    if importtime:
+        resultado["importtime"] = proceso.stderr
+    return resultado
+
+
+def slowest_imports(importtime_output, top=8):
+    """Módulos con mayor tiempo acumulado según python -X importtime: [(ms, módulo)]"""
+    tiempos = []
+    for linea in importtime_output.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|", 2)
+        # Solo los imports de primer nivel (sin sangría), para no contar dos veces a los hijos
+        if not nombre[1:].startswith(" ") and acumulado.strip().isdigit():
+            tiempos.append((int(acumulado) / 1000, nombre.strip()))
+    return sorted(tiempos, reverse=True)[:top]
+
+
+def benchmark(targets, runs, budget_ms, heavy_modules, profile=False):
+    """
+    Mide cada objetivo y lo compara con el presupuesto
+
+    Returns:
+        dict: {objetivo: {import_ms, init_ms, total_ms, pesados, regresiones}}
+    """
+    resultados = {}
+    for target in targets:
+        corridas = [run_once(target, heavy_modules) for _ in range(runs)]
+        resultado = {
+            clave: round(statistics.median(corrida[clave] for corrida in corridas), 1)
+            for clave in ("import_ms", "init_ms", "total_ms")
+        }
+        resultado["pesados"] = sorted({modulo for corrida in corridas for modulo in corrida["pesados"]})
+        resultado["regresiones"] = []
+        if resultado["total_ms"] > budget_ms:
+            resultado["regresiones"].append(f"{resultado['total_ms']} ms supera el presupuesto de {budget_ms} ms")
+        for modulo in resultado["pesados"]:
+            resultado["regresiones"].append(f"importa '{modulo}' al arrancar")
+        if profile:
+            resultado["imports_lentos"] = slowest_imports(run_once(target, heavy_modules, importtime=True)["importtime"])
+        resultados[target] = resultado
+    return resultados
+
+
+def print_report(resultados, budget_ms, runs):
+    print(f"\n⏱️ ARRANQUE (mediana de {runs} corridas, presupuesto {budget_ms} ms)")
+    print("=" * 70)
+    print(f"{'objetivo':<12}{'import':>12}{'init':>12}{'total':>12}   estado")
+    for target, resultado in resultados.items():
+        estado = "❌ " + "; ".join(resultado["regresiones"]) if resultado["regresiones"] else "✅"
+        print(f"{target:<12}{resultado['import_ms']:>10.1f}ms{resultado['init_ms']:>10.1f}ms"
+              f"{resultado['total_ms']:>10.1f}ms   {estado}")
+        for ms, nombre in resultado.get("imports_lentos", []):
+            print(f"{'':<12}  {ms:>8.1f} ms  {nombre}")
+    print("=" * 70)
+
+
+def main():
+    """Funcion principal"""
+    settings = load_startup_settings()
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark del tiempo de arranque de la librería, el listener y el reporter",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python tools/benchmark_startup.py                       # Todos los objetivos
+  python tools/benchmark_startup.py --target listener     # Solo el listener
+  python tools/benchmark_startup.py --profile             # Con los imports más lentos
+        """
+    )
+    parser.add_argument("--target", "-t", action="append", choices=sorted(TARGETS),
+                        help="Objetivo a medir (se puede repetir). Por defecto todos")
+    parser.add_argument("--runs", "-r", type=int, default=int(settings["runs"]),
+                        help=f"Corridas por objetivo (por defecto {settings['runs']})")
+    parser.add_argument("--budget-ms", "-b", type=float, default=float(settings["budget_ms"]),
+                        help=f"Tiempo máximo de import + construcción por objetivo (por defecto {settings['budget_ms']})")
+    parser.add_argument("--profile", "-p", action="store_true",
+                        help="Mostrar los imports más lentos de cada objetivo")
+    parser.add_argument("--json", "-j", help="Guardar los resultados en un archivo JSON")
+
+    args = parser.parse_args()
+    targets = args.target or list(TARGETS)
+    runs = max(1, args.runs)
+
+    try:
+        resultados = benchmark(targets, runs, args.budget_ms, settings["heavy_modules"], args.profile)
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"❌ Error midiendo el arranque: {e}")
+        sys.exit(2)
+
+    print_report(resultados, args.budget_ms, runs)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"presupuesto_ms": args.budget_ms, "corridas": runs, "resultados": resultados},
+                      f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados guardados en {args.json}")
+
+    regresiones = sum(len(resultado["regresiones"]) for resultado in resultados.values())
+    if regresiones:
+        print(f"❌ {regresiones} regresión(es) de arranque")
+        sys.exit(1)
+    print("✅ Arranque dentro del presupuesto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+FAKE AI SERVER v1.0
+Servidor local que imita a los proveedores de IA de config/ai_providers.json
+para medir rendimiento y comportamiento de fallback sin red ni API keys.
+
+- Monta las rutas de cada base_url (Gemini generateContent, Claude messages, Bedrock invoke)
+- Respuestas JSON predefinidas según el prompt, o reglas propias con --responses
+- Latencia configurable por distribución, tasa de errores 5xx y límites 429 con Retry-After
+- Resultados deterministas con --seed
+
+Uso:
+    python tools/fake_ai_server.py --port 8765 --latency lognormal:0.4:0.3 --error-rate 0.05 --rpm 60
+    GEMINI_BASE_URL=http://127.0.0.1:8765/v1beta/models robot ...
+
+Endpoints de control:
+    GET  /__stats   estadísticas de peticiones, códigos y latencias
+    POST /__reset   reinicia estadísticas y ventanas de rate limit
+"""
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Añadir directorio padre para imports del proyecto
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from libraries.ai_endpoints import load_providers
+
+
+# ----------------------------------------------------------------------
+# Latencias
+# ----------------------------------------------------------------------
+
+def parse_latency(spec):
+    """
+    Convierte una especificación de latencia en una función rng -> segundos
+
+    Formatos:
+        fixed:S | uniform:MIN:MAX | normal:MEDIA:DESV | lognormal:MEDIANA:SIGMA | exp:MEDIA
+    """
+    parts = spec.split(":")
+    kind, values = parts[0], [float(v) for v in parts[1:]]
+
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+
+    raise argparse.ArgumentTypeError(f"Latencia no válida: {spec}")
+
+
+# ----------------------------------------------------------------------
+# Respuestas predefinidas
+# ----------------------------------------------------------------------
+
+def _cantidad(prompt, default=3):
+    match = re.search(r"Genera(?: exactamente)? (\d+)", prompt)
+    return int(match.group(1)) if match else default
+
+
+def _credencial_invalida(rng, i):
+    categorias = ["campos_vacios", "caracteres_especiales", "formato_invalido", "inexistente"]
+    categoria = categorias[i % len(categorias)]
+    if categoria == "campos_vacios":
+        usuario, clave, error = "", "", "required_fields"
+    else:
+        usuario = f"fake.{categoria}.{rng.randrange(10 ** 6):06d}"
+        clave = f"clave_{rng.randrange(10 ** 6):06d}"
+        error = "invalid_credentials"
+    return {
+        "usuario": usuario,
+        "clave": clave,
+        "descripcion": f"Credencial simulada ({categoria})",
+        "error_esperado": error,
+        "categoria": categoria,
+    }
+
+
+def default_response(prompt, rng):
+    """Respuesta JSON con la estructura que espera cada prompt del proyecto"""
+    if '"analisis": [' in prompt:
+        ids = re.findall(r'"id": "([^"]+)"', prompt)
+        ids = [i for i in dict.fromkeys(ids) if i != "id del error"]
+        return {"analisis": [
+            {"id": i, "causa_probable": "Causa simulada por el servidor local",
+             "recomendaciones": ["Recomendación simulada 1", "Recomendación simulada 2"],
+             "categoria": "simulado"} for i in ids
+        ]}
+    if '"soluciones"' in prompt and '"causa_probable"' in prompt:
+        return {"causa_probable": "Causa simulada por el servidor local", "confianza": "Media",
+                "soluciones": ["Solución simulada 1", "Solución simulada 2"],
+                "contexto_adicional": "Respuesta generada por tools/fake_ai_server.py",
+                "tipo_error": "simulado"}
+    if '"causa_probable"' in prompt:
+        return {"causa_probable": "Causa simulada por el servidor local",
+                "recomendaciones": ["Recomendación simulada 1", "Recomendación simulada 2"],
+                "categoria": "simulado"}
+    if '"similitud"' in prompt:
+        return {"similitud": round(rng.uniform(0.5, 1.0), 2), "explicacion": "Similitud simulada"}
+    if '"cumple"' in prompt:
+        return {"cumple": True, "razones": ["Evaluación simulada"]}
+    if '"variaciones"' in prompt:
+        return {"variaciones": [f"Variación simulada {i + 1}" for i in range(_cantidad(prompt))]}
+    if '"credenciales_validas"' in prompt:
+        total = _cantidad(prompt, 5)
+        validas = max(1, total // 3)
+        return {
+            "credenciales_validas": [
+                {"usuario": f"fake.usuario{i + 1}", "clave": f"Clave#{rng.randrange(10 ** 6):06d}",
+                 "descripcion": "Usuario simulado", "tipo": "funcional", "estado": "activo"}
+                for i in range(validas)
+            ],
+            "credenciales_invalidas": [_credencial_invalida(rng, i) for i in range(total - validas)],
+        }
+    if "credenciales inválidas" in prompt:
+        return [_credencial_invalida(rng, i) for i in range(_cantidad(prompt, 5))]
+    return {"respuesta": "Respuesta simulada por el servidor local"}
+
+
+class _SafeFormat(dict):
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def load_rules(path):
+    """
+    Reglas propias: lista JSON de {"match": regex, "response": objeto o texto}
+    Los textos admiten {model}, {seq} y {n} (número pedido en el prompt)
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        rules = json.load(f)
+    return [(re.compile(rule.get("match", ".*"), re.DOTALL), rule["response"]) for rule in rules]
+
+
+# ----------------------------------------------------------------------
+# Servidor
+# ----------------------------------------------------------------------
+
+class FakeAIState:
+    """Configuración y estado compartido entre hilos del servidor"""
+
+    def __init__(self, args, providers):
+        self.latency = parse_latency(args.latency)
+        self.error_rate = args.error_rate
+        self.rate_limit_rate = args.rate_limit_rate
+        self.rpm = args.rpm
+        self.retry_after = args.retry_after
+        self.rules = load_rules(args.responses) if args.responses else []
+        self.providers = providers
+
+        self._rng = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.seq = 0
+            self.windows = {}
+            self.stats = {"total": 0, "por_codigo": {}, "por_proveedor": {}, "latencias": []}
+
+    def draw(self, provider):
+        """
+        Decide el resultado de una petición en orden de llegada (determinista con --seed)
+
+        Returns:
+            tuple: (código, latencia, retry_after, seq, semilla de contenido)
+        """
+        with self._lock:
+            self.seq += 1
+            now = time.monotonic()
+
+            if self.rpm:
+                window = self.windows.setdefault(provider, deque())
+                while window and now - window[0] >= 60:
+                    window.popleft()
+                if len(window) >= self.rpm:
+                    return 429, 0.0, max(1, math.ceil(60 - (now - window[0]))), self.seq, 0
+                window.append(now)
+
+            latency = self.latency(self._rng)
+            roll = self._rng.random()
+            content_seed = self._rng.randrange(2 ** 32)
+
+            if roll < self.rate_limit_rate:
+                return 429, latency, self.retry_after, self.seq, content_seed
+            if roll < self.rate_limit_rate + self.error_rate:
+                return self._rng.choice([500, 503]), latency, None, self.seq, content_seed
+            return 200, latency, None, self.seq, content_seed
+
+    def record(self, provider, code, elapsed):
+        with self._lock:
+            self.stats["total"] += 1
+            self.stats["por_codigo"][str(code)] = self.stats["por_codigo"].get(str(code), 0) + 1
+            self.stats["por_proveedor"][provider] = self.stats["por_proveedor"].get(provider, 0) + 1
+            self.stats["latencias"].append(elapsed)
+
+    def snapshot(self):
+        with self._lock:
+            latencias = sorted(self.stats["latencias"])
+            stats = {k: v for k, v in self.stats.items() if k != "latencias"}
+
+        def percentil(p):
+            if not latencias:
+                return 0.0
+            return round(latencias[min(len(latencias) - 1, int(math.ceil(p / 100 * len(latencias))) - 1)], 4)
+
+        stats.update({"p50_segundos": percentil(50), "p95_segundos": percentil(95), "p99_segundos": percentil(99)})
+        return stats
+
+    def response_text(self, prompt, model, seq, content_seed):
+        rng = random.Random(content_seed)
+        for pattern, response in self.rules:
+            if pattern.search(prompt):
+                if isinstance(response, str):
+                    return response.format_map(_SafeFormat(model=model, seq=seq, n=_cantidad(prompt)))
+                return json.dumps(response, ensure_ascii=False)
+        return json.dumps(default_response(prompt, rng), ensure_ascii=False)
+
+
+def build_routes(providers):
+    """Rutas (regex, proveedor) derivadas de los base_url configurados"""
+    routes = []
+    gemini_path = urlsplit(providers.get("gemini", {}).get("base_url", "/v1beta/models")).path.rstrip("/")
+    routes.append((re.compile(re.escape(gemini_path) + r"/(?P<model>[^/:]+):generateContent$"), "gemini"))
+
+    claude_path = urlsplit(providers.get("claude", {}).get("base_url", "/v1/messages")).path.rstrip("/")
+    routes.append((re.compile(re.escape(claude_path) + "$"), "claude"))
+
+    aws_path = urlsplit(providers.get("aws", {}).get("base_url", "")).path.rstrip("/")
+    routes.append((re.compile(re.escape(aws_path) + r"/model/(?P<model>[^/]+)/invoke$"), "aws"))
+    return routes
+
+
+def extract_prompt(provider, body):
+    """Texto del prompt según el formato de petición de cada proveedor"""
+    if provider == "gemini":
+        return "\n".join(part.get("text", "") for content in body.get("contents", [])
+                         for part in content.get("parts", []))
+    if "messages" in body:
+        textos = []
+        for message in body["messages"]:
+            content = message.get("content", "")
+            if isinstance(content, list):
+                textos.extend(block.get("text", "") for block in content if isinstance(block, dict))
+            else:
+                textos.append(str(content))
+        return "\n".join(textos)
+    return str(body.get("inputText") or body.get("prompt") or "")
+
+
+def format_success(provider, model, text, prompt):
+    prompt_tokens, output_tokens = max(1, len(prompt) // 4), max(1, len(text) // 4)
+    if provider == "gemini":
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens,
+                              "totalTokenCount": prompt_tokens + output_tokens},
+            "modelVersion": model,
+        }
+    if provider == "claude" or model.startswith("anthropic."):
+        return {"id": f"msg_fake_{prompt_tokens}_{output_tokens}", "type": "message", "role": "assistant",
+                "model": model, "content": [{"type": "text", "text": text}], "stop_reason": "end_turn",
+                "usage": {"input_tokens": prompt_tokens, "output_tokens": output_tokens}}
+    return {"inputTextTokenCount": prompt_tokens,
+            "results": [{"tokenCount": output_tokens, "outputText": text, "completionReason": "FINISH"}]}
+
+
+def format_error(provider, code):
+    message = "Resource has been exhausted (simulado)" if code == 429 else "Error interno simulado"
+    if provider == "gemini":
+        status = {429: "RESOURCE_EXHAUSTED", 503: "UNAVAILABLE"}.get(code, "INTERNAL")
+        return {"error": {"code": code, "message": message, "status": status}}
+    if provider == "claude":
+        kind = {429: "rate_limit_error", 503: "overloaded_error"}.get(code, "api_error")
+        return {"type": "error", "error": {"type": kind, "message": message}}
+    return {"message": message}
+
+
+class FakeAIHandler(BaseHTTPRequestHandler):
+    server_version = "FakeAIServer/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, code, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlsplit(self.path).path == "/__stats":
+            self._send_json(200, self.server.state.snapshot())
+        else:
+            self._send_json(404, {"error": "ruta no encontrada"})
+
+    def do_POST(self):
+        started = time.monotonic()
+        path = urlsplit(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        if path == "/__reset":
+            self.server.state.reset()
+            self._send_json(200, {"reset": True})
+            return
+
+        for pattern, provider in self.server.routes:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            self._send_json(404, {"error": f"ruta no encontrada: {path}"})
+            return
+
+        try:
+            body = json.loads(raw.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            self._send_json(400, format_error(provider, 400))
+            return
+
+        state = self.server.state
+        model = match.groupdict().get("model") or body.get("model", "")
+        code, latency, retry_after, seq, content_seed = state.draw(provider)
+        if latency:
+            time.sleep(latency)
+
+        if code == 200:
+            prompt = extract_prompt(provider, body)
+            text = state.response_text(prompt, model, seq, content_seed)
+            self._send_json(200, format_success(provider, model, text, prompt))
+        else:
+            headers = {"Retry-After": str(retry_after)} if retry_after else None
+            self._send_json(code, format_error(provider, code), headers)
+
+        state.record(provider, code, time.monotonic() - started)
+
+
+def create_server(host="127.0.0.1", port=8765, args=None, providers_file=None):
+    """Crea el servidor (sin arrancarlo). Útil para lanzarlo en un hilo desde otra herramienta"""
+    args = args or build_parser().parse_args([])
+    providers = load_providers(providers_file)
+    server = ThreadingHTTPServer((host, port), FakeAIHandler)
+    server.daemon_threads = True
+    server.state = FakeAIState(args, providers)
+    server.routes = build_routes(providers)
+    server.verbose = getattr(args, "verbose", False)
+    return server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Servidor local que simula los proveedores de IA configurados")
+    parser.add_argument("--host", default="127.0.0.1", help="Interfaz de escucha")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto de escucha")
+    parser.add_argument("--latency", default="fixed:0",
+                        help="Distribución de latencia: fixed:S, uniform:MIN:MAX, normal:MEDIA:DESV, "
+                             "lognormal:MEDIANA:SIGMA, exp:MEDIA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de responder 500/503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probabilidad de responder 429")
+    parser.add_argument("--rpm", type=int, default=0, help="Límite de peticiones por minuto por proveedor (0 = sin límite)")
+    parser.add_argument("--retry-after", type=int, default=2, help="Segundos de Retry-After en los 429 aleatorios")
+    parser.add_argument("--responses", help="Archivo JSON con reglas de respuesta propias")
+    parser.add_argument("--seed", type=int, default=1234, help="Semilla para resultados deterministas")
+    parser.add_argument("--verbose", action="store_true", help="Registrar cada petición")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    parse_latency(args.latency)
+
+    server = create_server(args.host, args.port, args)
+    base = f"http://{args.host}:{server.server_address[1]}"
+
+    print(f"🤖 Servidor de IA simulado escuchando en {base}")
+    for provider, config in server.state.providers.items():
+        path = urlsplit(config.get("base_url", "")).path
+        print(f"   {provider.upper()}_BASE_URL={base}{path}")
+    print(f"   Latencia: {args.latency} | Errores: {args.error_rate:.0%} | 429: {args.rate_limit_rate:.0%} | RPM: {args.rpm or 'sin límite'}")
+    print(f"   Estadísticas: {base}/__stats")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Servidor detenido")
+        print(json.dumps(server.state.snapshot(), indent=2, ensure_ascii=False))
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
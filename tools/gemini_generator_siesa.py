@@ -6,17 +6,29 @@ import sys
 import json
 import random
 import string
+import time
 import datetime
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# Importación condicional de Gemini AI
-try:
-    import google.generativeai as genai
-
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+# Añadir directorio padre para imports del proyecto (libraries/, config/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from libraries.ai_clients import get_gemini_model
+from libraries.ai_rate_limiter import call_with_retry
+from libraries.credential_fuzzer import CredentialFuzzer
+from libraries.credential_index import get_credential_index
+from libraries.credential_jsonl import (is_jsonl_path, write_credentials_jsonl, load_credentials_file,
+                                        CredentialJsonlWriter, iter_records, read_jsonl_metadata)
+from libraries.credential_planner import (plan_distribution, plan_ai_budget, achieved_distribution,
+                                          fill_quota, parse_ratios, DistributionTally, ERROR_POR_CATEGORIA)
+from libraries.credential_pool import CredentialPool
+from libraries.lazy_imports import module_available
+
+# Importación diferida de Gemini AI: el SDK se carga en setup_gemini
+GEMINI_AVAILABLE = module_available("google.generativeai")
+if not GEMINI_AVAILABLE:
     print("⚠️ google-generativeai no está instalado. Usando modo de demostración.")
 
 # ConfigManager centralizado
@@ -38,7 +50,7 @@ def get_centralized_credentials():
 
     try:
         config_manager = ConfigManager()
-        credentials = config_manager.get_all_credentials()
+        credentials = config_manager.get_all_valid_credentials()
         return credentials
     except Exception as e:
         print(f"⚠️ Error obteniendo credenciales centralizadas: {e}")
@@ -70,19 +82,28 @@ def setup_gemini(api_key):
         return None
 
     try:
-        genai.configure(api_key=api_key)
-        return genai.GenerativeModel("gemini-1.5-flash")
+        return get_gemini_model("gemini-1.5-flash", api_key)
     except Exception as e:
         print(f"❌ Error configurando Gemini: {e}")
         return None
 
 
-def generate_with_gemini(model, cantidad, entorno="qa"):
+def generate_with_gemini(model, cantidad, entorno="qa", lote=None):
     """
     Genera credenciales usando Gemini AI
+
+    Args:
+        lote: Tupla (número, total) cuando la petición es un lote de una generación mayor
     """
+    instruccion_lote = ""
+    if lote:
+        # Cada lote pide valores propios para reducir duplicados entre lotes
+        instruccion_lote = (f"Este es el lote {lote[0]} de {lote[1]}: usa nombres de usuario distintos "
+                            f"a los de otros lotes (por ejemplo con sufijo _l{lote[0]}).")
+
     prompt = f"""
     Genera exactamente {cantidad} credenciales de usuario para testing de SIESA ERP.
+    {instruccion_lote}
 
     Distribución solicitada:
     - Aproximadamente 1/3 credenciales válidas (usuarios reales con contraseñas seguras)
@@ -122,8 +143,9 @@ def generate_with_gemini(model, cantidad, entorno="qa"):
     """
 
     try:
-        print("📡 Conectando con Gemini API...")
-        response = model.generate_content(prompt)
+        if not lote:
+            print("📡 Conectando con Gemini API...")
+        response = call_with_retry("gemini", lambda: model.generate_content(prompt), prompt)
         return response.text
     except Exception as e:
         print(f"❌ Error generando con Gemini: {e}")
@@ -160,71 +182,252 @@ def parse_gemini_response(response_text):
         return None
 
 
-def generate_demo_credentials(num_credentials=5):
+def _credential_key(credential):
+    return (credential.get("usuario"), credential.get("clave"))
+
+
+def generate_chunked_with_gemini(model, cantidad, entorno="qa", chunk_size=50, workers=4, max_retries=2, index=None):
+    """
+    Genera una cantidad grande de credenciales en lotes concurrentes
+
+    Cada lote es una petición independiente de como máximo chunk_size credenciales,
+    de modo que la respuesta no se trunca. Los lotes fallidos (error o JSON
+    inválido) se reintentan solos, y los duplicados se descartan al combinar
+    (también las inválidas ya devueltas en corridas anteriores si se pasa un
+    índice); si faltan credenciales por duplicados se piden en lotes adicionales.
+
+    Args:
+        model: Modelo de Gemini configurado
+        cantidad: Total de credenciales solicitadas
+        entorno: Entorno de las credenciales
+        chunk_size: Credenciales por petición
+        workers: Peticiones simultáneas como máximo
+        max_retries: Rondas de reintento para lotes fallidos o faltantes
+        index: CredentialIndex para descartar inválidas repetidas entre corridas
+
+    Returns:
+        dict: Credenciales combinadas con metadata de los lotes, o None si ningún lote funcionó
+    """
+    chunk_size = max(1, int(chunk_size))
+    pendientes = [min(chunk_size, cantidad - inicio) for inicio in range(0, cantidad, chunk_size)]
+    total_lotes = len(pendientes)
+    print(f"📡 Generando {cantidad} credenciales en {total_lotes} lotes de hasta {chunk_size} "
+          f"({workers} en paralelo)...")
+
+    validas, invalidas, vistos = [], [], set()
+    lotes = []
+    repetidas_indice = 0
+    inicio_total = time.monotonic()
+
+    def run_chunk(numero, tamano):
+        inicio = time.monotonic()
+        datos = None
+        response_text = generate_with_gemini(model, tamano, entorno, lote=(numero, max(numero, total_lotes)))
+        if response_text:
+            datos = parse_gemini_response(response_text)
+        if not isinstance(datos, dict):
+            datos = None
+        return numero, tamano, datos, time.monotonic() - inicio
+
+    numero_lote = 0
+    for ronda in range(max_retries + 1):
+        if not pendientes:
+            break
+        if ronda:
+            print(f"🔁 Ronda {ronda}: reintentando {len(pendientes)} lotes ({sum(pendientes)} credenciales)")
+
+        trabajos = []
+        for tamano in pendientes:
+            numero_lote += 1
+            trabajos.append((numero_lote, tamano))
+
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+            resultados = list(executor.map(lambda trabajo: run_chunk(*trabajo), trabajos))
+
+        pendientes = []
+        for numero, tamano, datos, latencia in sorted(resultados):
+            recibidas = 0
+            if datos:
+                for destino, clave_lista in ((validas, "credenciales_validas"), (invalidas, "credenciales_invalidas")):
+                    for credencial in datos.get(clave_lista) or []:
+                        if not isinstance(credencial, dict) or _credential_key(credencial) in vistos:
+                            continue
+                        vistos.add(_credential_key(credencial))
+                        if index and destino is invalidas and index.contains(credencial):
+                            repetidas_indice += 1
+                            continue
+                        destino.append(credencial)
+                        recibidas += 1
+            estado = "ok" if datos else "fallido"
+            lotes.append({"lote": numero, "ronda": ronda, "solicitadas": tamano, "unicas": recibidas,
+                          "latencia_s": round(latencia, 2), "estado": estado})
+            print(f"   📦 Lote {numero}: {recibidas}/{tamano} únicas en {latencia:.1f}s ({estado})")
+            if not datos:
+                pendientes.append(tamano)
+
+        # Lo que falte por duplicados se pide en lotes nuevos en la siguiente ronda
+        faltantes = cantidad - len(validas) - len(invalidas) - sum(pendientes)
+        while faltantes > 0:
+            pendientes.append(min(chunk_size, faltantes))
+            faltantes -= chunk_size
+
+    if not validas and not invalidas:
+        print("❌ Ningún lote devolvió credenciales válidas")
+        return None
+
+    # Los lotes pueden devolver de más: recortar a la cantidad solicitada
+    exceso = len(validas) + len(invalidas) - cantidad
+    if exceso > 0:
+        invalidas = invalidas[:max(0, len(invalidas) - exceso)]
+        validas = validas[:cantidad - len(invalidas)]
+
+    # Solo se registran en el índice las inválidas que sobreviven al recorte
+    if index:
+        for credencial in invalidas:
+            index.add(credencial)
+
+    total = len(validas) + len(invalidas)
+    latencias = sorted(lote["latencia_s"] for lote in lotes)
+    if total < cantidad:
+        print(f"⚠️ Se obtuvieron {total} de {cantidad} credenciales tras {max_retries} rondas de reintento")
+
+    metadata = {
+        "generado_en": datetime.datetime.now().isoformat(),
+        "cantidad_solicitada": cantidad,
+        "cantidad_generada": total,
+        "proveedor_ia": "gemini",
+        "distribucion": {"validas": len(validas), "invalidas": len(invalidas), "total": total},
+        "generacion_por_lotes": {
+            "tamano_lote": chunk_size,
+            "workers": workers,
+            "lotes_ejecutados": len(lotes),
+            "lotes_fallidos": sum(1 for lote in lotes if lote["estado"] != "ok"),
+            "duracion_total_s": round(time.monotonic() - inicio_total, 2),
+            "latencia_mediana_s": latencias[len(latencias) // 2],
+            "latencia_max_s": latencias[-1],
+            "lotes": lotes
+        }
+    }
+    if index:
+        metadata["indice_duplicados"] = _save_index(index, repetidas_indice)
+
+    return {
+        "metadata": metadata,
+        "credenciales_validas": validas,
+        "credenciales_invalidas": invalidas
+    }
+
+
+def _save_index(index, rechazadas):
+    """Guarda el índice de duplicados y devuelve sus métricas para la metadata"""
+    if rechazadas:
+        print(f"♻️ {rechazadas} credenciales ya generadas en corridas anteriores descartadas")
+    try:
+        index.save()
+    except Exception as e:
+        print(f"⚠️ Error guardando índice de credenciales: {e}")
+    return dict(index.stats(), rechazadas_en_corrida=rechazadas)
+
+
+def generate_credentials_with_gemini(model, cantidad, entorno="qa", chunk_size=50, workers=4, index=None):
+    """
+    Genera y parsea credenciales con Gemini: en una sola petición si caben en
+    un lote, o en lotes concurrentes si la cantidad es mayor
+
+    Returns:
+        dict: Credenciales parseadas o None si Gemini no devolvió JSON utilizable
+    """
+    # Con índice de duplicados se usan los lotes, que piden de nuevo lo que falte
+    if cantidad > chunk_size or index:
+        return generate_chunked_with_gemini(model, cantidad, entorno, chunk_size, workers, index=index)
+
+    response_text = generate_with_gemini(model, cantidad, entorno)
+    if not response_text:
+        print("❌ Error obteniendo respuesta de Gemini")
+        return None
+
+    print("✅ Respuesta recibida de Gemini")
+    credentials_data = parse_gemini_response(response_text)
+    if not credentials_data:
+        print("❌ Error parseando respuesta de Gemini")
+    return credentials_data
+
+
+# Funciones auxiliares para generar datos aleatorios
+def random_username():
+    first_names = ["ana", "carlos", "sofia", "pedro", "maria", "luis", "laura", "diego", "elena", "miguel",
+                   "carmen", "jose", "patricia", "rafael", "sandra", "alberto", "claudia", "fernando", "monica",
+                   "andres",
+                   "gabriela", "ricardo", "valentina", "eduardo", "natalia", "sergio", "carolina", "daniel",
+                   "alejandra", "mauricio"]
+    last_names = ["lopez", "martinez", "garcia", "rodriguez", "perez", "sanchez", "diaz", "torres", "ramirez",
+                  "moreno",
+                  "castro", "ruiz", "vargas", "herrera", "medina", "jimenez", "rojas", "silva", "mendoza", "ortega",
+                  "guerrero", "cruz", "flores", "ramos", "aguilar", "delgado", "romero", "guzman", "alvarez",
+                  "restrepo"]
+    return f"{random.choice(first_names)}.{random.choice(last_names)}"
+
+
+def random_secure_password():
+    length = random.randint(8, 15)
+    chars = string.ascii_letters + string.digits + "!@#$%^&*()_+"
+    password = ''.join(random.choice(chars) for i in range(length))
+    # Asegurar que tiene al menos un número, una mayúscula y un carácter especial
+    password = password[0].upper() + password[1:-2] + random.choice(string.digits) + random.choice("!@#$%^&*()_+")
+    return password
+
+
+def random_role():
+    roles = ["administrador", "ventas", "finanzas", "recursos_humanos", "soporte", "compras", "logistica",
+             "contabilidad", "gerente", "supervisor", "analista", "coordinador", "especialista", "asistente",
+             "jefe", "director", "lider", "consultor", "tecnico", "operador"]
+    return random.choice(roles)
+
+
+def random_description(role):
+    descriptions = {
+        "administrador": "Usuario con acceso completo al sistema",
+        "ventas": "Gestiona clientes y oportunidades de venta",
+        "finanzas": "Responsable de presupuestos y reportes financieros",
+        "recursos_humanos": "Gestiona personal y nómina",
+        "soporte": "Brinda asistencia técnica a usuarios",
+        "compras": "Gestiona proveedores y órdenes de compra",
+        "logistica": "Controla inventarios y distribución",
+        "contabilidad": "Registra transacciones contables",
+        "gerente": "Supervisa operaciones de departamento",
+        "supervisor": "Coordina equipos de trabajo",
+        "analista": "Analiza datos y genera reportes",
+        "coordinador": "Coordina actividades operativas",
+        "especialista": "Experto en área específica",
+        "asistente": "Apoya actividades administrativas",
+        "jefe": "Dirige equipo de trabajo",
+        "director": "Dirige área organizacional",
+        "lider": "Lidera proyectos estratégicos",
+        "consultor": "Asesora en temas especializados",
+        "tecnico": "Ejecuta tareas técnicas",
+        "operador": "Opera sistemas y equipos"
+    }
+    return descriptions.get(role, "Usuario del sistema ERP")
+
+
+def generate_demo_credentials(num_credentials=5, seed=None):
     """
     Genera credenciales de usuario de demostración cuando no se puede usar Gemini
     VERSIÓN v1.2: Integrado con sistema de configuración centralizada
     CORREGIDO: Genera exactamente la cantidad solicitada
+
+    Args:
+        num_credentials: Total de credenciales
+        seed: Semilla para obtener siempre las mismas credenciales
     """
     print("📡 Generando credenciales de demostración con configuración centralizada v1.2...")
+    if seed is not None:
+        random.seed(seed)
 
     # 🔧 CONFIGURACIÓN CENTRALIZADA v1.2 - Intentar obtener credenciales centrales primero
     credenciales_centrales = get_centralized_credentials()
     credencial_prioritaria = get_priority_credential_from_central()
 
-    # Funciones auxiliares para generar datos aleatorios
-    def random_username():
-        first_names = ["ana", "carlos", "sofia", "pedro", "maria", "luis", "laura", "diego", "elena", "miguel",
-                       "carmen", "jose", "patricia", "rafael", "sandra", "alberto", "claudia", "fernando", "monica",
-                       "andres",
-                       "gabriela", "ricardo", "valentina", "eduardo", "natalia", "sergio", "carolina", "daniel",
-                       "alejandra", "mauricio"]
-        last_names = ["lopez", "martinez", "garcia", "rodriguez", "perez", "sanchez", "diaz", "torres", "ramirez",
-                      "moreno",
-                      "castro", "ruiz", "vargas", "herrera", "medina", "jimenez", "rojas", "silva", "mendoza", "ortega",
-                      "guerrero", "cruz", "flores", "ramos", "aguilar", "delgado", "romero", "guzman", "alvarez",
-                      "restrepo"]
-        return f"{random.choice(first_names)}.{random.choice(last_names)}"
-
-    def random_secure_password():
-        length = random.randint(8, 15)
-        chars = string.ascii_letters + string.digits + "!@#$%^&*()_+"
-        password = ''.join(random.choice(chars) for i in range(length))
-        # Asegurar que tiene al menos un número, una mayúscula y un carácter especial
-        password = password[0].upper() + password[1:-2] + random.choice(string.digits) + random.choice("!@#$%^&*()_+")
-        return password
-
-    def random_role():
-        roles = ["administrador", "ventas", "finanzas", "recursos_humanos", "soporte", "compras", "logistica",
-                 "contabilidad", "gerente", "supervisor", "analista", "coordinador", "especialista", "asistente",
-                 "jefe", "director", "lider", "consultor", "tecnico", "operador"]
-        return random.choice(roles)
-
-    def random_description(role):
-        descriptions = {
-            "administrador": "Usuario con acceso completo al sistema",
-            "ventas": "Gestiona clientes y oportunidades de venta",
-            "finanzas": "Responsable de presupuestos y reportes financieros",
-            "recursos_humanos": "Gestiona personal y nómina",
-            "soporte": "Brinda asistencia técnica a usuarios",
-            "compras": "Gestiona proveedores y órdenes de compra",
-            "logistica": "Controla inventarios y distribución",
-            "contabilidad": "Registra transacciones contables",
-            "gerente": "Supervisa operaciones de departamento",
-            "supervisor": "Coordina equipos de trabajo",
-            "analista": "Analiza datos y genera reportes",
-            "coordinador": "Coordina actividades operativas",
-            "especialista": "Experto en área específica",
-            "asistente": "Apoya actividades administrativas",
-            "jefe": "Dirige equipo de trabajo",
-            "director": "Dirige área organizacional",
-            "lider": "Lidera proyectos estratégicos",
-            "consultor": "Asesora en temas especializados",
-            "tecnico": "Ejecuta tareas técnicas",
-            "operador": "Opera sistemas y equipos"
-        }
-        return descriptions.get(role, "Usuario del sistema ERP")
-
     # CALCULAR DISTRIBUCIÓN CORRECTA
     # Si tenemos credenciales centrales, usarlas como base
     if credenciales_centrales:
@@ -297,110 +500,10 @@ def generate_demo_credentials(num_credentials=5):
     print(
         f"📊 Distribución: {len(valid_credentials)} válidas + {num_invalid_needed} inválidas = {num_credentials} total")
 
-    def random_invalid_username():
-        options = [
-            "admin",  # Demasiado simple
-            "123",  # Solo números
-            f"user{random.randint(1000, 9999)}@domain.com",  # Email como usuario
-            f"#usuario{random.randint(1, 100)}!",  # Caracteres especiales
-            f"usr-{random.randint(1, 999)}",  # Formato inusual
-            "a",  # Muy corto
-            f"invaliduser{random.randint(1, 999)}*",  # Asterisco no permitido
-            f"{'x' * random.randint(50, 100)}",  # Muy largo
-            f"admin{random.randint(1, 99)} admin",  # Espacios en medio
-            "",  # Vacío
-            f"test{random.randint(1, 999)}",
-            f"usuario{random.randint(1, 999)}",
-            f"temp{random.randint(1, 999)}",
-            f"demo{random.randint(1, 999)}",
-            f"guest{random.randint(1, 999)}",
-            None,  # Usuario nulo
-            f"user{random.randint(1, 99)}@test",  # Formato email parcial
-            f"user.{random.randint(1, 99)}.invalid",  # Puntos múltiples
-            f"USUARIO{random.randint(1, 99)}",  # Todo mayúsculas
-            f"user{random.randint(1, 99)}$"  # Carácter especial al final
-        ]
-        return random.choice(options)
-
-    def random_invalid_password():
-        options = [
-            "123",  # Muy corta
-            "pass",  # Muy simple
-            "a",  # Un solo carácter
-            f"{random.randint(10000000, 99999999)}",  # Solo números
-            "CLAVE",  # Solo mayúsculas
-            f"admin{random.randint(100, 999)}",  # Sin caracteres especiales
-            f"{'a' * random.randint(20, 50)}",  # Sin mayúsculas
-            f"sin-caracter-especial{random.randint(1, 99)}",  # Sin números ni mayúsculas
-            f"espacios en clave {random.randint(1, 99)}",  # Contiene espacios
-            "",  # Vacía
-            f"password{random.randint(1, 999)}",
-            f"123456{random.randint(1, 999)}",
-            f"qwerty{random.randint(1, 999)}",
-            "12345678",
-            "password",
-            None,  # Contraseña nula
-            "abc",  # Muy corta
-            "12345",  # Solo números corta
-            f"user{random.randint(1, 99)}",  # Sin caracteres especiales ni mayúsculas
-            f"PASSWORD{random.randint(1, 99)}"  # Solo mayúsculas sin números
-        ]
-        return random.choice(options)
-
-    def categorize_invalid_credential(username, password):
-        if not username or not password:
-            return "campos_vacios", "required_fields"
-        elif " " in str(username) or " " in str(password):
-            return "formato_invalido", "invalid_credentials"
-        elif len(str(username)) < 3 or len(str(password)) < 6:
-            return "formato_invalido", "invalid_credentials"
-        elif any(c in str(username) for c in "#@!*$"):
-            return "caracteres_especiales", "invalid_credentials"
-        else:
-            return "inexistente", "invalid_credentials"
-
     # Generar credenciales inválidas exactas
-    invalid_credentials = []
-    for i in range(num_invalid_needed):
-        username = random_invalid_username()
-        password = random_invalid_password()
-        categoria, error_esperado = categorize_invalid_credential(username, password)
-
-        # Crear descripción del error más específica
-        reasons = []
-        if username is None:
-            reasons.append("usuario nulo")
-        elif username == "":
-            reasons.append("usuario vacío")
-        elif password is None:
-            reasons.append("contraseña nula")
-        elif password == "":
-            reasons.append("contraseña vacía")
-        elif len(str(username)) < 3:
-            reasons.append("usuario muy corto")
-        elif len(str(password)) < 6:
-            reasons.append("contraseña muy corta")
-        elif any(c in str(username) for c in "#@!*$"):
-            reasons.append("caracteres especiales en usuario")
-        elif " " in str(username):
-            reasons.append("espacios en usuario")
-        elif " " in str(password):
-            reasons.append("espacios en contraseña")
-        elif str(username).isdigit():
-            reasons.append("usuario solo números")
-        elif str(password).isdigit():
-            reasons.append("contraseña solo números")
-
-        if not reasons:
-            reasons.append("credenciales inexistentes en el sistema")
-
-        invalid_credentials.append({
-            "usuario": username,
-            "clave": password,
-            "descripcion": ", ".join(reasons),
-            "error_esperado": error_esperado,
-            "categoria": categoria
-        })
+    # Motor de mutación: categorías balanceadas, sin duplicados y reproducible con seed
+    fuzzer = CredentialFuzzer(seed=seed, base_users=[c.get("usuario") for c in valid_credentials])
+    invalid_credentials = fuzzer.generate(num_invalid_needed)
 
     # VERIFICACIÓN FINAL - GARANTIZAR CANTIDAD EXACTA
     total_actual = len(valid_credentials) + len(invalid_credentials)
@@ -434,6 +537,8 @@ def generate_demo_credentials(num_credentials=5):
             "biblioteca": "GeminiLibrary",
             "config_centralizada": CONFIG_MANAGER_AVAILABLE,
             "credenciales_desde_config": len(credenciales_centrales) if credenciales_centrales else 0,
+            "motor_invalidas": "mutacion_local",
+            "semilla": seed,
             "distribucion": {
                 "validas": len(valid_credentials),
                 "invalidas": len(invalid_credentials),
@@ -458,6 +563,465 @@ def generate_demo_credentials(num_credentials=5):
     return credentials_data
 
 
+def generate_category_with_gemini(model, categoria, cantidad):
+    """
+    Pide a Gemini credenciales inválidas de una sola categoría
+
+    Returns:
+        list: Credenciales de la categoría (vacía si la respuesta no es utilizable)
+    """
+    error_esperado = ERROR_POR_CATEGORIA.get(categoria, "invalid_credentials")
+    prompt = f"""
+    Genera exactamente {cantidad} credenciales inválidas para testing de SIESA ERP,
+    todas de la categoría "{categoria}" (error esperado: {error_esperado}).
+    Prioriza casos poco comunes y realistas; evita variaciones triviales de longitud,
+    espacios o cadenas de inyección conocidas, que ya se generan localmente.
+
+    Formato JSON requerido:
+    {{
+        "credenciales_invalidas": [
+            {{
+                "usuario": "usuario_problema",
+                "clave": "clave_problema",
+                "descripcion": "razón del error",
+                "error_esperado": "{error_esperado}",
+                "categoria": "{categoria}"
+            }}
+        ]
+    }}
+    """
+    try:
+        response = call_with_retry("gemini", lambda: model.generate_content(prompt), prompt)
+        # response.text lanza si la respuesta fue bloqueada o no trae texto
+        datos = parse_gemini_response(response.text) or {}
+    except Exception as e:
+        print(f"❌ Error generando '{categoria}' con Gemini: {e}")
+        return []
+
+    credenciales = [c for c in datos.get("credenciales_invalidas") or [] if isinstance(c, dict)]
+    # La categoría y el error vienen del plan, no de lo que declare el modelo
+    for credencial in credenciales:
+        credencial["categoria"] = categoria
+        credencial["error_esperado"] = error_esperado
+    return credenciales
+
+
+def _fill_plan(plan, model=None, llm_share=0.2, chunk_size=50, workers=4, seed=None, entorno="qa",
+               vistos=None, base_users=None, index=None, max_retries=1, sink=None):
+    """
+    Llena las cuotas de un plan desde las fuentes más baratas primero
+
+    Con índice de duplicados, las inválidas de la IA ya devueltas en corridas
+    anteriores se descartan y lo que falte del presupuesto se pide otra vez.
+    Con sink(credencial, tipo) cada credencial se entrega al aceptarse y no se
+    acumula: las listas devueltas quedan vacías.
+
+    Returns:
+        tuple: (válidas, inválidas, {cuota: {fuente: cantidad}}, rechazadas por el índice)
+    """
+    vistos = vistos if vistos is not None else set()
+    origen = {}
+    usuarios_validos = []
+
+    def aceptar_valida(credencial):
+        usuarios_validos.append(credencial.get("usuario"))
+        sink(credencial, "valida")
+
+    # Válidas: configuración central (por prioridad) y luego datos locales
+    centrales = [c for c in get_centralized_credentials() or [] if isinstance(c, dict)]
+
+    def local_validas(cantidad):
+        credenciales = []
+        for _ in range(cantidad):
+            role = random_role()
+            credenciales.append({
+                "usuario": f"{random_username()}{random.randint(1, 9999)}",
+                "clave": random_secure_password(),
+                "tipo": role,
+                "descripcion": random_description(role),
+                "estado": "activo",
+                "entorno": entorno
+            })
+        return credenciales
+
+    validas, aportes = fill_quota(plan["validas"], [
+        ("config", lambda n: centrales[:n], None),
+        ("local", local_validas, None),
+        ("local", local_validas, None),
+    ], vistos, sink=aceptar_valida if sink else None)
+    origen["validas"] = aportes
+    usuarios_validos += [c.get("usuario") for c in validas]
+
+    pool = None
+    if any(plan["categorias"].values()):
+        try:
+            pool = CredentialPool(generator=None)
+        except Exception as e:
+            print(f"⚠️ Pool de credenciales no disponible: {e}")
+
+    # Presupuesto de IA por categoría sobre lo que el pool no cubre, pedido en lotes antes de llenar
+    disponibles = {}
+    if pool:
+        try:
+            disponibles = pool.sizes()
+        except Exception as e:
+            print(f"⚠️ Error leyendo el pool de credenciales: {e}")
+    sin_cubrir = {categoria: max(0, cuota - disponibles.get(categoria, 0))
+                  for categoria, cuota in plan["categorias"].items()}
+    ia_por_categoria = {categoria: [] for categoria in plan["categorias"]}
+    recibidas_ia, ids_ia = set(), set()
+    presupuesto = plan_ai_budget(sin_cubrir, llm_share if model else 0)
+    rechazadas = 0
+    for ronda in range(max_retries + 1 if index else 1):
+        trabajos = []
+        for categoria, pedir in presupuesto.items():
+            pedir -= len(ia_por_categoria[categoria])
+            for inicio in range(0, max(0, pedir), max(1, int(chunk_size))):
+                trabajos.append((categoria, min(chunk_size, pedir - inicio)))
+        if not trabajos:
+            break
+        if ronda:
+            print(f"🔁 Pidiendo {sum(n for _, n in trabajos)} credenciales para reemplazar repetidas")
+        else:
+            print(f"📡 Pidiendo a Gemini {sum(n for _, n in trabajos)} credenciales nuevas en {len(trabajos)} lotes...")
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+            resultados = executor.map(lambda trabajo: (trabajo[0], generate_category_with_gemini(model, *trabajo)),
+                                      trabajos)
+            for categoria, credenciales in resultados:
+                for credencial in credenciales:
+                    if _credential_key(credencial) in recibidas_ia:
+                        continue
+                    recibidas_ia.add(_credential_key(credencial))
+                    if index and index.contains(credencial):
+                        rechazadas += 1
+                        continue
+                    ia_por_categoria[categoria].append(credencial)
+                    ids_ia.add(id(credencial))
+
+    base_users = list(base_users or []) + usuarios_validos
+    invalidas = []
+
+    def emitir_invalida(credencial):
+        # Las de la IA entran al índice solo cuando se entregan, no al recibirse
+        if index and id(credencial) in ids_ia:
+            index.add(credencial)
+        if sink:
+            sink(credencial, "invalida")
+        else:
+            invalidas.append(credencial)
+
+    for indice, (categoria, cuota) in enumerate(plan["categorias"].items()):
+        if cuota <= 0:
+            origen[categoria] = {}
+            continue
+        fuentes = []
+        if pool:
+            fuentes.append(("cache", lambda n, c=categoria: pool.peek(c, n), None))
+        if ia_por_categoria[categoria]:
+            fuentes.append(("ia", lambda n, c=categoria: ia_por_categoria[c][:n], None))
+        semilla = None if seed is None else seed + indice
+        # Dos pasadas: la segunda genera de más para cubrir los descartes por duplicado
+        for pasada in range(2):
+            fuentes.append(("local", lambda n, c=categoria, s=semilla, p=pasada: CredentialFuzzer(
+                seed=None if s is None else s * 10 + p, categories=[c], base_users=base_users
+            ).generate(n * (1 + 3 * p) + 10 * p), None))
+
+        _, aportes = fill_quota(cuota, fuentes, vistos, sink=emitir_invalida)
+        origen[categoria] = aportes
+
+    return validas, invalidas, origen, rechazadas
+
+
+def _used_ai(origen):
+    """True si alguna cuota recibió credenciales de la IA"""
+    return any(aportes.get("ia", 0) for aportes in origen.values())
+
+
+def generate_planned_credentials(num_credentials, model=None, valid_ratio=1 / 3, category_ratios=None,
+                                 llm_share=0.2, chunk_size=50, workers=4, seed=None, entorno="qa", index=None):
+    """
+    Genera exactamente num_credentials según un plan de cuotas por categoría
+
+    Las cuotas se fijan antes de generar (restos mayores). Las válidas salen de la
+    configuración central y luego de datos locales. Cada cuota de inválidas se
+    llena en este orden: pool de credenciales ya generadas (sin consumirlo),
+    presupuesto de IA (llm_share del total de inválidas repartido entre las
+    cuotas, al menos una, solo casos nuevos) y motor de
+    mutación local para el resto, que garantiza la cantidad exacta.
+
+    Args:
+        num_credentials: Total de credenciales
+        model: Modelo de Gemini o None para no usar IA
+        valid_ratio: Proporción de credenciales válidas
+        category_ratios: Pesos por categoría de inválidas (dict)
+        llm_share: Fracción de las inválidas pedida a la IA
+        chunk_size: Credenciales por petición a la IA
+        workers: Peticiones simultáneas a la IA
+        seed: Semilla para los datos locales
+        entorno: Entorno de las credenciales válidas locales
+        index: CredentialIndex para descartar inválidas de la IA repetidas entre corridas
+
+    Returns:
+        dict: Credenciales con metadata.distribucion planificada y lograda
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    plan = plan_distribution(num_credentials, valid_ratio, category_ratios)
+    print(f"🗂️ Plan: {plan['validas']} válidas + {plan['invalidas']} inválidas {plan['categorias']}")
+
+    validas, invalidas, origen, rechazadas = _fill_plan(plan, model, llm_share, chunk_size, workers, seed, entorno,
+                                                        index=index)
+
+    random.shuffle(invalidas)
+    lograda = achieved_distribution(validas, invalidas)
+    if lograda["total"] != plan["total"]:
+        print(f"⚠️ Plan de {plan['total']} credenciales, logradas {lograda['total']}")
+    else:
+        print(f"🎯 Plan cumplido: {lograda['validas']} válidas + {lograda['invalidas']} inválidas")
+
+    metadata = _planned_metadata(num_credentials, plan, lograda, origen, seed)
+    if index:
+        metadata["indice_duplicados"] = _save_index(index, rechazadas)
+
+    return {
+        "metadata": metadata,
+        "credenciales_validas": validas,
+        "credenciales_invalidas": invalidas
+    }
+
+
+def _planned_metadata(num_credentials, plan, lograda, origen, seed):
+    """Metadata de una generación completa según el plan"""
+    return {
+        "generado_en": datetime.datetime.now().isoformat(),
+        "cantidad_solicitada": num_credentials,
+        "cantidad_generada": lograda["total"],
+        "proveedor_ia": "gemini" if _used_ai(origen) else "fallback_local",
+        "version": "3.2",
+        "biblioteca": "GeminiLibrary",
+        "config_centralizada": CONFIG_MANAGER_AVAILABLE,
+        "credenciales_desde_config": origen["validas"].get("config", 0),
+        "semilla": seed,
+        "distribucion": {
+            "validas": lograda["validas"],
+            "invalidas": lograda["invalidas"],
+            "total": lograda["total"],
+            "planificada": plan,
+            "lograda": lograda,
+            "por_origen": origen
+        }
+    }
+
+
+def generate_planned_jsonl(output_file, num_credentials, model=None, valid_ratio=1 / 3, category_ratios=None,
+                           llm_share=0.2, chunk_size=50, workers=4, seed=None, entorno="qa", index=None):
+    """
+    Igual que generate_planned_credentials, pero escribe cada credencial en
+    output_file (JSON Lines) a medida que se produce en lugar de acumularlas.
+    Las inválidas quedan agrupadas por categoría (no se mezclan).
+
+    Returns:
+        dict: {"metadata": ..., "escrito_en": output_file} (las credenciales ya están en el archivo)
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    plan = plan_distribution(num_credentials, valid_ratio, category_ratios)
+    print(f"🗂️ Plan: {plan['validas']} válidas + {plan['invalidas']} inválidas {plan['categorias']}")
+
+    tally = DistributionTally()
+    with CredentialJsonlWriter(output_file, {"generado_en": datetime.datetime.now().isoformat(),
+                                             "cantidad_solicitada": num_credentials}) as writer:
+        def sink(credencial, tipo):
+            writer.write(credencial, tipo)
+            tally.add(credencial, tipo)
+
+        _, _, origen, rechazadas = _fill_plan(plan, model, llm_share, chunk_size, workers, seed, entorno,
+                                              index=index, sink=sink)
+        lograda = tally.as_dict()
+        metadata = _planned_metadata(num_credentials, plan, lograda, origen, seed)
+        if index:
+            metadata["indice_duplicados"] = _save_index(index, rechazadas)
+        metadata.update(_file_metadata(output_file))
+        writer.update_metadata(metadata)
+
+    if lograda["total"] != plan["total"]:
+        print(f"⚠️ Plan de {plan['total']} credenciales, logradas {lograda['total']}")
+    else:
+        print(f"🎯 Plan cumplido: {lograda['validas']} válidas + {lograda['invalidas']} inválidas")
+    return {"metadata": metadata, "escrito_en": output_file}
+
+
+def load_existing_credentials(output_file):
+    """
+    Carga un archivo de credenciales existente (JSON o JSON Lines)
+
+    Returns:
+        dict o None si no existe o no se puede leer
+    """
+    if not Path(output_file).exists():
+        return None
+    try:
+        return load_credentials_file(output_file)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No se pudo leer {output_file}, se regenera completo: {e}")
+        return None
+
+
+def top_up_credentials(existing_data, num_credentials, model=None, valid_ratio=1 / 3, category_ratios=None,
+                       llm_share=0.2, chunk_size=50, workers=4, seed=None, entorno="qa", index=None):
+    """
+    Completa un conjunto de credenciales existente generando solo lo que falta
+
+    Calcula el déficit del plan por categoría (y de válidas en el entorno
+    indicado) frente a lo que ya hay, genera únicamente esas credenciales sin
+    repetir las existentes y conserva todo lo anterior.
+
+    Returns:
+        tuple: (credenciales completas, cantidad agregada). Con 0 agregadas los datos no cambian
+    """
+    validas = [c for c in existing_data.get("credenciales_validas") or [] if isinstance(c, dict)]
+    invalidas = [c for c in existing_data.get("credenciales_invalidas") or [] if isinstance(c, dict)]
+
+    plan = plan_distribution(num_credentials, valid_ratio, category_ratios)
+    existentes = achieved_distribution(validas, invalidas)
+    # Las válidas sin entorno declarado sirven para cualquier entorno
+    validas_entorno = sum(1 for c in validas if c.get("entorno", entorno) == entorno)
+    deficit = _plan_deficit(plan, existentes, validas_entorno, entorno)
+    if not deficit:
+        return existing_data, 0
+    seed = _top_up_seed(seed, existentes)
+
+    vistos = {(c.get("usuario"), c.get("clave")) for c in validas + invalidas}
+    nuevas_validas, nuevas_invalidas, origen, rechazadas = _fill_plan(
+        deficit, model, llm_share, chunk_size, workers, seed, entorno, vistos,
+        base_users=[c.get("usuario") for c in validas], index=index)
+
+    validas += nuevas_validas
+    invalidas += nuevas_invalidas
+    agregadas = len(nuevas_validas) + len(nuevas_invalidas)
+    lograda = achieved_distribution(validas, invalidas)
+    print(f"➕ Agregadas {agregadas} credenciales ({lograda['total']} en total)")
+
+    metadata = _top_up_metadata(existing_data.get("metadata"), num_credentials, plan, existentes, lograda,
+                                deficit, origen, agregadas)
+    if index:
+        metadata["indice_duplicados"] = _save_index(index, rechazadas)
+    return dict(existing_data, metadata=metadata, credenciales_validas=validas,
+                credenciales_invalidas=invalidas), agregadas
+
+
+def top_up_jsonl(output_file, num_credentials, model=None, valid_ratio=1 / 3, category_ratios=None,
+                 llm_share=0.2, chunk_size=50, workers=4, seed=None, entorno="qa", index=None):
+    """
+    Completa un archivo JSON Lines existente sin cargarlo en memoria
+
+    Una pasada cuenta lo existente (conteos por categoría y el set de
+    (usuario, clave)); si hay déficit, una segunda pasada copia el archivo a un
+    temporal y las credenciales nuevas se escriben detrás a medida que se generan.
+
+    Returns:
+        tuple: ({"metadata": ..., "escrito_en": output_file} o None si el archivo no se puede leer,
+                cantidad agregada)
+    """
+    plan = plan_distribution(num_credentials, valid_ratio, category_ratios)
+    tally = DistributionTally()
+    vistos, usuarios_validos = set(), []
+    validas_entorno = 0
+    try:
+        metadata_existente = read_jsonl_metadata(output_file)["metadata"]
+        for tipo, credencial in iter_records(output_file):
+            tally.add(credencial, tipo)
+            vistos.add((credencial.get("usuario"), credencial.get("clave")))
+            if tipo == "valida":
+                usuarios_validos.append(credencial.get("usuario"))
+                # Las válidas sin entorno declarado sirven para cualquier entorno
+                validas_entorno += credencial.get("entorno", entorno) == entorno
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No se pudo leer {output_file}, se regenera completo: {e}")
+        return None, 0
+
+    existentes = tally.as_dict()
+    deficit = _plan_deficit(plan, existentes, validas_entorno, entorno)
+    if not deficit:
+        return {"metadata": metadata_existente}, 0
+    seed = _top_up_seed(seed, existentes)
+
+    with CredentialJsonlWriter(output_file, metadata_existente) as writer:
+        # El original no se toca hasta el renombrado final del escritor
+        for tipo, credencial in iter_records(output_file):
+            writer.write(credencial, tipo)
+
+        def sink(credencial, tipo):
+            writer.write(credencial, tipo)
+            tally.add(credencial, tipo)
+
+        _, _, origen, rechazadas = _fill_plan(deficit, model, llm_share, chunk_size, workers, seed, entorno, vistos,
+                                              base_users=usuarios_validos, index=index, sink=sink)
+        lograda = tally.as_dict()
+        agregadas = lograda["total"] - existentes["total"]
+        metadata = _top_up_metadata(metadata_existente, num_credentials, plan, existentes, lograda,
+                                    deficit, origen, agregadas)
+        if index:
+            metadata["indice_duplicados"] = _save_index(index, rechazadas)
+        metadata.update(_file_metadata(output_file))
+        writer.update_metadata(metadata)
+
+    print(f"➕ Agregadas {agregadas} credenciales ({lograda['total']} en total)")
+    return {"metadata": metadata, "escrito_en": output_file}, agregadas
+
+
+def _plan_deficit(plan, existentes, validas_entorno, entorno):
+    """Credenciales que faltan para cumplir el plan, o None si lo existente ya lo cubre"""
+    deficit = {
+        "validas": max(0, plan["validas"] - validas_entorno),
+        "categorias": {categoria: max(0, cuota - existentes["categorias"].get(categoria, 0))
+                       for categoria, cuota in plan["categorias"].items()},
+    }
+    if not deficit["validas"] + sum(deficit["categorias"].values()):
+        print(f"✅ {existentes['total']} credenciales existentes ya cubren el plan: nada que generar")
+        return None
+    print(f"🧩 Déficit: {deficit['validas']} válidas ({entorno}) + {deficit['categorias']}")
+    return deficit
+
+
+def _top_up_seed(seed, existentes):
+    if seed is not None:
+        # Distinta secuencia por tamaño existente: no repetir las mismas credenciales de la corrida anterior
+        seed = seed + existentes["total"]
+        random.seed(seed)
+    return seed
+
+
+def _top_up_metadata(metadata, num_credentials, plan, existentes, lograda, deficit, origen, agregadas):
+    """Metadata existente actualizada tras completar el plan"""
+    metadata = dict(metadata or {})
+    distribucion = dict(metadata.get("distribucion") or {})
+    distribucion.update({
+        "validas": lograda["validas"],
+        "invalidas": lograda["invalidas"],
+        "total": lograda["total"],
+        "planificada": plan,
+        "lograda": lograda,
+        "por_origen": origen
+    })
+    if _used_ai(origen):
+        metadata["proveedor_ia"] = "gemini"
+    metadata.update({
+        "actualizado_en": datetime.datetime.now().isoformat(),
+        "cantidad_solicitada": num_credentials,
+        "cantidad_generada": lograda["total"],
+        "distribucion": distribucion,
+        "incremental": {
+            "existentes": existentes["total"],
+            "agregadas": agregadas,
+            "deficit": deficit
+        }
+    })
+    return metadata
+
+
 def replace_valid_credentials_with_central(credentials_data):
     """
     Reemplaza credenciales válidas generadas con las del sistema centralizado
@@ -517,9 +1081,26 @@ def update_robot_script(credentials_data, output_file):
     print("🔧 Actualizando archivo Robot para usar configuración centralizada...")
 
 
+def _file_metadata(output_file):
+    return {
+        "archivo_generado": output_file,
+        "generador_version": "v1.2",
+        "config_centralizada_disponible": CONFIG_MANAGER_AVAILABLE,
+    }
+
+
+def _counts(credentials_data):
+    """(válidas, inválidas) de las listas o, si se escribieron en streaming, de la metadata"""
+    if "credenciales_validas" in credentials_data or "credenciales_invalidas" in credentials_data:
+        return (len(credentials_data.get("credenciales_validas") or []),
+                len(credentials_data.get("credenciales_invalidas") or []))
+    distribucion = credentials_data.get("metadata", {}).get("distribucion", {})
+    return distribucion.get("validas", 0), distribucion.get("invalidas", 0)
+
+
 def save_credentials(credentials_data, output_file):
     """
-    Guarda las credenciales en un archivo JSON
+    Guarda las credenciales en un archivo JSON, o JSON Lines si output_file termina en .jsonl
     """
     try:
         # Crear directorio si no existe
@@ -528,21 +1109,24 @@ def save_credentials(credentials_data, output_file):
 
         # Agregar información del archivo generado a metadata
         if "metadata" in credentials_data:
-            credentials_data["metadata"]["archivo_generado"] = output_file
-            credentials_data["metadata"]["generador_version"] = "v1.2"
-            credentials_data["metadata"]["config_centralizada_disponible"] = CONFIG_MANAGER_AVAILABLE
+            credentials_data["metadata"].update(_file_metadata(output_file))
 
-        # Guardar archivo
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(credentials_data, f, indent=2, ensure_ascii=False)
+        # Guardar archivo (las generaciones en JSON Lines ya lo escribieron credencial a credencial)
+        if credentials_data.get("escrito_en") == output_file:
+            pass
+        elif is_jsonl_path(output_file):
+            write_credentials_jsonl(output_file, credentials_data)
+        else:
+            # Archivo temporal y renombrado atómico: un lector nunca ve un JSON a medias
+            temporal = output_path.with_name(output_path.name + ".tmp")
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(credentials_data, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, output_path)
 
         print(f"✅ Credenciales guardadas en: {output_file}")
 
         # Mostrar resumen
-        valid_count = len(credentials_data.get("credenciales_validas", []))
-        invalid_count = len(credentials_data.get("credenciales_invalidas", []))
-        total_count = valid_count + invalid_count
-
+        valid_count, invalid_count = _counts(credentials_data)
         print(f"📊 Total: {valid_count} válidas, {invalid_count} inválidas")
 
         return True
@@ -563,14 +1147,62 @@ def main():
     parser.add_argument("--environment", "-e", default="qa", help="Entorno (qa, staging, prod)")
     parser.add_argument("--model", "-m", default="gemini-1.5-flash", help="Modelo de Gemini a usar")
     parser.add_argument("--validate-config", action="store_true", help="Validar configuración antes de generar")
+    parser.add_argument("--format", "-f", choices=["json", "jsonl"],
+                        help="Formato de salida. Por defecto según la extensión de --output")
+    parser.add_argument("--seed", type=int, help="Semilla para credenciales de demostración reproducibles")
+    parser.add_argument("--chunk-size", type=int, default=50,
+                        help="Credenciales por petición a Gemini. Con plan acota cada petición por categoría; "
+                             "con --no-plan, cantidades mayores se generan en lotes")
+    parser.add_argument("--workers", type=int, default=4, help="Peticiones a Gemini en paralelo como máximo")
+    parser.add_argument("--valid-ratio", type=float, default=0.33, help="Proporción de credenciales válidas del plan")
+    parser.add_argument("--category-ratios",
+                        help="Pesos por categoría de inválidas, ej. campos_vacios=2,inexistente=1")
+    parser.add_argument("--llm-share", type=float, default=0.2,
+                        help="Fracción de las inválidas pedida a Gemini, repartida entre las cuotas (el resto es local)")
+    parser.add_argument("--no-plan", action="store_true",
+                        help="Generación anterior sin plan de cuotas por categoría")
+    parser.add_argument("--incremental", "-i", action="store_true",
+                        help="Completar el archivo de salida existente generando solo lo que falta")
+    parser.add_argument("--no-index", action="store_true",
+                        help="No descartar credenciales de IA ya generadas en corridas anteriores")
 
     args = parser.parse_args()
 
+    category_ratios = None
+    if args.category_ratios:
+        try:
+            category_ratios = parse_ratios(args.category_ratios)
+        except ValueError as e:
+            parser.error(str(e))
+    use_plan = not args.no_plan
+
+    # El índice solo filtra lo que devuelve la IA: las credenciales locales no se registran
+    index = None
+    if not args.no_index:
+        try:
+            index = get_credential_index()
+        except Exception as e:
+            print(f"⚠️ Índice de credenciales no disponible: {e}")
+
+    # --format jsonl con salida .json: cambiar la extensión para que coincida
+    if args.format == "jsonl" and not is_jsonl_path(args.output):
+        args.output = str(Path(args.output).with_suffix(".jsonl"))
+    elif args.format == "json" and is_jsonl_path(args.output):
+        args.output = str(Path(args.output).with_suffix(".json"))
+    # Con plan y salida JSON Lines cada credencial se escribe al generarse, sin acumularlas
+    stream = use_plan and is_jsonl_path(args.output)
+
     print(f"📋 Configuración:")
     print(f"   - Cantidad: {args.quantity}")
     print(f"   - Modelo: {args.model}")
     print(f"   - Salida: {args.output}")
     print(f"   - Entorno: {args.environment}")
+    if use_plan:
+        print(f"   - Plan: {args.valid_ratio:.0%} válidas, {args.llm_share:.0%} de las inválidas con IA")
+    if use_plan:
+        print(f"   - Peticiones IA: hasta {args.chunk_size} credenciales por categoría, {args.workers} en paralelo")
+    elif args.quantity > args.chunk_size:
+        print(f"   - Lotes: {args.chunk_size} credenciales, {args.workers} en paralelo")
     print()
 
     # Validar configuración si se solicita
@@ -579,7 +1211,7 @@ def main():
         if CONFIG_MANAGER_AVAILABLE:
             try:
                 config_manager = ConfigManager()
-                credentials = config_manager.get_all_credentials()
+                credentials = config_manager.get_all_valid_credentials()
                 print(f"✅ ConfigManager: {len(credentials)} credenciales disponibles")
             except Exception as e:
                 print(f"⚠️ Error en ConfigManager: {e}")
@@ -589,6 +1221,39 @@ def main():
     # Obtener API key de Gemini
     api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
 
+    # Modo incremental: completar el archivo existente en lugar de regenerarlo
+    if args.incremental:
+        # En JSON Lines el archivo existente se recorre sin cargarlo en memoria
+        existing_data = load_existing_credentials(args.output) if use_plan and not stream else None
+        existe = Path(args.output).exists() if stream else existing_data is not None
+        if not use_plan:
+            print("⚠️ --incremental requiere el plan de cuotas. Se regenera el archivo completo.")
+        elif not existe:
+            print(f"ℹ️ {args.output} no existe todavía. Se genera completo.")
+        else:
+            model = None
+            if api_key and GEMINI_AVAILABLE and args.llm_share > 0:
+                model = setup_gemini(api_key)
+            top_up_args = (args.quantity, model, args.valid_ratio, category_ratios, args.llm_share,
+                           args.chunk_size, args.workers, args.seed, args.environment, index)
+            if stream:
+                credentials_data, agregadas = top_up_jsonl(args.output, *top_up_args)
+            else:
+                credentials_data, agregadas = top_up_credentials(existing_data, *top_up_args)
+            if credentials_data is None:
+                pass  # Archivo ilegible: se genera completo
+            elif not agregadas:
+                print("🎉 Proceso completado (sin cambios)")
+                return 0
+            elif save_credentials(credentials_data, args.output):
+                update_robot_script(credentials_data, args.output)
+                print()
+                print("🎉 Proceso completado")
+                return 0
+            else:
+                print("❌ Error guardando credenciales")
+                return 1
+
     if api_key and GEMINI_AVAILABLE:
         print("🔑 Usando API key de Gemini")
         print(f"🤖 Modelo seleccionado: {args.model}")
@@ -598,54 +1263,56 @@ def main():
 
         if model:
             # Intentar generar con Gemini
-            response_text = generate_with_gemini(model, args.quantity, args.environment)
-
-            if response_text:
-                print("✅ Respuesta recibida de Gemini")
-
-                # Parsear respuesta
-                credentials_data = parse_gemini_response(response_text)
+            if stream:
+                credentials_data = generate_planned_jsonl(args.output, args.quantity, model, args.valid_ratio,
+                                                          category_ratios, args.llm_share, args.chunk_size,
+                                                          args.workers, args.seed, args.environment, index)
+            elif use_plan:
+                credentials_data = generate_planned_credentials(args.quantity, model, args.valid_ratio,
+                                                                category_ratios, args.llm_share,
+                                                                args.chunk_size, args.workers, args.seed,
+                                                                args.environment, index)
+            else:
+                credentials_data = generate_credentials_with_gemini(model, args.quantity, args.environment,
+                                                                    args.chunk_size, args.workers, index)
 
-                if credentials_data:
-                    print("✅ JSON extraído y parseado correctamente")
+            if credentials_data:
+                print("✅ JSON extraído y parseado correctamente")
 
-                    # Reemplazar credenciales válidas con las centralizadas
+                # Reemplazar credenciales válidas con las centralizadas (el plan ya las usa primero)
+                if not use_plan:
                     credentials_data = replace_valid_credentials_with_central(credentials_data)
 
-                    # Guardar credenciales
-                    if save_credentials(credentials_data, args.output):
-                        print("🔧 Configuración centralizada: ACTIVA")
+                # Guardar credenciales
+                if save_credentials(credentials_data, args.output):
+                    print("🔧 Configuración centralizada: ACTIVA")
 
-                        # Actualizar script Robot Framework
-                        update_robot_script(credentials_data, args.output)
+                    # Actualizar script Robot Framework
+                    update_robot_script(credentials_data, args.output)
 
-                        # Resumen final
-                        print()
-                        print("🎯 RESUMEN FINAL v1.2:")
+                    # Resumen final
+                    print()
+                    print("🎯 RESUMEN FINAL v1.2:")
 
-                        if CONFIG_MANAGER_AVAILABLE:
-                            try:
-                                config_manager = ConfigManager()
-                                central_creds = config_manager.get_all_credentials()
-                                print(f"✅ Credenciales cargadas desde configuración central: {len(central_creds)}")
-                            except:
-                                print("⚠️ Error accediendo a configuración central")
+                    if CONFIG_MANAGER_AVAILABLE:
+                        try:
+                            config_manager = ConfigManager()
+                            central_creds = config_manager.get_all_valid_credentials()
+                            print(f"✅ Credenciales cargadas desde configuración central: {len(central_creds)}")
+                        except:
+                            print("⚠️ Error accediendo a configuración central")
 
-                        print("✅ Sistema de configuración centralizada: ACTIVO")
+                    print("✅ Sistema de configuración centralizada: ACTIVO")
 
-                        valid_count = len(credentials_data.get("credenciales_validas", []))
-                        print(f"📊 Credenciales desde configuración central: {valid_count}")
+                    valid_count = _counts(credentials_data)[0]
+                    print(f"📊 Credenciales desde configuración central: {valid_count}")
 
-                        print()
-                        print("🎉 Proceso completado")
-                        return 0
-                    else:
-                        print("❌ Error guardando credenciales")
-                        return 1
+                    print()
+                    print("🎉 Proceso completado")
+                    return 0
                 else:
-                    print("❌ Error parseando respuesta de Gemini")
-            else:
-                print("❌ Error obteniendo respuesta de Gemini")
+                    print("❌ Error guardando credenciales")
+                    return 1
         else:
             print("❌ Error configurando Gemini")
     else:
@@ -656,7 +1323,14 @@ def main():
 
     # Fallback: generar credenciales de demostración
     print("📡 Generando credenciales en modo de demostración...")
-    credentials_data = generate_demo_credentials(args.quantity)
+    if stream:
+        credentials_data = generate_planned_jsonl(args.output, args.quantity, None, args.valid_ratio,
+                                                  category_ratios, seed=args.seed, entorno=args.environment)
+    elif use_plan:
+        credentials_data = generate_planned_credentials(args.quantity, None, args.valid_ratio, category_ratios,
+                                                        seed=args.seed, entorno=args.environment)
+    else:
+        credentials_data = generate_demo_credentials(args.quantity, seed=args.seed)
 
     if save_credentials(credentials_data, args.output):
         print("🔧 Configuración centralizada: ACTIVA")
@@ -671,14 +1345,14 @@ def main():
         if CONFIG_MANAGER_AVAILABLE:
             try:
                 config_manager = ConfigManager()
-                central_creds = config_manager.get_all_credentials()
+                central_creds = config_manager.get_all_valid_credentials()
                 print(f"✅ Credenciales cargadas desde configuración central: {len(central_creds)}")
             except:
                 print("⚠️ Error accediendo a configuración central")
 
         print("✅ Sistema de configuración centralizada: ACTIVO")
 
-        valid_count = len(credentials_data.get("credenciales_validas", []))
+        valid_count = _counts(credentials_data)[0]
         print(f"📊 Credenciales desde configuración central: {valid_count}")
 
         print()
@@ -2,7 +2,9 @@
 # VERSIÓN v1.2: Sistema de configuración centralizada integrado
 import os
 import sys
+import argparse
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import json
@@ -28,13 +30,16 @@ except:
     except:
         pass
 
-# Importación condicional de Gemini AI para análisis avanzado
-try:
-    import google.generativeai as genai
+# Añadir directorio padre para imports del proyecto
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from libraries.ai_clients import get_gemini_model
+from libraries.ai_rate_limiter import call_with_retry, get_rate_limiter
+from libraries.error_signatures import agrupar_por_firma
+from libraries.lazy_imports import module_available
 
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+# El SDK de Gemini se importa con el primer análisis
+GEMINI_AVAILABLE = module_available("google.generativeai")
 
 
 def create_directory_if_not_exists(directory):
@@ -44,11 +49,78 @@ def create_directory_if_not_exists(directory):
 
 
 def parse_robot_output(xml_path):
-    """Parsea el archivo XML de salida de Robot Framework"""
+    """
+    Parsea el archivo XML de salida de Robot Framework en una sola pasada (iterparse)
+
+    Los elementos se liberan a medida que se procesan, por lo que la memoria usada es
+    proporcional al número de tests y no al tamaño del XML.
+
+    Returns:
+        dict: {'suite_name', 'suite_status', 'tests'} o None si hay error
+    """
+    results = {
+        'suite_name': 'Sin nombre',
+        'suite_status': None,
+        'tests': []
+    }
+
+    # Pila de elementos abiertos: permite saber el padre directo de cada elemento
+    stack = []
+    current_test = None
+    test_depth = None
+
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        return root
+        for event, element in ET.iterparse(xml_path, events=('start', 'end')):
+            if event == 'start':
+                stack.append(element)
+                tag = element.tag
+
+                if tag == 'suite' and len(stack) == 2:
+                    results['suite_name'] = element.get('name', 'Sin nombre')
+                elif tag == 'test':
+                    current_test = {
+                        'name': element.get('name', 'Sin nombre'),
+                        'status': 'UNKNOWN',
+                        'message': '',
+                        'documentation': element.get('doc', ''),
+                        'tags': [],
+                        'keywords': [],
+                        'execution_time': 'N/A'
+                    }
+                    test_depth = len(stack)
+                elif tag == 'kw' and current_test is not None:
+                    kw_name = element.get('name', '')
+                    # Limitar a los primeros 5 para no sobrecargar el informe
+                    if kw_name and kw_name not in current_test['keywords'] and len(current_test['keywords']) < 5:
+                        current_test['keywords'].append(kw_name)
+                continue
+
+            stack.pop()
+            tag = element.tag
+            parent = stack[-1] if stack else None
+
+            if tag == 'status':
+                if current_test is not None and len(stack) == test_depth:
+                    # Estado directo del test (no el de sus keywords)
+                    current_test['status'] = element.get('status', 'UNKNOWN')
+                    current_test['message'] = element.text or ''
+                    current_test['execution_time'] = extract_test_execution_time(element)
+                elif len(stack) == 2 and parent.tag == 'suite':
+                    results['suite_status'] = dict(element.attrib)
+            elif tag == 'tag':
+                if current_test is not None and len(stack) == test_depth + 1 and parent.tag == 'tags':
+                    current_test['tags'].append(element.text)
+            elif tag == 'test':
+                results['tests'].append(current_test)
+                current_test = None
+                test_depth = None
+
+            # Liberar el elemento procesado (salvo la raíz y la suite, que siguen abiertas)
+            if parent is not None and tag != 'suite':
+                element.clear()
+                parent.remove(element)
+
+        return results
     except Exception as e:
         print(f"❌ Error al leer el archivo XML: {e}")
         return None
@@ -108,39 +180,6 @@ def extract_test_execution_time(status_element):
         return "Error calculando tiempo"
 
 
-def collect_test_details(test_element):
-    """Recoge todos los detalles importantes de un test"""
-    status = test_element.find('status')
-    test_status = status.get('status', 'UNKNOWN') if status is not None else 'UNKNOWN'
-    test_message = status.text if status is not None and status.text else ''
-
-    # Extraer tags
-    tags = []
-    tags_element = test_element.find('tags')
-    if tags_element is not None:
-        for tag in tags_element.findall('tag'):
-            tags.append(tag.text)
-
-    # Extraer keywords ejecutados
-    keywords = []
-    for kw in test_element.findall('.//kw'):
-        kw_name = kw.get('name', '')
-        if kw_name and kw_name not in keywords:
-            keywords.append(kw_name)
-
-    execution_time = extract_test_execution_time(status)
-
-    return {
-        'name': test_element.get('name', 'Sin nombre'),
-        'status': test_status,
-        'message': test_message,
-        'documentation': test_element.get('doc', ''),
-        'tags': tags,
-        'keywords': keywords[:5],  # Limitar a los primeros 5 para no sobrecargar el informe
-        'execution_time': execution_time
-    }
-
-
 def analyze_error_with_gemini(test_name, error_message, model="gemini-1.5-flash"):
     """
     Analiza un error usando Gemini AI para generar recomendaciones más precisas
@@ -151,8 +190,7 @@ def analyze_error_with_gemini(test_name, error_message, model="gemini-1.5-flash"
         return get_basic_recommendations(error_message)
 
     try:
-        genai.configure(api_key=api_key)
-        gemini_model = genai.GenerativeModel(model)
+        gemini_model = get_gemini_model(model, api_key)
 
         prompt = f"""
         Analiza el siguiente error de una prueba automatizada con Robot Framework y Selenium:
@@ -173,19 +211,12 @@ def analyze_error_with_gemini(test_name, error_message, model="gemini-1.5-flash"
         }}
         """
 
-        response = gemini_model.generate_content(prompt)
-        response_text = response.text.strip()
-
-        # Limpiar respuesta si viene con markdown
-        if response_text.startswith('```'):
-            lines = response_text.split('\n')
-            start_idx = next((i for i, line in enumerate(lines) if line.strip().startswith('{')), 0)
-            end_idx = next((i for i in range(len(lines) - 1, -1, -1) if lines[i].strip().endswith('}')), len(lines) - 1)
-            response_text = '\n'.join(lines[start_idx:end_idx + 1])
+        response = call_with_retry("gemini", lambda: gemini_model.generate_content(prompt), prompt)
+        response_text = clean_json_response(response.text.strip())
 
         try:
             analysis = json.loads(response_text)
-            return analysis
+            return normalize_analysis(analysis, error_message)
         except json.JSONDecodeError:
             return get_basic_recommendations(error_message)
 
@@ -194,6 +225,137 @@ def analyze_error_with_gemini(test_name, error_message, model="gemini-1.5-flash"
         return get_basic_recommendations(error_message)
 
 
+def clean_json_response(response_text):
+    """Limpia la respuesta si viene envuelta en un bloque markdown"""
+    if response_text.startswith('```'):
+        lines = response_text.split('\n')
+        start_idx = next((i for i, line in enumerate(lines) if line.strip().startswith('{')), 0)
+        end_idx = next((i for i in range(len(lines) - 1, -1, -1) if lines[i].strip().endswith('}')), len(lines) - 1)
+        response_text = '\n'.join(lines[start_idx:end_idx + 1])
+    return response_text
+
+
+def normalize_analysis(analysis, error_message):
+    """Valida un análisis de IA; si le faltan campos usa las recomendaciones básicas"""
+    if not isinstance(analysis, dict) or 'causa_probable' not in analysis or 'recomendaciones' not in analysis:
+        return get_basic_recommendations(error_message)
+
+    if not isinstance(analysis['recomendaciones'], list):
+        analysis['recomendaciones'] = [str(analysis['recomendaciones'])]
+
+    return analysis
+
+
+def analyze_errors_batch_with_gemini(errors, model="gemini-1.5-flash"):
+    """
+    Analiza varios errores en un único prompt y reparte la respuesta por test
+
+    Args:
+        errors: Lista de tuplas (id, nombre_test, mensaje_error)
+        model: Modelo de Gemini a utilizar
+
+    Returns:
+        dict: id -> análisis. Los ids ausentes o inválidos en la respuesta
+              reciben las recomendaciones básicas
+    """
+    api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
+    results = {}
+
+    if GEMINI_AVAILABLE and api_key:
+        try:
+            gemini_model = get_gemini_model(model, api_key)
+
+            errors_json = json.dumps(
+                [{"id": str(error_id), "test": test_name, "error": error_message}
+                 for error_id, test_name, error_message in errors],
+                indent=2, ensure_ascii=False)
+
+            prompt = f"""
+            Analiza los siguientes errores de pruebas automatizadas con Robot Framework y Selenium.
+            Cada error tiene un "id" que debes conservar en tu respuesta.
+
+            ERRORES:
+            {errors_json}
+
+            Proporciona recomendaciones específicas y prácticas para solucionar cada uno.
+            Responde SOLO en formato JSON, con un elemento por cada id recibido:
+            {{
+                "analisis": [
+                    {{
+                        "id": "id del error",
+                        "causa_probable": "causa más probable del error",
+                        "recomendaciones": [
+                            "recomendación 1 específica y accionable",
+                            "recomendación 2 específica y accionable",
+                            "recomendación 3 específica y accionable"
+                        ],
+                        "categoria": "tipo de error (timeout/locator/credential/network/etc)"
+                    }}
+                ]
+            }}
+            """
+
+            response = call_with_retry("gemini", lambda: gemini_model.generate_content(prompt), prompt)
+            data = json.loads(clean_json_response(response.text.strip()))
+
+            for item in data.get("analisis", []):
+                if isinstance(item, dict) and "id" in item:
+                    results[str(item["id"])] = item
+        except Exception as e:
+            print(f"⚠️ Error analizando lote con Gemini: {e}")
+
+    # Fallback por test para los que falten o vengan incompletos
+    analyses = {}
+    for error_id, test_name, error_message in errors:
+        analyses[error_id] = normalize_analysis(results.get(str(error_id)), error_message)
+    return analyses
+
+
+def analyze_errors_concurrently(errors, workers=4, requests_per_minute=None, batch_size=1, model="gemini-1.5-flash"):
+    """
+    Analiza errores en paralelo respetando el límite de llamadas por minuto del proveedor
+
+    Args:
+        errors: Lista de tuplas (id, nombre_test, mensaje_error)
+        workers: Número de llamadas simultáneas
+        requests_per_minute: Máximo de llamadas por minuto (0 = sin límite). Por defecto el de
+                             config/ai_providers.json
+        batch_size: Errores por prompt; 1 analiza cada error por separado
+
+    Returns:
+        dict: id -> análisis
+    """
+    if not errors:
+        return {}
+
+    # El limitador compartido espacia las llamadas de todos los hilos
+    limiter = get_rate_limiter("gemini", requests_per_minute=requests_per_minute)
+    limite = f"máximo {int(limiter.requests_per_minute) or 'sin límite'}/min"
+
+    batch_size = max(1, int(batch_size))
+    batches = [errors[i:i + batch_size] for i in range(0, len(errors), batch_size)]
+
+    def run_batch(batch):
+        if len(batch) == 1:
+            error_id, test_name, error_message = batch[0]
+            return {error_id: analyze_error_with_gemini(test_name, error_message, model)}
+        return analyze_errors_batch_with_gemini(batch, model)
+
+    print(f"🤖 Analizando {len(errors)} errores con IA: {len(batches)} llamadas, "
+          f"{workers} en paralelo, {limite}")
+
+    analyses = {}
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        for batch, future in [(batch, executor.submit(run_batch, batch)) for batch in batches]:
+            try:
+                analyses.update(future.result())
+            except Exception as e:
+                print(f"⚠️ Error en análisis concurrente: {e}")
+                for error_id, _, error_message in batch:
+                    analyses[error_id] = get_basic_recommendations(error_message)
+    return analyses
+
+
 def get_basic_recommendations(error_message):
     """Recomendaciones básicas basadas en patrones comunes"""
     error_lower = error_message.lower() if error_message else ""
@@ -244,29 +406,41 @@ def get_basic_recommendations(error_message):
         }
 
 
-def create_markdown_report(xml_root, output_path):
-    """Crea un informe en formato Markdown mejorado a partir del XML de salida"""
-    if xml_root is None:
+def create_markdown_report(results, output_path, ai_workers=4, ai_requests_per_minute=None, ai_batch_size=1):
+    """
+    Crea un informe en formato Markdown mejorado a partir del resumen de parse_robot_output
+
+    Args:
+        results: Resumen devuelto por parse_robot_output
+        output_path: Ruta del archivo markdown
+        ai_workers: Llamadas simultáneas a la IA para las recomendaciones
+        ai_requests_per_minute: Límite de llamadas por minuto a la IA (por defecto el configurado)
+        ai_batch_size: Tests fallidos por prompt (1 = un prompt por firma de error)
+    """
+    if results is None:
         return
 
     # Obtener información básica
-    suite = xml_root.find('suite')
-    suite_name = suite.get('name', 'Sin nombre') if suite else 'Sin nombre'
-
-    # Calcular estadísticas
-    all_tests = xml_root.findall('.//test')
-    passed_tests = xml_root.findall('.//test/status[@status="PASS"]')
-    failed_tests = xml_root.findall('.//test/status[@status="FAIL"]')
+    suite_name = results['suite_name']
+
+    # Calcular estadísticas en una sola pasada sobre el resumen compacto
+    all_tests = results['tests']
+    failed_list = []
+    passed_list = []
+    for test_details in all_tests:
+        if test_details['status'] == 'FAIL':
+            failed_list.append(test_details)
+        elif test_details['status'] == 'PASS':
+            passed_list.append(test_details)
 
     total = len(all_tests)
-    pass_count = len(passed_tests)
-    fail_count = len(failed_tests)
+    pass_count = len(passed_list)
+    fail_count = len(failed_list)
 
     pass_percentage = (pass_count / total) * 100 if total > 0 else 0
 
     # Extraer tiempo total de ejecución
-    status_element = xml_root.find('suite/status')
-    total_execution_time = extract_test_execution_time(status_element)
+    total_execution_time = extract_test_execution_time(results['suite_status'])
 
     # Fecha actual formateada
     current_date = datetime.now().strftime("%Y-%m-%d")
@@ -305,52 +479,44 @@ def create_markdown_report(xml_root, output_path):
     if fail_count > 0:
         report_content.append("\n### ❌ Tests Fallidos")
 
-        for test in all_tests:
-            status = test.find('status')
-            if status is not None and status.get('status') == 'FAIL':
-                test_details = collect_test_details(test)
-
-                report_content.append(f"\n#### 🔴 {test_details['name']}")
+        for test_details in failed_list:
+            report_content.append(f"\n#### 🔴 {test_details['name']}")
 
-                if test_details['documentation']:
-                    report_content.append(f"\n**Descripción:** {test_details['documentation']}")
+            if test_details['documentation']:
+                report_content.append(f"\n**Descripción:** {test_details['documentation']}")
 
-                # Tags como badges
-                if test_details['tags']:
-                    tags_str = ' '.join([f"`{tag}`" for tag in test_details['tags']])
-                    report_content.append(f"\n**Tags:** {tags_str}")
+            # Tags como badges
+            if test_details['tags']:
+                tags_str = ' '.join([f"`{tag}`" for tag in test_details['tags']])
+                report_content.append(f"\n**Tags:** {tags_str}")
 
-                report_content.append(f"\n**Tiempo de ejecución:** {test_details['execution_time']}")
+            report_content.append(f"\n**Tiempo de ejecución:** {test_details['execution_time']}")
 
-                # Mensaje de error con formato para destacarlo
-                if test_details['message']:
-                    report_content.append(f"\n**Error:** ```\n{test_details['message']}\n```")
+            # Mensaje de error con formato para destacarlo
+            if test_details['message']:
+                report_content.append(f"\n**Error:** ```\n{test_details['message']}\n```")
 
-                # Acciones ejecutadas (opcional, para dar contexto)
-                if test_details['keywords']:
-                    keywords_list = ", ".join(test_details['keywords'])
-                    report_content.append(f"\n**Acciones principales:** {keywords_list}...")
+            # Acciones ejecutadas (opcional, para dar contexto)
+            if test_details['keywords']:
+                keywords_list = ", ".join(test_details['keywords'])
+                report_content.append(f"\n**Acciones principales:** {keywords_list}...")
 
     # Luego listar tests exitosos
     if pass_count > 0:
         report_content.append("\n### ✅ Tests Exitosos")
 
-        for test in all_tests:
-            status = test.find('status')
-            if status is not None and status.get('status') == 'PASS':
-                test_details = collect_test_details(test)
+        for test_details in passed_list:
+            report_content.append(f"\n#### 🟢 {test_details['name']}")
 
-                report_content.append(f"\n#### 🟢 {test_details['name']}")
+            if test_details['documentation']:
+                report_content.append(f"\n**Descripción:** {test_details['documentation']}")
 
-                if test_details['documentation']:
-                    report_content.append(f"\n**Descripción:** {test_details['documentation']}")
+            # Tags como badges
+            if test_details['tags']:
+                tags_str = ' '.join([f"`{tag}`" for tag in test_details['tags']])
+                report_content.append(f"\n**Tags:** {tags_str}")
 
-                # Tags como badges
-                if test_details['tags']:
-                    tags_str = ' '.join([f"`{tag}`" for tag in test_details['tags']])
-                    report_content.append(f"\n**Tags:** {tags_str}")
-
-                report_content.append(f"\n**Tiempo de ejecución:** {test_details['execution_time']}")
+            report_content.append(f"\n**Tiempo de ejecución:** {test_details['execution_time']}")
 
     # Añadir sección con sugerencias para tests fallidos usando IA
     if fail_count > 0:
@@ -358,29 +524,52 @@ def create_markdown_report(xml_root, output_path):
         report_content.append(
             "\nA continuación se presentan sugerencias generadas con IA para solucionar los problemas encontrados:")
 
-        for test in all_tests:
-            status = test.find('status')
-            if status is not None and status.get('status') == 'FAIL':
-                test_name = test.get('name', 'Sin nombre')
-                test_message = status.text if status.text else 'Error no especificado'
+        failed_items = [
+            (index, test_details['name'], test_details['message'] or 'Error no especificado')
+            for index, test_details in enumerate(failed_list)
+        ]
+
+        # Un análisis de IA por firma de error, compartido por todos los tests del grupo
+        clusters = list(agrupar_por_firma(failed_items, mensaje=lambda item: item[2]).values())
+
+        if len(clusters) < len(failed_items):
+            print(f"🧩 {len(failed_items)} tests fallidos agrupados en {len(clusters)} firmas de error")
 
-                # Generar recomendaciones usando Gemini AI
-                analysis = analyze_error_with_gemini(test_name, test_message)
+        # Generar recomendaciones usando Gemini AI (un representante por firma, en paralelo)
+        analyses = analyze_errors_concurrently(
+            [members[0] for members in clusters],
+            workers=ai_workers,
+            requests_per_minute=ai_requests_per_minute,
+            batch_size=ai_batch_size)
 
-                # Añadir análisis al informe
-                report_content.append(f"\n### 🔍 Test: {test_name}")
-                report_content.append(f"\n**🎯 Causa probable:** {analysis['causa_probable']}")
-                report_content.append(f"\n**📋 Categoría:** `{analysis.get('categoria', 'general')}`")
+        cluster_by_test = {}
+        for members in clusters:
+            analysis = analyses[members[0][0]]
+            for member in members:
+                cluster_by_test[member[0]] = (analysis, members)
 
-                if len(test_message) > 100:
-                    report_content.append(f"\n**❌ Error detectado:** `{test_message[:100]}...`")
-                else:
-                    report_content.append(f"\n**❌ Error detectado:** `{test_message}`")
+        for index, test_name, test_message in failed_items:
+            analysis, members = cluster_by_test[index]
+            representative_name = members[0][1]
 
-                report_content.append("\n**🛠️ Recomendaciones:**")
+            # Añadir análisis al informe
+            report_content.append(f"\n### 🔍 Test: {test_name}")
+            report_content.append(f"\n**🎯 Causa probable:** {analysis['causa_probable']}")
+            report_content.append(f"\n**📋 Categoría:** `{analysis.get('categoria', 'general')}`")
 
-                for i, recommendation in enumerate(analysis['recomendaciones'], 1):
-                    report_content.append(f"{i}. {recommendation}")
+            if len(members) > 1:
+                report_content.append(
+                    f"\n**🧩 Firma de error compartida:** {len(members)} tests (análisis de `{representative_name}`)")
+
+            if len(test_message) > 100:
+                report_content.append(f"\n**❌ Error detectado:** `{test_message[:100]}...`")
+            else:
+                report_content.append(f"\n**❌ Error detectado:** `{test_message}`")
+
+            report_content.append("\n**🛠️ Recomendaciones:**")
+
+            for i, recommendation in enumerate(analysis['recomendaciones'], 1):
+                report_content.append(f"{i}. {recommendation}")
 
     # Añadir enlaces a recursos útiles
     report_content.append("\n## 📚 Recursos Adicionales")
@@ -418,19 +607,23 @@ def main():
     # Configurar codificación al inicio
     print("🔧 Configurando codificación UTF-8...")
 
+    # Configurar argumentos (posicionales compatibles con la versión anterior)
+    parser = argparse.ArgumentParser(description="Genera el informe ejecutivo Markdown a partir de output.xml")
+    parser.add_argument("input_xml", nargs="?", default="output.xml", help="Archivo output.xml de Robot Framework")
+    parser.add_argument("output_dir", nargs="?", default="results", help="Directorio de salida del informe")
+    parser.add_argument("--ai-workers", type=int, default=4, help="Llamadas simultáneas a la IA")
+    parser.add_argument("--ai-rpm", type=int, default=None,
+                        help="Máximo de llamadas por minuto a la IA (0 = sin límite). "
+                             "Por defecto rate_limits de config/ai_providers.json")
+    parser.add_argument("--ai-batch-size", type=int, default=1,
+                        help="Tests fallidos por prompt de IA (1 = un prompt por error)")
+    args = parser.parse_args()
+
     # Configurar rutas
-    input_xml = "output.xml"
-    output_dir = "results"
+    input_xml = args.input_xml
+    output_dir = args.output_dir
     output_file = f"{output_dir}/informe_ejecutivo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
 
-    # Verificar argumentos
-    if len(sys.argv) > 1:
-        input_xml = sys.argv[1]
-
-    if len(sys.argv) > 2:
-        output_dir = sys.argv[2]
-        output_file = f"{output_dir}/informe_ejecutivo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-
     # Crear directorio si no existe
     create_directory_if_not_exists(output_dir)
 
@@ -441,10 +634,13 @@ def main():
 
     # Procesar el archivo XML
     print(f"🔄 Procesando el archivo {input_xml}...")
-    xml_root = parse_robot_output(input_xml)
+    results = parse_robot_output(input_xml)
 
     # Crear el informe en formato Markdown
-    create_markdown_report(xml_root, output_file)
+    create_markdown_report(results, output_file,
+                           ai_workers=args.ai_workers,
+                           ai_requests_per_minute=args.ai_rpm,
+                           ai_batch_size=args.ai_batch_size)
 
 
 if __name__ == "__main__":